@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import deque
+
+from paths import get_writable_path
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+RING_BUFFER_SIZE = 5000
+LOG_DIR = get_writable_path("logs")
+
+# console thresholds per subsystem, the longest matching logger name prefix wins.
+# everything down to DEBUG still goes into the ring buffer
+SUBSYSTEM_LEVELS = {
+    "": logging.INFO,
+    "video_player.watchdog": logging.WARNING,
+    "thumbnails": logging.WARNING,
+    "sprites": logging.WARNING,
+}
+# e.g. VV_LOG="video_player=DEBUG,drive_index=WARNING"
+LEVELS_ENV = "VV_LOG"
+
+ring_buffer = None
+
+
+class SubsystemFilter(logging.Filter):
+    def __init__(self, levels):
+        super().__init__()
+        self.levels = levels
+        self.cache = {}
+
+    def threshold(self, name):
+        level = self.cache.get(name)
+        if level is None:
+            prefix = name
+            while prefix not in self.levels:
+                prefix = prefix.rpartition(".")[0]
+            level = self.cache[name] = self.levels[prefix]
+        return level
+
+    def filter(self, record):
+        return record.levelno >= self.threshold(record.name)
+
+
+class RingBufferHandler(logging.Handler):
+    # keeps the raw records, messages are only formatted if the buffer gets dumped
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        super().__init__(logging.DEBUG)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, path, formatter):
+        records = list(self.records)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                try:
+                    f.write(formatter.format(record) + "\n")
+                except Exception as e:
+                    f.write(f"<unformattable record from {record.name}: {e}>\n")
+        return len(records)
+
+
+def parse_levels(spec):
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if isinstance(value, int):
+            levels["" if name.strip() in ("", "root") else name.strip()] = value
+    return levels
+
+
+def setup(levels=None):
+    global ring_buffer
+    thresholds = dict(SUBSYSTEM_LEVELS)
+    thresholds.update(levels or {})
+    thresholds.update(parse_levels(os.getenv(LEVELS_ENV, "")))
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    console.addFilter(SubsystemFilter(thresholds))
+
+    ring_buffer = RingBufferHandler()
+    ring_buffer.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(console)
+    root.addHandler(ring_buffer)
+
+    install_crash_hooks()
+
+
+def dump(path=None, reason="manual"):
+    if ring_buffer is None:
+        return None
+    if path is None:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        path = os.path.join(LOG_DIR, f"{reason}_{time.strftime('%Y%m%d_%H%M%S')}.log")
+    try:
+        count = ring_buffer.dump(path, ring_buffer.formatter)
+    except OSError as e:
+        logger.error("Could not write log dump %s: %s", path, e)
+        return None
+    logger.info("Dumped %d log records to %s", count, path)
+    return path
+
+
+def install_crash_hooks():
+    previous_excepthook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        logger.critical("Unhandled exception", exc_info=(exc_type, exc, tb))
+        dump(reason="crash")
+        previous_excepthook(exc_type, exc, tb)
+
+    def thread_excepthook(args):
+        logger.critical("Unhandled exception in thread %s", args.thread.name if args.thread else "?",
+                        exc_info=(args.exc_type, args.exc_value, args.exc_traceback))
+        dump(reason="crash")
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        # Tk only prints callback errors to stderr, which nobody sees in the packaged app
+        logger.error("Exception in Tk callback", exc_info=(exc_type, exc, tb))
+        dump(reason="crash")
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+    try:
+        import tkinter
+        tkinter.Tk.report_callback_exception = report_callback_exception
+    except ImportError:
+        pass
@@ -0,0 +1,119 @@
+import os
+import sys
+import random
+import struct
+import logging
+import tempfile
+
+import applog
+import keyframes
+
+logger = logging.getLogger(__name__)
+
+# regression checks for the container parsers on small generated files, exits with code 1 on a failure
+
+TS_VIDEO_PID = 0x100
+TS_FRAME_TICKS = 3000
+# an anchor (I or P) every third frame, decoded before the two B-frames displayed ahead of it
+TS_ANCHOR_INTERVAL = 3
+TS_KEYFRAME_INTERVAL = 12
+
+
+def ts_packet(pts, keyframe):
+    # one packet per frame: adaptation field with the random access flag, then a PES header with a PTS
+    pts_bytes = bytes([
+        0x21 | ((pts >> 29) & 0x0E),
+        (pts >> 22) & 0xFF,
+        0x01 | ((pts >> 14) & 0xFE),
+        (pts >> 7) & 0xFF,
+        0x01 | ((pts << 1) & 0xFE),
+    ])
+    pes = b"\x00\x00\x01\xE0\x00\x00\x80\x80\x05" + pts_bytes
+    header = bytes([0x47, 0x40 | (TS_VIDEO_PID >> 8), TS_VIDEO_PID & 0xFF, 0x30])
+    adaptation_length = keyframes.TS_PACKET_SIZE - len(header) - 1 - len(pes)
+    adaptation = bytes([adaptation_length, 0x40 if keyframe else 0x00]) + b"\xFF" * (adaptation_length - 1)
+    return header + adaptation + pes
+
+
+def write_ts(path, seconds, first_pts=0):
+    # open GOPs in decode order: every keyframe is followed by B-frames with an earlier PTS
+    frames = int(seconds * 90000 / TS_FRAME_TICKS)
+    keyframe_frames = []
+    with open(path, "wb") as f:
+        for anchor in range(TS_ANCHOR_INTERVAL - 1, frames, TS_ANCHOR_INTERVAL):
+            keyframe = anchor % TS_KEYFRAME_INTERVAL == TS_ANCHOR_INTERVAL - 1
+            if keyframe:
+                keyframe_frames.append(anchor)
+            for frame in [anchor] + list(range(anchor - TS_ANCHOR_INTERVAL + 1, anchor)):
+                pts = (first_pts + frame * TS_FRAME_TICKS) % keyframes.PTS_WRAP
+                f.write(ts_packet(pts, keyframe and frame == anchor))
+    last_frame = (frames // TS_ANCHOR_INTERVAL) * TS_ANCHOR_INTERVAL - 1
+    return last_frame * TS_FRAME_TICKS // 90, keyframe_frames
+
+
+def check_ts_bframes(folder):
+    failures = []
+    for name, first_pts in (("bframes", 900000), ("wrap", keyframes.PTS_WRAP - 5 * 90000)):
+        path = os.path.join(folder, f"{name}.ts")
+        duration_ms, keyframe_frames = write_ts(path, 10, first_pts)
+        table = keyframes.probe(path)
+        expected_keyframes = [frame * TS_FRAME_TICKS // 90 for frame in keyframe_frames]
+        if table["duration_ms"] != duration_ms:
+            failures.append(f"{name}.ts: duration {table['duration_ms']} ms, expected {duration_ms} ms")
+        if table["keyframes_ms"] != expected_keyframes:
+            failures.append(f"{name}.ts: keyframes {table['keyframes_ms'][:5]}..., expected {expected_keyframes[:5]}...")
+    return failures
+
+
+def mp4_box(box_type, body):
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def broken_files():
+    # name, contents: each has to be reported as a ContainerError, not crash the parser
+    yield "four_bytes.mkv", b"\x1a\x45\xdf\xa3"
+    ftyp = mp4_box(b"ftyp", b"isom\x00\x00\x02\x00")
+    yield "empty_mvhd.mp4", ftyp + mp4_box(b"moov", mp4_box(b"mvhd", b""))
+    yield "short_mvhd.mp4", ftyp + mp4_box(b"moov", mp4_box(b"mvhd", b"\x00\x00\x00\x00"))
+    rng = random.Random(7)
+    for i in range(200):
+        extension = (".mp4", ".mkv", ".ts")[i % 3]
+        yield f"garbage_{i}{extension}", bytes(rng.randrange(256) for _ in range(rng.randrange(1, 400)))
+
+
+def check_truncated(folder):
+    failures = []
+    for name, data in broken_files():
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        try:
+            keyframes.probe(path)
+            # random bytes can happen to parse, the named cases must be rejected
+            if not name.startswith("garbage_"):
+                failures.append(f"{name}: parsed without an error")
+        except keyframes.ContainerError:
+            pass
+        except Exception as e:
+            failures.append(f"{name}: {type(e).__name__}: {e}")
+    return failures
+
+
+CHECKS = [check_ts_bframes, check_truncated]
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="vv_check_") as folder:
+        for check in CHECKS:
+            found = check(folder)
+            logger.info("%s: %s", check.__name__, "FAILED" if found else "ok")
+            failures.extend(found)
+    for failure in failures:
+        logger.error(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    applog.setup({"": logging.INFO})
+    sys.exit(main())
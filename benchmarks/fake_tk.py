@@ -0,0 +1,79 @@
+import heapq
+from itertools import count
+
+# stands in for the Tk widgets the player window touches, so the control paths run without a display
+
+
+class FakeWidget:
+    def __init__(self, window_id=0):
+        self.options = {}
+        self.window_id = window_id
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key, "")
+
+    def winfo_id(self):
+        return self.window_id
+
+    def winfo_exists(self):
+        return True
+
+    def winfo_width(self):
+        return 800
+
+    def winfo_height(self):
+        return 16
+
+    def coords(self, *args):
+        pass
+
+    def bind(self, sequence, callback):
+        self.options[sequence] = callback
+
+    def destroy(self):
+        pass
+
+
+class FakeWindow(FakeWidget):
+    # after() callbacks run on a virtual clock when advance() is called, nothing waits for real
+    def __init__(self):
+        super().__init__()
+        self.clock_ms = 0
+        self.scheduled = []
+        self.order = count()
+        self.window_title = ""
+        self.destroyed = False
+
+    def title(self, text=None):
+        if text is None:
+            return self.window_title
+        self.window_title = text
+
+    def after(self, delay_ms, callback=None):
+        heapq.heappush(self.scheduled, (self.clock_ms + delay_ms, next(self.order), callback))
+
+    def advance(self, ms):
+        end = self.clock_ms + ms
+        while self.scheduled and self.scheduled[0][0] <= end:
+            due, _, callback = heapq.heappop(self.scheduled)
+            self.clock_ms = max(self.clock_ms, due)
+            if callback is not None and not self.destroyed:
+                callback()
+        self.clock_ms = end
+
+    def update(self):
+        pass
+
+    update_idletasks = deiconify = withdraw = focus_force = update
+
+    def winfo_exists(self):
+        return not self.destroyed
+
+    def destroy(self):
+        self.destroyed = True
+        self.scheduled.clear()
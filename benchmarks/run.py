@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+from time import perf_counter
+
+import applog
+import metrics
+import player_backend
+from benchmarks import synthetic_rec
+from benchmarks.fake_tk import FakeWidget, FakeWindow
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_VERSION = 1
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_REPEAT = 5
+# a result counts as a regression when its median is this much slower than the baseline
+REGRESSION_TOLERANCE = 0.25
+# and at least this many ms slower, below that it is timer noise
+REGRESSION_MIN_MS = 0.05
+KEYFRAME_INTERVAL_MS = 2000
+SKIP_SECONDS = 10
+
+results = {}
+
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "max_ms": round(max(samples), 4),
+    }
+
+
+def measure(name, fn, repeat, setup=None, after=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = perf_counter()
+        fn()
+        samples.append((perf_counter() - started) * 1000)
+        if after is not None:
+            after()
+    results[name] = summarize(samples)
+    logger.info("%s: median %.3f ms over %s runs", name, results[name]['median_ms'], repeat)
+
+
+def bench_navigation(rec_path, work_dir, repeat):
+    import navigation
+    import coverage
+    import drive_probe
+    from catalog import Catalog
+    from state_store import StateStore
+
+    # everything the app would write goes to the work folder, not the user's state
+    navigation.DRIVE_INDEX_DIR = os.path.join(work_dir, "drive_index")
+    navigation.state_store = StateStore(os.path.join(work_dir, "state.db"))
+    navigation.state_store.load()
+    navigation.config["rec_path"] = rec_path
+
+    def drop_index():
+        shutil.rmtree(navigation.DRIVE_INDEX_DIR, ignore_errors=True)
+
+    measure("scan.parse_existing_camera_files.cold", navigation.parse_existing_camera_files, repeat, setup=drop_index)
+    measure("scan.parse_existing_camera_files.warm", navigation.parse_existing_camera_files, repeat)
+    measure("scan.catalog_from_scan", lambda: Catalog.from_scan(rec_path, navigation.drive_scan), repeat)
+    measure("scan.coverage_from_catalog", lambda: coverage.Coverage.from_catalog(navigation.camera_catalog), repeat)
+    measure("scan.drive_probe", lambda: drive_probe.probe(rec_path, navigation.drive_scan), repeat)
+    measure("summary.display_summary", navigation.display_summary, repeat)
+
+    catalog = navigation.camera_catalog
+    # every other timestamp counts as reviewed so the check marks and progress counts have work to do
+    for start in catalog.group_starts[::2]:
+        for camera, cam_start in catalog.group_members(start):
+            navigation.viewed_index.add(camera, cam_start)
+
+    all_days = [(y, m, d) for y in catalog.years() for m in catalog.months(y) for d in catalog.days(y, m)]
+
+    def update_years():
+        # what the dropdowns do after a scan: first year, month and day, then that day's times
+        years = catalog.years()
+        months = catalog.months(years[0])
+        days = catalog.days(years[0], months[0])
+        navigation.time_entries(years[0], months[0], days[0])
+        navigation.day_progress(years[0], months[0], days[0])
+
+    def update_times_every_day():
+        for y, m, d in all_days:
+            navigation.time_entries(y, m, d)
+            navigation.day_progress(y, m, d)
+
+    if all_days:
+        measure("dropdowns.update_years", update_years, repeat)
+        measure("dropdowns.update_times_all_days", update_times_every_day, repeat)
+        results["dropdowns.update_times_all_days"]["days"] = len(all_days)
+
+    navigation.close_state()
+    return {
+        "cameras": len(catalog.camera_names()),
+        "segments": catalog.segment_count(),
+        "timestamps": len(catalog),
+        "days": len(all_days),
+        "probe": navigation.video_player.drive_profile,
+    }
+
+
+def open_fake_window(vp, files, catalog, start):
+    # a session with the widgets create_gui would build, backed by fake ones
+    session = vp.PlayerSession(files, catalog, start)
+    vp.sessions.append(session)
+    session.root = FakeWindow()
+    session.timer_label = FakeWidget()
+    session.overlay_label = FakeWidget()
+    session.sync_label = FakeWidget()
+    session.decode_label = FakeWidget()
+    session.goto_button = FakeWidget()
+    session.control_widgets = [FakeWidget() for _ in range(12)]
+    session.speed_buttons = [(rate, FakeWidget()) for rate in (0.25, 0.5, 1, 2)]
+    session.frames = [FakeWidget(i + 1) for i in range(len(files))]
+    session.file_leads_ms = session.segment_leads(start, files)
+    session.footage_start_time = vp.parse_footage_start(
+        os.path.basename(vp.reference_file(files, session.file_leads_ms)))
+    session.loading_popup = FakeWidget()
+    return session
+
+
+def bench_player(catalog, repeat):
+    import video_player as vp
+
+    if not catalog:
+        return {}
+    start = max(catalog.group_starts, key=lambda t: len(catalog.group_members(t)))
+    files = catalog.files_at(start)
+    backend = player_backend.get_backend()
+    vp.sprite_cache_dir = None
+    # keyframe tables as if the background index had finished, without probing the empty files
+    index = vp.get_keyframe_index()
+    for file in files:
+        index.tables[file] = {"format": "mp4", "duration_ms": backend.length_ms,
+                              "keyframes_ms": list(range(0, backend.length_ms, KEYFRAME_INTERVAL_MS))}
+
+    session = open_fake_window(vp, files, catalog, start)
+    window = session.root
+
+    def pump():
+        session.pump_player_events()
+
+    def settle(ms=0):
+        pump()
+        window.advance(ms)
+        window.scheduled.clear()
+
+    measure("player.start_players", lambda: (session.start_players(files), pump()), repeat, after=settle)
+
+    def skip():
+        direction = 1 if session.manual_offset < SKIP_SECONDS else -1
+        session.skip_all_players(direction * SKIP_SECONDS)
+        while session.skip_in_progress:
+            pump()
+            window.advance(vp.SEEK_POLL_INTERVAL_MS)
+
+    measure("player.skip", skip, repeat, after=settle)
+    measure("player.step_keyframe", lambda: (session.step_keyframe(1), pump()), repeat, after=settle)
+
+    speeds = iter([2, 1] * repeat)
+
+    def set_speed():
+        session.set_speed(next(speeds))
+        # runs the warm-up play, the pause and re-enabling the controls
+        window.advance(1000)
+        pump()
+
+    measure("player.set_speed", set_speed, repeat, after=settle)
+    measure("player.toggle_play_pause", lambda: (session.toggle_play_pause(), pump()), repeat, after=settle)
+
+    session.play_all_players()
+    pump()
+    session.playback_start_monotonic -= vp.SYNC_GRACE_SECONDS * 2
+
+    def time_events():
+        for player in session.players:
+            player.tick()
+        pump()
+
+    measure("player.time_events", time_events, repeat, after=settle)
+    measure("player.check_sync", session.check_sync, repeat, after=settle)
+
+    def update_timer():
+        session.last_timer_text = None
+        session.update_timer()
+
+    measure("player.update_timer", update_timer, repeat)
+
+    def focus_tile():
+        # focusing reopens every tile at its new decode quality, the next run unfocuses again
+        session.on_tile_click(0)
+        pump()
+
+    measure("player.focus_tile", focus_tile, repeat, after=settle)
+
+    session.on_closing()
+    vp.release_vlc()
+    return {"cameras": len(files), "start": start}
+
+
+def compare(baseline_file, tolerance):
+    with open(baseline_file, "r") as f:
+        baseline = json.load(f).get("results", {})
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        result["baseline_median_ms"] = base["median_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance and result["median_ms"] - base["median_ms"] > REGRESSION_MIN_MS:
+            regressions.append(name)
+            logger.warning("%s regressed: %.3f -> %.3f ms", name, base['median_ms'], result['median_ms'])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time drive scanning, the navigation dropdowns and player controls.")
+    parser.add_argument("--rec-path", help="benchmark an existing REC folder instead of generating one")
+    parser.add_argument("--work-dir", help="where to generate the drive and keep indexes, a temp folder by default")
+    parser.add_argument("--keep", action="store_true", help="keep the generated drive afterwards")
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--baseline", help="earlier results file, exit with code 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--skip-player", action="store_true", help="only time scanning and the dropdowns")
+    synthetic_rec.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # nothing is decoded, the player and thumbnail code only ever see fake libvlc players
+    player_backend.set_backend(player_backend.FakeBackend())
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="vv_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    drive = {}
+    try:
+        if args.rec_path:
+            rec_path = args.rec_path
+            drive["source"] = "existing"
+        else:
+            rec_path = os.path.join(work_dir, "REC")
+            shutil.rmtree(rec_path, ignore_errors=True)
+            drive["source"] = "synthetic"
+            drive["synthetic"] = synthetic_rec.generate_from_args(rec_path, args)
+
+        drive.update(bench_navigation(rec_path, work_dir, args.repeat))
+        if not args.skip_player:
+            import navigation
+            drive["player"] = bench_player(navigation.camera_catalog, args.repeat)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    regressions = compare(args.baseline, args.tolerance) if args.baseline else []
+    report = {
+        "version": BENCHMARK_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": metrics.machine_info(),
+        "drive": drive,
+        "repeat": args.repeat,
+        "results": results,
+        "regressions": regressions,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Benchmark results written to %s", args.output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    applog.setup({"": logging.INFO, "drive_index": logging.WARNING, "catalog": logging.WARNING,
+                  "coverage": logging.WARNING, "navigation": logging.WARNING, "state_store": logging.WARNING,
+                  "video_player": logging.WARNING})
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import calendar
+
+from catalog import SEGMENT_SECONDS
+from drive_index import CORRUPTED_FOLDER
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = (".mp4", ".ts", ".mkv")
+# NTFS reserves the full length even for a plain truncate, so chunks stay empty there unless a size is given
+DEFAULT_FILE_SIZE = 0 if os.name == "nt" else 200 * 1024 * 1024
+MANIFEST_FILE = "synthetic_rec.json"
+# leftovers found on real drives next to the chunks, the scanner has to skip them
+JUNK_FILES = ("index.dat", "recorder.log", "CAM_tmp.mp4.part")
+
+
+def chunk_name(camera, start, precise, extension):
+    stamp = time.strftime("%Y%m%d_%H%M%S" if precise else "%Y%m%d_%H%M", time.gmtime(start))
+    return f"{camera}_{stamp}{extension}"
+
+
+def write_sparse(path, size):
+    # truncate only sets the length, on most file systems no data blocks are written
+    with open(path, "wb") as f:
+        if size:
+            f.truncate(size)
+
+
+def generate(rec_path, cameras=10, days=30, first_day=(2024, 1, 1), file_size=DEFAULT_FILE_SIZE,
+             skew_seconds=40, jitter_seconds=3, hhmm_ratio=0.3, dropout=0.01, outages=2,
+             corrupted_ratio=0.002, seed=1):
+    rng = random.Random(seed)
+    first = calendar.timegm(tuple(first_day) + (0, 0, 0))
+    last = first + days * 86400
+    started = time.perf_counter()
+    counts = {"files": 0, "corrupted": 0, "junk": 0}
+
+    for index in range(1, cameras + 1):
+        camera = f"CAM{index}"
+        folder = os.path.join(rec_path, camera)
+        os.makedirs(folder, exist_ok=True)
+        # every camera's clock is off by a fixed amount, and some only write HHMM names
+        skew = rng.randint(-skew_seconds, skew_seconds)
+        precise = rng.random() >= hhmm_ratio
+        extension = EXTENSIONS[(index - 1) % len(EXTENSIONS)]
+        gaps = []
+        for _ in range(outages):
+            gap_start = rng.randrange(first, last)
+            gaps.append((gap_start, gap_start + rng.randint(1, 12) * 3600))
+
+        t = first + skew
+        while t < last:
+            start = t + rng.randint(-jitter_seconds, jitter_seconds)
+            t += SEGMENT_SECONDS
+            if rng.random() < dropout or any(a <= start < b for a, b in gaps):
+                continue
+            name = chunk_name(camera, start, precise, extension)
+            size = max(0, file_size + rng.randint(-file_size // 20, file_size // 20))
+            if rng.random() < corrupted_ratio:
+                corrupted = os.path.join(folder, CORRUPTED_FOLDER)
+                os.makedirs(corrupted, exist_ok=True)
+                write_sparse(os.path.join(corrupted, name), rng.randint(0, size))
+                counts["corrupted"] += 1
+                continue
+            write_sparse(os.path.join(folder, name), size)
+            counts["files"] += 1
+
+        for junk in JUNK_FILES:
+            write_sparse(os.path.join(folder, junk), 1024)
+            counts["junk"] += 1
+
+    manifest = {
+        "rec_path": rec_path,
+        "cameras": cameras,
+        "days": days,
+        "first_day": list(first_day),
+        "file_size": file_size,
+        "skew_seconds": skew_seconds,
+        "jitter_seconds": jitter_seconds,
+        "hhmm_ratio": hhmm_ratio,
+        "dropout": dropout,
+        "outages": outages,
+        "corrupted_ratio": corrupted_ratio,
+        "seed": seed,
+        "counts": counts,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+    }
+    with open(os.path.join(rec_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info("Generated %s chunks for %s cameras in %s in %s s",
+                counts['files'], cameras, rec_path, manifest['elapsed_seconds'])
+    return manifest
+
+
+def parse_day_arg(value):
+    try:
+        parsed = time.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value}")
+    return (parsed.tm_year, parsed.tm_mon, parsed.tm_mday)
+
+
+def add_arguments(parser):
+    parser.add_argument("--cameras", type=int, default=10, help="number of CAM folders")
+    parser.add_argument("--days", type=int, default=30, help="days of continuous recording")
+    parser.add_argument("--first-day", type=parse_day_arg, default=(2024, 1, 1), help="YYYY-MM-DD")
+    parser.add_argument("--file-size", type=int, default=DEFAULT_FILE_SIZE, help="nominal chunk size in bytes")
+    parser.add_argument("--skew", type=int, default=40, help="max clock offset per camera in seconds")
+    parser.add_argument("--hhmm-ratio", type=float, default=0.3, help="share of cameras writing HHMM names")
+    parser.add_argument("--dropout", type=float, default=0.01, help="chance of a missing chunk")
+    parser.add_argument("--outages", type=int, default=2, help="multi hour gaps per camera")
+    parser.add_argument("--corrupted-ratio", type=float, default=0.002, help="share of chunks in corrupted/")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def generate_from_args(rec_path, args):
+    return generate(rec_path, cameras=args.cameras, days=args.days, first_day=args.first_day,
+                    file_size=args.file_size, skew_seconds=args.skew, hhmm_ratio=args.hhmm_ratio,
+                    dropout=args.dropout, outages=args.outages, corrupted_ratio=args.corrupted_ratio,
+                    seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic REC folder of empty, correctly named chunks.")
+    parser.add_argument("rec_path", help="REC folder to create, must not exist yet")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.rec_path):
+        logger.error("%s already exists", args.rec_path)
+        return 2
+    generate_from_args(args.rec_path, args)
+    return 0
+
+
+if __name__ == "__main__":
+    import applog
+    applog.setup()
+    sys.exit(main())
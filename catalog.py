@@ -0,0 +1,265 @@
+import os
+import re
+import time
+import heapq
+import bisect
+import calendar
+import logging
+from array import array
+from itertools import repeat
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+logger.debug("catalog.py initialized.")
+
+#adding mkv support
+file_pattern = re.compile(r"^(CAM\d+)_((\d{8})_(\d{6}|\d{4}))\.(mp4|ts|mkv)$")
+
+# cameras record ten minute chunks, the nominal length is used for range queries
+SEGMENT_SECONDS = 600
+
+# cameras don't start their chunks on the exact same second, and with HHMM names a one
+# second difference (11:55:59 vs 11:56:00) shows up as a full minute. starts this close
+# together across cameras are treated as the same timestamp
+GROUP_TOLERANCE_SECONDS = 90
+
+Segment = namedtuple("Segment", ["camera", "start", "end", "path"])
+
+
+def parse_day(date_part):
+    try:
+        year, month, day = int(date_part[:4]), int(date_part[4:6]), int(date_part[6:8])
+        if not (1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]):
+            return None
+    except ValueError:
+        return None
+    # filename times are wall clock with no timezone, so they are stored as if UTC
+    # to keep them monotonic across DST changes
+    return calendar.timegm((year, month, day, 0, 0, 0))
+
+
+def parse_timestamp(date_part, time_part, day_cache=None):
+    if day_cache is None:
+        day = parse_day(date_part)
+    else:
+        day = day_cache.get(date_part, False)
+        if day is False:
+            day = day_cache[date_part] = parse_day(date_part)
+    if day is None:
+        return None
+
+    hour, minute = int(time_part[:2]), int(time_part[2:4])
+    second = int(time_part[4:6]) if len(time_part) == 6 else 0
+    if not (hour < 24 and minute < 60 and second < 60):
+        return None
+    return day + hour * 3600 + minute * 60 + second
+
+
+def year_start(year):
+    return calendar.timegm((year, 1, 1, 0, 0, 0))
+
+
+def month_start(year, month):
+    if month > 12:
+        year, month = year + 1, month - 12
+    return calendar.timegm((year, month, 1, 0, 0, 0))
+
+
+def day_start(year, month, day):
+    return calendar.timegm((year, month, day, 0, 0, 0))
+
+
+class CameraSegments:
+    __slots__ = ("name", "folder", "starts", "ends", "names", "precise", "max_length")
+
+    def __init__(self, name, folder):
+        self.name = name
+        self.folder = folder
+        self.starts = array("q")
+        self.ends = array("q")
+        self.names = []
+        # 1 when the file name carries seconds (HHMMSS), 0 for HHMM names
+        self.precise = array("b")
+        self.max_length = SEGMENT_SECONDS
+
+    def __len__(self):
+        return len(self.starts)
+
+    def segment(self, i):
+        return Segment(self.name, self.starts[i], self.ends[i], os.path.join(self.folder, self.names[i]))
+
+
+class Catalog:
+    def __init__(self, tolerance=GROUP_TOLERANCE_SECONDS):
+        self.tolerance = tolerance
+        self.cameras = {}
+        # each group spans [group_starts[i], group_ends[i]] and holds at most one segment per camera
+        self.group_starts = array("q")
+        self.group_ends = array("q")
+        self.group_labels = []
+
+    @classmethod
+    def from_scan(cls, rec_path, drive_scan, tolerance=GROUP_TOLERANCE_SECONDS):
+        catalog = cls(tolerance)
+        labels = {}
+        day_cache = {}
+        for cam_name, cam_entry in drive_scan.items():
+            parsed = []
+            for file, _size, _mtime in cam_entry["files"]:
+                match = file_pattern.match(file)
+                if not match:
+                    logger.debug("Unmatched file: %s", file)
+                    continue
+                _, _, date_part, time_part, _ = match.groups()
+                start = parse_timestamp(date_part, time_part, day_cache)
+                if start is None:
+                    logger.debug("Invalid timestamp in file name: %s", file)
+                    continue
+                parsed.append((start, file, len(time_part) == 6))
+                labels.setdefault(start, time_part)
+
+            parsed.sort()
+            cam = CameraSegments(cam_name, os.path.join(rec_path, cam_name))
+            for start, file, precise in parsed:
+                cam.starts.append(start)
+                cam.ends.append(start + SEGMENT_SECONDS)
+                cam.names.append(file)
+                cam.precise.append(precise)
+            catalog.cameras[cam_name] = cam
+
+        catalog.build_groups(labels)
+        return catalog
+
+    def build_groups(self, labels):
+        merged = heapq.merge(*(zip(cam.starts, repeat(cam.name)) for cam in self.cameras.values()))
+        group_first = group_last = None
+        members = set()
+        for start, cam_name in merged:
+            if group_first is None or start - group_first > self.tolerance or cam_name in members:
+                if group_first is not None:
+                    self.add_group(group_first, group_last, labels[group_first])
+                group_first = start
+                members.clear()
+            members.add(cam_name)
+            group_last = start
+        if group_first is not None:
+            self.add_group(group_first, group_last, labels[group_first])
+
+    def add_group(self, start, end, label):
+        self.group_starts.append(start)
+        self.group_ends.append(end)
+        self.group_labels.append(label)
+
+    def __len__(self):
+        return len(self.group_starts)
+
+    def __bool__(self):
+        return len(self.group_starts) > 0
+
+    def segment_count(self):
+        return sum(len(cam) for cam in self.cameras.values())
+
+    def camera_names(self):
+        return [name for name, cam in self.cameras.items() if len(cam)]
+
+    def overlapping(self, t0, t1, cameras=None):
+        segments = []
+        for cam in self.cameras.values():
+            if cameras is not None and cam.name not in cameras:
+                continue
+            i = bisect.bisect_right(cam.starts, t0 - cam.max_length)
+            hi = bisect.bisect_left(cam.starts, t1)
+            for j in range(i, hi):
+                if cam.ends[j] > t0:
+                    segments.append(cam.segment(j))
+        return segments
+
+    def containing(self, t, cameras=None):
+        segments = []
+        for cam in self.cameras.values():
+            if cameras is not None and cam.name not in cameras:
+                continue
+            hi = bisect.bisect_right(cam.starts, t)
+            for j in range(hi - 1, bisect.bisect_right(cam.starts, t - cam.max_length) - 1, -1):
+                if cam.ends[j] > t:
+                    segments.append(cam.segment(j))
+                    break
+        return segments
+
+    def group_segments(self, start):
+        # (camera, index) for each camera recording in the group that begins at start
+        g = bisect.bisect_left(self.group_starts, start)
+        if g >= len(self.group_starts) or self.group_starts[g] != start:
+            return []
+        end = self.group_ends[g]
+        found = []
+        for cam in self.cameras.values():
+            i = bisect.bisect_left(cam.starts, start)
+            if i < len(cam.starts) and cam.starts[i] <= end:
+                found.append((cam, i))
+        return found
+
+    def group_members(self, start):
+        return [(cam.name, cam.starts[i]) for cam, i in self.group_segments(start)]
+
+    def segment_counts(self, t0, t1):
+        counts = {}
+        for cam in self.cameras.values():
+            n = bisect.bisect_left(cam.starts, t1) - bisect.bisect_left(cam.starts, t0)
+            if n:
+                counts[cam.name] = n
+        return counts
+
+    def members_at(self, start):
+        # (path, offset) per camera, offset is how many seconds after the earliest camera it began.
+        # only names with seconds are precise enough for that, HHMM names get None
+        found = [(os.path.join(cam.folder, cam.names[i]), cam.starts[i], cam.precise[i])
+                 for cam, i in self.group_segments(start)]
+
+        precise_starts = [cam_start for _, cam_start, precise in found if precise]
+        reference = min(precise_starts) if precise_starts else None
+        return [(path, cam_start - reference if precise else None) for path, cam_start, precise in found]
+
+    def files_at(self, start):
+        return [path for path, _ in self.members_at(start)]
+
+    def next_start(self, start):
+        i = bisect.bisect_right(self.group_starts, start)
+        return self.group_starts[i] if i < len(self.group_starts) else None
+
+    def _group_range(self, t0, t1):
+        return bisect.bisect_left(self.group_starts, t0), bisect.bisect_left(self.group_starts, t1)
+
+    def years(self):
+        years = []
+        i, end = 0, len(self.group_starts)
+        while i < end:
+            year = time.gmtime(self.group_starts[i]).tm_year
+            years.append(f"{year:04}")
+            i = bisect.bisect_left(self.group_starts, year_start(year + 1), i)
+        return years
+
+    def months(self, year):
+        months = []
+        year = int(year)
+        i, end = self._group_range(year_start(year), year_start(year + 1))
+        while i < end:
+            month = time.gmtime(self.group_starts[i]).tm_mon
+            months.append(f"{month:02}")
+            i = bisect.bisect_left(self.group_starts, month_start(year, month + 1), i)
+        return months
+
+    def days(self, year, month):
+        days = []
+        year, month = int(year), int(month)
+        i, end = self._group_range(month_start(year, month), month_start(year, month + 1))
+        while i < end:
+            day = time.gmtime(self.group_starts[i]).tm_mday
+            days.append(f"{day:02}")
+            i = bisect.bisect_left(self.group_starts, day_start(year, month, day) + 86400, i)
+        return days
+
+    def times(self, year, month, day):
+        t0 = day_start(int(year), int(month), int(day))
+        i, end = self._group_range(t0, t0 + 86400)
+        return [(self.group_labels[j], self.group_starts[j]) for j in range(i, end)]
@@ -0,0 +1,162 @@
+import json
+import time
+import logging
+
+import numpy as np
+
+from catalog import SEGMENT_SECONDS, GROUP_TOLERANCE_SECONDS
+
+logger = logging.getLogger(__name__)
+logger.debug("coverage.py initialized.")
+
+# segment ends are nominal (start + ten minutes), so small slips either way aren't reported
+GAP_TOLERANCE_SECONDS = 60
+OVERLAP_TOLERANCE_SECONDS = 30
+
+
+def format_time(t):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(int(t)))
+
+
+def merge_intervals(starts, ends, tolerance=0):
+    # starts must be sorted, intervals closer than tolerance are joined
+    if not len(starts):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy()
+    reach = np.maximum.accumulate(ends)
+    new = np.empty(len(starts), dtype=bool)
+    new[0] = True
+    new[1:] = starts[1:] > reach[:-1] + tolerance
+    first = np.flatnonzero(new)
+    last = np.append(first[1:] - 1, len(starts) - 1)
+    return starts[first], reach[last]
+
+
+class CameraCoverage:
+    __slots__ = ("name", "starts", "ends", "covered_starts", "covered_ends", "overlap_mask", "duplicate_mask", "reach")
+
+    def __init__(self, name, starts, ends):
+        self.name = name
+        self.starts = starts
+        self.ends = ends
+        self.covered_starts, self.covered_ends = merge_intervals(starts, ends, GAP_TOLERANCE_SECONDS)
+        self.reach = np.maximum.accumulate(ends) if len(ends) else ends
+        # duplicates are a second chunk starting within the grouping tolerance of the previous one,
+        # overlaps are chunks that start well before the previous one should have ended
+        self.duplicate_mask = np.diff(starts) <= GROUP_TOLERANCE_SECONDS
+        self.overlap_mask = (starts[1:] < self.reach[:-1] - OVERLAP_TOLERANCE_SECONDS) & ~self.duplicate_mask
+
+    def covered_seconds(self):
+        return int((self.covered_ends - self.covered_starts).sum())
+
+    def gaps(self):
+        return self.covered_ends[:-1], self.covered_starts[1:]
+
+    def covers(self, times):
+        i = np.searchsorted(self.covered_starts, times, side="right") - 1
+        inside = i >= 0
+        inside[inside] = times[inside] < self.covered_ends[i[inside]]
+        return inside
+
+    def report(self, span_seconds):
+        gap_starts, gap_ends = self.gaps()
+        overlap_idx = np.flatnonzero(self.overlap_mask) + 1
+        duplicate_idx = np.flatnonzero(self.duplicate_mask) + 1
+        return {
+            "segments": int(len(self.starts)),
+            "first": format_time(self.starts[0]) if len(self.starts) else None,
+            "last": format_time(self.ends[-1]) if len(self.ends) else None,
+            "covered_seconds": self.covered_seconds(),
+            "coverage_ratio": round(self.covered_seconds() / span_seconds, 4) if span_seconds else 0,
+            "gap_seconds": int((gap_ends - gap_starts).sum()),
+            "gaps": [{"from": format_time(a), "to": format_time(b), "seconds": int(b - a)}
+                     for a, b in zip(gap_starts, gap_ends)],
+            "overlaps": [{"at": format_time(self.starts[i]), "seconds": int(self.reach[i - 1] - self.starts[i])}
+                         for i in overlap_idx],
+            "extra_chunks": [format_time(self.starts[i]) for i in duplicate_idx],
+        }
+
+
+class Coverage:
+    def __init__(self):
+        self.cameras = {}
+        self.all_starts = np.empty(0, dtype=np.int64)
+        self.all_ends = np.empty(0, dtype=np.int64)
+        self.first = None
+        self.last = None
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        started = time.perf_counter()
+        coverage = cls()
+        for cam in catalog.cameras.values():
+            if not len(cam):
+                continue
+            starts = np.array(cam.starts, dtype=np.int64)
+            ends = np.array(cam.ends, dtype=np.int64)
+            coverage.cameras[cam.name] = CameraCoverage(cam.name, starts, ends)
+
+        if coverage.cameras:
+            coverage.first = min(int(cam.starts[0]) for cam in coverage.cameras.values())
+            coverage.last = max(int(cam.reach[-1]) for cam in coverage.cameras.values())
+            coverage.all_starts, coverage.all_ends = coverage.all_present()
+        logger.info("Coverage for %s segments computed in %.1f ms",
+                    catalog.segment_count(), (time.perf_counter() - started) * 1000)
+        return coverage
+
+    def all_present(self):
+        # sweep over every camera's covered intervals, keeping stretches where the count equals the camera count
+        cams = list(self.cameras.values())
+        bounds = np.concatenate([cam.covered_starts for cam in cams] + [cam.covered_ends for cam in cams])
+        deltas = np.concatenate([np.ones(len(cam.covered_starts), dtype=np.int64) for cam in cams]
+                                + [-np.ones(len(cam.covered_ends), dtype=np.int64) for cam in cams])
+        # at equal times starts sort first, so a hand-off between cameras doesn't open a zero length hole
+        order = np.lexsort((-deltas, bounds))
+        times = bounds[order]
+        counts = np.cumsum(deltas[order])
+        full = np.flatnonzero(counts[:-1] == len(cams))
+        starts, ends = times[full], times[full + 1]
+        keep = ends > starts
+        return merge_intervals(starts[keep], ends[keep])
+
+    def span_seconds(self):
+        return self.last - self.first if self.cameras else 0
+
+    def all_present_ratio(self):
+        span = self.span_seconds()
+        return float((self.all_ends - self.all_starts).sum()) / span if span else 0.0
+
+    def gap_count(self):
+        return sum(len(cam.covered_starts) - 1 for cam in self.cameras.values())
+
+    def present_counts(self, times):
+        times = np.asarray(times, dtype=np.int64)
+        counts = np.zeros(len(times), dtype=np.int64)
+        for cam in self.cameras.values():
+            counts += cam.covers(times)
+        return counts
+
+    def report(self):
+        span = self.span_seconds()
+        return {
+            "first": format_time(self.first) if self.cameras else None,
+            "last": format_time(self.last) if self.cameras else None,
+            "span_seconds": span,
+            "cameras": {name: cam.report(span) for name, cam in self.cameras.items()},
+            "all_cameras_present": {
+                "ratio": round(self.all_present_ratio(), 4),
+                "intervals": [{"from": format_time(a), "to": format_time(b)}
+                              for a, b in zip(self.all_starts, self.all_ends)],
+            },
+        }
+
+
+def write_report(coverage, output):
+    with open(output, "w") as f:
+        json.dump(coverage.report(), f, indent=2)
+    logger.info("Coverage report written to %s", output)
+
+
+def segment_midpoints(starts):
+    # a timestamp counts a camera as present if it is recording halfway into the chunk
+    return np.asarray(starts, dtype=np.int64) + SEGMENT_SECONDS // 2
@@ -0,0 +1,77 @@
+# drift is measured as player time minus master clock time, in ms
+NUDGE_THRESHOLD_MS = 120
+RESYNC_THRESHOLD_MS = 1000
+# a nudge aims to remove the drift over this many seconds of playback
+NUDGE_WINDOW_SECONDS = 4
+MAX_NUDGE = 0.05
+
+
+class DriftStats:
+    __slots__ = ("samples", "mean_abs", "max_abs", "last", "nudges", "resyncs")
+
+    def __init__(self):
+        self.samples = 0
+        self.mean_abs = 0.0
+        self.max_abs = 0.0
+        self.last = 0.0
+        self.nudges = 0
+        self.resyncs = 0
+
+    def add(self, drift_ms):
+        self.samples += 1
+        self.last = drift_ms
+        self.mean_abs += (abs(drift_ms) - self.mean_abs) / self.samples
+        self.max_abs = max(self.max_abs, abs(drift_ms))
+
+    def as_dict(self):
+        return {
+            "samples": self.samples,
+            "last_ms": round(self.last, 1),
+            "mean_abs_ms": round(self.mean_abs, 1),
+            "max_abs_ms": round(self.max_abs, 1),
+            "nudges": self.nudges,
+            "resyncs": self.resyncs,
+        }
+
+
+class DriftMonitor:
+    def __init__(self, nudge_threshold_ms=NUDGE_THRESHOLD_MS, resync_threshold_ms=RESYNC_THRESHOLD_MS):
+        self.nudge_threshold_ms = nudge_threshold_ms
+        self.resync_threshold_ms = resync_threshold_ms
+        self.stats = {}
+        self.nudged = set()
+
+    def reset(self):
+        self.stats.clear()
+        self.nudged.clear()
+
+    def correction(self, camera, drift_ms, speed):
+        # returns ("resync", None), ("rate", new_rate) or (None, None)
+        stats = self.stats.setdefault(camera, DriftStats())
+        stats.add(drift_ms)
+
+        if abs(drift_ms) >= self.resync_threshold_ms:
+            stats.resyncs += 1
+            self.nudged.discard(camera)
+            return "resync", speed
+
+        if abs(drift_ms) >= self.nudge_threshold_ms:
+            # a player ahead of the clock runs slightly slower until it is back in line
+            nudge = -drift_ms / 1000 / NUDGE_WINDOW_SECONDS / max(speed, 0.01)
+            nudge = max(-MAX_NUDGE, min(MAX_NUDGE, nudge))
+            stats.nudges += 1
+            self.nudged.add(camera)
+            return "rate", speed * (1 + nudge)
+
+        if camera in self.nudged:
+            self.nudged.discard(camera)
+            return "rate", speed
+        return None, None
+
+    def summary(self):
+        return {camera: stats.as_dict() for camera, stats in self.stats.items()}
+
+    def worst_drift_ms(self):
+        if not self.stats:
+            return None
+        return max(abs(stats.last) for stats in self.stats.values())
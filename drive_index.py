@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+logger.debug("drive_index.py initialized.")
+
+INDEX_VERSION = 2
+VIDEO_EXTENSIONS = (".mp4", ".ts", ".mkv")
+CORRUPTED_FOLDER = "corrupted"
+CAMERA_FOLDER_PATTERN = re.compile(r"^CAM(\d+)$")
+
+# scans are I/O bound, this mostly bounds how many requests hit a network share at once
+MAX_SCAN_WORKERS = 8
+
+# FAT/exFAT drives only keep 2 second mtimes, so a folder touched right before
+# the scan can't be trusted yet and gets rescanned next time
+RACY_MTIME_SECONDS = 2
+
+
+def index_file_for(rec_path, index_dir):
+    key = os.path.normcase(os.path.abspath(rec_path)).encode("utf-8")
+    return os.path.join(index_dir, f"{hashlib.sha1(key).hexdigest()[:16]}.json")
+
+
+def load_index(index_file, rec_path):
+    empty = {"version": INDEX_VERSION, "rec_path": rec_path, "cameras": {}}
+    if not os.path.exists(index_file):
+        return empty
+    try:
+        with open(index_file, "r") as f:
+            index = json.load(f)
+    except Exception as e:
+        logger.warning("Discarding unreadable drive index %s: %s", index_file, e)
+        return empty
+
+    if index.get("version") != INDEX_VERSION or index.get("rec_path") != rec_path:
+        logger.info("Drive index %s is stale, rebuilding", index_file)
+        return empty
+    return index
+
+
+def save_index(index_file, index):
+    tmp_file = f"{index_file}.tmp"
+    try:
+        with open(tmp_file, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_file, index_file)
+    except Exception as e:
+        logger.error("Error saving drive index %s: %s", index_file, e)
+
+
+def trusted_mtime(mtime_ns):
+    if time.time() - mtime_ns / 1e9 < RACY_MTIME_SECONDS:
+        return None
+    return mtime_ns
+
+
+def scan_folder(folder, include_corrupted=True):
+    files = []
+    corrupted = None
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if include_corrupted and entry.name.lower() == CORRUPTED_FOLDER:
+                        corrupted = {
+                            "mtime": trusted_mtime(entry.stat().st_mtime_ns),
+                            "files": scan_folder(entry.path, include_corrupted=False)[0],
+                        }
+                    else:
+                        logger.debug("Skipping directory: %s", entry.name)
+                    continue
+                if not entry.name.lower().endswith(VIDEO_EXTENSIONS) or not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError as e:
+                logger.debug("Skipping unreadable entry %s: %s", entry.name, e)
+                continue
+            files.append([entry.name, st.st_size, st.st_mtime_ns])
+    return files, corrupted
+
+
+def folder_mtime(folder):
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+
+
+def discover_cameras(rec_path):
+    cameras = []
+    with os.scandir(rec_path) as entries:
+        for entry in entries:
+            match = CAMERA_FOLDER_PATTERN.match(entry.name)
+            if match and entry.is_dir():
+                cameras.append((int(match.group(1)), entry.name, entry.path))
+    return [(name, path) for _, name, path in sorted(cameras)]
+
+
+def restat_newest(cam_folder, entry):
+    # a chunk still being written (or rewritten in place) doesn't always touch the folder mtime,
+    # so the newest cached chunk is compared by size and mtime against the disk
+    files = entry["files"]
+    if not files:
+        return entry, False
+    newest = max(range(len(files)), key=lambda i: files[i][2])
+    name, size, mtime_ns = files[newest]
+    try:
+        st = os.stat(os.path.join(cam_folder, name))
+    except OSError:
+        # gone since the last scan, a full rescan sorts it out
+        return None, True
+    if st.st_size == size and st.st_mtime_ns == mtime_ns:
+        return entry, False
+    logger.debug("%s changed since the last scan: %s -> %s bytes", name, size, st.st_size)
+    files = list(files)
+    files[newest] = [name, st.st_size, st.st_mtime_ns]
+    return dict(entry, files=files), True
+
+
+def refresh_camera(cam_folder, cached):
+    started = time.perf_counter()
+    cam_mtime = folder_mtime(cam_folder)
+    if cam_mtime is None:
+        raise OSError(f"Camera folder disappeared: {cam_folder}")
+
+    if cached and cached["mtime"] == cam_mtime:
+        cached_corrupted = cached.get("corrupted")
+        corrupted_mtime = folder_mtime(os.path.join(cam_folder, CORRUPTED_FOLDER))
+        if (corrupted_mtime is None and cached_corrupted is None) or (
+                cached_corrupted and cached_corrupted["mtime"] == corrupted_mtime):
+            entry, changed = restat_newest(cam_folder, cached)
+            if entry is not None:
+                return entry, changed, time.perf_counter() - started
+
+    files, corrupted = scan_folder(cam_folder)
+    entry = {"mtime": trusted_mtime(cam_mtime), "files": files, "corrupted": corrupted}
+    return entry, True, time.perf_counter() - started
+
+
+def refresh_index(rec_path, index_dir):
+    os.makedirs(index_dir, exist_ok=True)
+    index_file = index_file_for(rec_path, index_dir)
+    index = load_index(index_file, rec_path)
+    cached_cameras = index["cameras"]
+
+    discovered = discover_cameras(rec_path)
+    if not discovered:
+        logger.warning("No CAM folders found in %s", rec_path)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=MAX_SCAN_WORKERS) as pool:
+        futures = {
+            pool.submit(refresh_camera, cam_folder, cached_cameras.get(cam_name)): cam_name
+            for cam_name, cam_folder in discovered
+        }
+        for future in as_completed(futures):
+            cam_name = futures[future]
+            try:
+                entry, rescanned, elapsed = future.result()
+            except OSError as e:
+                logger.error("Failed to scan %s: %s", cam_name, e)
+                continue
+            source = "scanned" if rescanned else "cached"
+            logger.info("%s: %s files %s in %.1f ms", cam_name, len(entry['files']), source, elapsed * 1000)
+            results[cam_name] = (entry, rescanned)
+
+    cameras = {cam_name: results[cam_name][0] for cam_name, _ in discovered if cam_name in results}
+    changed = any(rescanned for _, rescanned in results.values()) or cameras.keys() != cached_cameras.keys()
+
+    if changed:
+        index["cameras"] = cameras
+        save_index(index_file, index)
+        logger.info("Drive index updated: %s", index_file)
+    else:
+        logger.info("Drive index unchanged, loaded from cache: %s", index_file)
+    return cameras
+
+
+def total_bytes(cameras):
+    total = 0
+    for cam_entry in cameras.values():
+        total += sum(size for _, size, _ in cam_entry["files"])
+        if cam_entry.get("corrupted"):
+            total += sum(size for _, size, _ in cam_entry["corrupted"]["files"])
+    return total
@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import statistics
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from catalog import SEGMENT_SECONDS
+
+logger = logging.getLogger(__name__)
+logger.debug("drive_probe.py initialized.")
+
+PROBE_VERSION = 1
+# a few chunks from different cameras are read at the same time, the way a review grid reads them
+PROBE_FILES = 4
+PROBE_READ_BYTES = 8 * 1024 * 1024
+PROBE_BLOCK_BYTES = 1024 * 1024
+LATENCY_READ_BYTES = 64 * 1024
+PROBE_TIME_LIMIT_SECONDS = 1.5
+# a drive is probed again after this long, its results are kept per drive id in the state database
+PROBE_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# what every player used before the probe existed, and what a drive without a usable probe gets
+DEFAULT_CACHING_MS = 1000
+MIN_CACHING_MS = 300
+MAX_CACHING_MS = 5000
+# each ms of open latency buys this much buffer, and a drive near its limit gets up to this much more
+LATENCY_CACHING_FACTOR = 4
+LOAD_CACHING_MS = 1500
+# several cameras sharing a busy drive read in bigger blocks, so a spinning disk seeks between files less
+READ_AHEAD_BYTES = 1024 * 1024
+READ_AHEAD_MIN_LOAD = 0.25
+
+
+def pick_files(rec_path, drive_scan, count=PROBE_FILES):
+    picks = []
+    for cam_name in sorted(drive_scan):
+        files = sorted(f for f in drive_scan[cam_name]["files"] if f[1] > 0)
+        if files:
+            name, size, _ = files[len(files) // 2]
+            picks.append((os.path.join(rec_path, cam_name, name), size))
+    step = max(1, len(picks) // count)
+    return picks[::step][:count]
+
+
+def read_latency(path, size):
+    started = perf_counter()
+    with open(path, "rb", buffering=0) as f:
+        f.seek(size // 2)
+        f.read(LATENCY_READ_BYTES)
+    return (perf_counter() - started) * 1000
+
+
+def read_throughput(path, size, deadline):
+    # reads from a quarter in, away from the header the latency probe or a thumbnail may have cached
+    read = 0
+    with open(path, "rb", buffering=0) as f:
+        f.seek(size // 4)
+        while read < PROBE_READ_BYTES and perf_counter() < deadline:
+            block = f.read(PROBE_BLOCK_BYTES)
+            if not block:
+                break
+            read += len(block)
+    return read
+
+
+def probe(rec_path, drive_scan):
+    picks = pick_files(rec_path, drive_scan)
+    if not picks:
+        logger.info("No footage to probe on %s", rec_path)
+        return None
+
+    with metrics.timed("scan.probe_ms"):
+        try:
+            latency_ms = statistics.median(read_latency(path, size) for path, size in picks)
+            started = perf_counter()
+            deadline = started + PROBE_TIME_LIMIT_SECONDS
+            with ThreadPoolExecutor(max_workers=len(picks)) as pool:
+                read = sum(pool.map(lambda pick: read_throughput(pick[0], pick[1], deadline), picks))
+            elapsed = perf_counter() - started
+        except OSError as e:
+            logger.warning("Drive probe failed on %s: %s", rec_path, e)
+            return None
+
+    if read == 0 or elapsed <= 0:
+        return None
+    profile = {
+        "version": PROBE_VERSION,
+        "probed_at": time.time(),
+        "files": len(picks),
+        "latency_ms": round(latency_ms, 2),
+        "throughput_mb_s": round(read / elapsed / 1e6, 2),
+        "bitrate_mb_s": round(statistics.median(size for _, size in picks) / SEGMENT_SECONDS / 1e6, 3),
+    }
+    logger.info("Drive %s: %s MB/s across %s files, %s ms latency, ~%s MB/s per camera",
+                rec_path, profile['throughput_mb_s'], len(picks), profile['latency_ms'], profile['bitrate_mb_s'])
+    return profile
+
+
+def is_fresh(profile):
+    return (bool(profile) and profile.get("version") == PROBE_VERSION
+            and time.time() - profile.get("probed_at", 0) < PROBE_MAX_AGE_SECONDS)
+
+
+def caching_plan(profile, cameras, speed):
+    if not profile or profile["throughput_mb_s"] <= 0:
+        return {"caching_ms": DEFAULT_CACHING_MS, "read_ahead": None, "load": None}
+
+    demand = profile["bitrate_mb_s"] * max(cameras, 1) * speed
+    load = demand / profile["throughput_mb_s"]
+    if load >= 1:
+        caching_ms = MAX_CACHING_MS
+    else:
+        caching_ms = MIN_CACHING_MS + profile["latency_ms"] * LATENCY_CACHING_FACTOR + LOAD_CACHING_MS * load / (1 - load)
+    caching_ms = int(min(MAX_CACHING_MS, max(MIN_CACHING_MS, caching_ms)) // 50 * 50)
+    read_ahead = READ_AHEAD_BYTES if cameras > 1 and load > READ_AHEAD_MIN_LOAD else None
+    return {"caching_ms": caching_ms, "read_ahead": read_ahead, "load": round(load, 3)}
+
+
+def media_options(plan):
+    options = [f":file-caching={plan['caching_ms']}", f":network-caching={plan['caching_ms']}"]
+    if plan["read_ahead"]:
+        options.append(f":prefetch-read-size={plan['read_ahead']}")
+    return options
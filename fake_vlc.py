@@ -0,0 +1,185 @@
+from time import monotonic as now
+
+# an in-process stand-in for the parts of python-vlc the app uses. nothing is decoded, time moves
+# with the wall clock while playing and seeks land immediately, so the player logic can run headless
+
+DEFAULT_LENGTH_MS = 600000
+
+
+class FakeState:
+    NothingSpecial = "NothingSpecial"
+    Opening = "Opening"
+    Playing = "Playing"
+    Paused = "Paused"
+    Stopped = "Stopped"
+    Ended = "Ended"
+    Error = "Error"
+
+
+class FakeEventData:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+class FakeEvent:
+    def __init__(self, **values):
+        self.u = FakeEventData(**values)
+
+
+class FakeEventManager:
+    def __init__(self):
+        self.callbacks = {}
+
+    def event_attach(self, event_type, callback, *args):
+        self.callbacks.setdefault(event_type, []).append((callback, args))
+
+    def fire(self, event_type, **values):
+        for callback, args in self.callbacks.get(event_type, ()):
+            callback(FakeEvent(**values), *args)
+
+
+class FakeMedia:
+    def __init__(self, path):
+        self.path = path
+        self.options = []
+
+    def add_option(self, option):
+        self.options.append(option)
+
+    def release(self):
+        pass
+
+
+class FakeMediaPlayer:
+    # events are fired by their short names ("playing", "time", ...), see FakeBackend.event_kinds
+    def __init__(self, instance):
+        self.instance = instance
+        self.events = FakeEventManager()
+        self.media = None
+        self.state = FakeState.NothingSpecial
+        self.rate = 1.0
+        self.base_ms = 0
+        self.base_stamp = None
+        self.has_vout = False
+        self.video_callbacks = None
+
+    def event_manager(self):
+        return self.events
+
+    def set_media(self, media):
+        self.stop()
+        self.media = media
+        self.base_ms = 0
+        self.has_vout = False
+
+    def set_hwnd(self, window_id):
+        pass
+
+    set_xwindow = set_nsobject = set_hwnd
+
+    def video_set_mouse_input(self, on):
+        pass
+
+    video_set_key_input = video_set_mouse_input
+
+    def audio_set_mute(self, mute):
+        pass
+
+    def video_set_callbacks(self, lock, unlock, display, opaque):
+        self.video_callbacks = (lock, display)
+
+    def video_set_format(self, chroma, width, height, pitch):
+        pass
+
+    def play(self):
+        if self.media is None:
+            return -1
+        if self.base_stamp is None:
+            self.base_stamp = now()
+        self.state = FakeState.Playing
+        self.events.fire("playing")
+        if not self.has_vout:
+            self.has_vout = True
+            self.events.fire("length", new_length=self.instance.length_ms)
+            if self.video_callbacks is not None:
+                # hands over whatever is in the caller's buffer, a blank frame
+                lock, display = self.video_callbacks
+                lock(None, [None])
+                display(None, None)
+            else:
+                self.events.fire("vout", new_count=1)
+        return 0
+
+    def pause(self):
+        if self.is_playing():
+            self.set_pause(1)
+        elif self.state == FakeState.Paused:
+            self.set_pause(0)
+
+    def set_pause(self, paused):
+        if paused and self.is_playing():
+            self.base_ms = self.get_time()
+            self.base_stamp = None
+            self.state = FakeState.Paused
+            self.events.fire("paused")
+        elif not paused and not self.is_playing():
+            self.play()
+
+    def stop(self):
+        if self.media is not None and self.state != FakeState.Stopped:
+            self.base_stamp = None
+            self.state = FakeState.Stopped
+            self.events.fire("stopped")
+
+    def release(self):
+        self.media = None
+
+    def is_playing(self):
+        return 1 if self.state == FakeState.Playing else 0
+
+    def get_state(self):
+        return self.state
+
+    def set_rate(self, rate):
+        self.base_ms = self.get_time()
+        if self.base_stamp is not None:
+            self.base_stamp = now()
+        self.rate = rate
+        return 0
+
+    def get_time(self):
+        if self.base_stamp is None:
+            return self.base_ms
+        return min(self.instance.length_ms, self.base_ms + int((now() - self.base_stamp) * self.rate * 1000))
+
+    def set_time(self, time_ms):
+        self.base_ms = max(0, min(int(time_ms), self.instance.length_ms))
+        if self.base_stamp is not None:
+            self.base_stamp = now()
+        self.events.fire("time", new_time=self.base_ms)
+
+    def tick(self):
+        # libvlc reports the position a few times a second while playing
+        if self.is_playing():
+            self.events.fire("time", new_time=self.get_time())
+
+    def get_length(self):
+        return self.instance.length_ms if self.media is not None else -1
+
+
+class FakeInstance:
+    def __init__(self, options=(), length_ms=DEFAULT_LENGTH_MS):
+        self.options = list(options)
+        self.length_ms = length_ms
+        self.players = []
+
+    def media_new(self, path):
+        return FakeMedia(path)
+
+    def media_player_new(self):
+        player = FakeMediaPlayer(self)
+        self.players.append(player)
+        return player
+
+    def release(self):
+        self.players.clear()
@@ -0,0 +1,544 @@
+import os
+import sys
+import json
+import queue
+import struct
+import bisect
+import hashlib
+import logging
+import threading
+from time import perf_counter, sleep
+from array import array
+
+logger = logging.getLogger(__name__)
+logger.debug("keyframes.py initialized.")
+
+INDEX_VERSION = 2
+TS_PACKET_SIZE = 188
+TS_CHUNK_PACKETS = 20000
+PTS_WRAP = 1 << 33
+# PTS steps backwards by a few frames where B-frames are reordered, anything smaller than this is one
+PTS_MAX_BACKSTEP = 10 * 90000
+
+# a TS has to be read end to end, while a player is running the background index keeps to this many bytes
+# a second so it doesn't take read bandwidth from the players on slow drives, otherwise it reads at full speed
+BACKGROUND_READ_BYTES_PER_SECOND = 2 * 1024 * 1024
+
+# matroska element ids
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_SEEK_HEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_NUMBER = 0xD7
+MKV_TRACK_TYPE = 0x83
+MKV_CUES = 0x1C53BB6B
+MKV_CUE_POINT = 0xBB
+MKV_CUE_TIME = 0xB3
+MKV_CUE_TRACK_POSITIONS = 0xB7
+MKV_CUE_TRACK = 0xF7
+MKV_CLUSTER = 0x1F43B675
+
+
+class ContainerError(Exception):
+    pass
+
+
+def be_uint32_array(data):
+    values = array("I")
+    values.frombytes(data[:len(data) - len(data) % 4])
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+# --- MP4 ---
+
+def iter_boxes(f, start, end):
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            raise ContainerError(f"Truncated box header at {pos}")
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                raise ContainerError(f"Truncated box header at {pos}")
+            size = struct.unpack(">Q", large)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            raise ContainerError(f"Invalid {box_type!r} box size {size} at {pos}")
+        if pos + size > end:
+            raise ContainerError(f"Truncated {box_type.decode('latin-1')} box at {pos}")
+        yield box_type, pos + header_size, pos + size
+        pos += size
+
+
+def find_box(f, start, end, box_type):
+    for found_type, body_start, body_end in iter_boxes(f, start, end):
+        if found_type == box_type:
+            return body_start, body_end
+    return None
+
+
+def read_box(f, box):
+    f.seek(box[0])
+    return f.read(box[1] - box[0])
+
+
+def read_full_box(f, box, name, v0_size, v1_size):
+    # version 1 boxes carry 64-bit times, check the body holds the fields before unpacking them
+    data = read_box(f, box)
+    if not data:
+        raise ContainerError(f"Truncated {name} box")
+    need = v1_size if data[0] == 1 else v0_size
+    if len(data) < need:
+        raise ContainerError(f"Truncated {name} box: {len(data)} of {need} bytes")
+    return data
+
+
+def probe_mp4(f, size):
+    moov = None
+    has_fragments = False
+    for box_type, body_start, body_end in iter_boxes(f, 0, size):
+        if box_type == b"moov":
+            moov = (body_start, body_end)
+        elif box_type == b"moof":
+            has_fragments = True
+    if moov is None:
+        raise ContainerError("Missing moov atom")
+
+    duration_ms = None
+    mvhd = find_box(f, moov[0], moov[1], b"mvhd")
+    if mvhd:
+        data = read_full_box(f, mvhd, "mvhd", 20, 32)
+        if data[0] == 1:
+            timescale, duration = struct.unpack(">IQ", data[20:32])
+        else:
+            timescale, duration = struct.unpack(">II", data[12:20])
+        if timescale:
+            duration_ms = duration * 1000 // timescale
+
+    for box_type, trak_start, trak_end in iter_boxes(f, moov[0], moov[1]):
+        if box_type != b"trak":
+            continue
+        mdia = find_box(f, trak_start, trak_end, b"mdia")
+        if not mdia:
+            continue
+        hdlr = find_box(f, mdia[0], mdia[1], b"hdlr")
+        if not hdlr or read_box(f, hdlr)[8:12] != b"vide":
+            continue
+
+        mdhd = find_box(f, mdia[0], mdia[1], b"mdhd")
+        if not mdhd:
+            raise ContainerError("Video track has no mdhd")
+        mdhd = read_full_box(f, mdhd, "mdhd", 16, 24)
+        if mdhd[0] == 1:
+            timescale = struct.unpack(">I", mdhd[20:24])[0]
+        else:
+            timescale = struct.unpack(">I", mdhd[12:16])[0]
+        if not timescale:
+            raise ContainerError("Video track has zero timescale")
+
+        minf = find_box(f, mdia[0], mdia[1], b"minf")
+        stbl = minf and find_box(f, minf[0], minf[1], b"stbl")
+        if not stbl:
+            raise ContainerError("Video track has no sample table")
+        stts = find_box(f, stbl[0], stbl[1], b"stts")
+        if not stts:
+            if has_fragments:
+                return {"format": "mp4", "duration_ms": duration_ms, "keyframes_ms": []}
+            raise ContainerError("Video track has no stts table")
+        stss = find_box(f, stbl[0], stbl[1], b"stss")
+
+        runs = be_uint32_array(read_box(f, stts)[8:])
+        sync_samples = be_uint32_array(read_box(f, stss)[8:]) if stss else None
+        return {
+            "format": "mp4",
+            "duration_ms": duration_ms,
+            "keyframes_ms": mp4_keyframe_times(runs, sync_samples, timescale),
+        }
+
+    raise ContainerError("No video track found")
+
+
+def mp4_keyframe_times(runs, sync_samples, timescale):
+    # stts is (sample_count, sample_delta) pairs, stss is 1-based sample numbers
+    keyframes = []
+    run_first_sample = 1
+    run_start_time = 0
+    run_idx = 0
+    run_count = len(runs) // 2
+    if sync_samples is None:
+        # no stss means every sample is a sync sample, report one per second at most
+        total = 0
+        for i in range(run_count):
+            count, delta = runs[2 * i], runs[2 * i + 1]
+            for j in range(count):
+                t = (total + j * delta) * 1000 // timescale
+                if not keyframes or t - keyframes[-1] >= 1000:
+                    keyframes.append(t)
+            total += count * delta
+        return keyframes
+
+    for sample in sync_samples:
+        while run_idx < run_count and sample >= run_first_sample + runs[2 * run_idx]:
+            run_start_time += runs[2 * run_idx] * runs[2 * run_idx + 1]
+            run_first_sample += runs[2 * run_idx]
+            run_idx += 1
+        if run_idx >= run_count:
+            break
+        t = run_start_time + (sample - run_first_sample) * runs[2 * run_idx + 1]
+        keyframes.append(t * 1000 // timescale)
+    return keyframes
+
+
+# --- MPEG-TS ---
+
+PUSI_TABLE = bytes(1 if b & 0x40 else 0 for b in range(256))
+
+
+def read_pts(data):
+    return (((data[0] >> 1) & 0x07) << 30 | data[1] << 22 | (data[2] >> 1) << 15 |
+            data[3] << 7 | data[4] >> 1)
+
+
+def probe_ts(f, size, read_limit=None, throttle=None):
+    if size < TS_PACKET_SIZE:
+        raise ContainerError("File is smaller than one TS packet")
+
+    keyframes = []
+    previous_pts = None
+    position = 0
+    min_position = max_position = 0
+    offset = 0
+    chunk_started = perf_counter()
+    chunk_size = TS_PACKET_SIZE * TS_CHUNK_PACKETS
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        packets = len(data) // TS_PACKET_SIZE
+        if len(data) % TS_PACKET_SIZE:
+            raise ContainerError(f"Truncated TS packet at {offset + packets * TS_PACKET_SIZE}")
+
+        sync = data[0::TS_PACKET_SIZE]
+        if sync.count(0x47) != packets:
+            bad = next(i for i, b in enumerate(sync) if b != 0x47)
+            raise ContainerError(f"TS packet desync at {offset + bad * TS_PACKET_SIZE}")
+
+        # only packets starting a PES can carry a PTS, find them without a per-packet loop
+        starts = data[1::TS_PACKET_SIZE].translate(PUSI_TABLE)
+        i = starts.find(1)
+        while i != -1:
+            pos = i * TS_PACKET_SIZE
+            adaptation = (data[pos + 3] >> 4) & 0x03
+            payload = pos + 4
+            random_access = False
+            if adaptation & 0x02:
+                adaptation_length = data[pos + 4]
+                random_access = adaptation_length > 0 and bool(data[pos + 5] & 0x40)
+                payload += 1 + adaptation_length
+            if adaptation & 0x01 and payload + 14 <= pos + TS_PACKET_SIZE:
+                pes = data[payload:payload + 14]
+                if pes[:3] == b"\x00\x00\x01" and 0xE0 <= pes[3] <= 0xEF and pes[7] & 0x80:
+                    pts = read_pts(pes[9:14])
+                    # unwrap the 33-bit clock step by step, a small step back is B-frame reordering
+                    if previous_pts is not None:
+                        delta = (pts - previous_pts) % PTS_WRAP
+                        if delta > PTS_WRAP - PTS_MAX_BACKSTEP:
+                            delta -= PTS_WRAP
+                        position += delta
+                        min_position = min(min_position, position)
+                        max_position = max(max_position, position)
+                    previous_pts = pts
+                    if random_access:
+                        keyframes.append(position)
+            i = starts.find(1, i + 1)
+        offset += len(data)
+        # paced per chunk, so reading speeds up again as soon as playback stops
+        if read_limit and (throttle is None or throttle()):
+            ahead = len(data) / read_limit - (perf_counter() - chunk_started)
+            if ahead > 0:
+                sleep(ahead)
+        chunk_started = perf_counter()
+
+    if previous_pts is None:
+        raise ContainerError("No video PES with a timestamp found")
+    keyframes = sorted((k - min_position) // 90 for k in keyframes)
+    return {"format": "ts", "duration_ms": (max_position - min_position) // 90, "keyframes_ms": keyframes}
+
+
+# --- Matroska ---
+
+def read_vint(data, pos, keep_marker=False):
+    if pos >= len(data):
+        raise ContainerError(f"Truncated EBML integer at {pos}")
+    first = data[pos]
+    if first == 0:
+        raise ContainerError(f"Invalid EBML variable-length integer at {pos}")
+    length = 1
+    mask = 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+    if len(data) < pos + length:
+        raise ContainerError(f"Truncated EBML integer at {pos}")
+    value = first if keep_marker else first & (mask - 1)
+    for b in data[pos + 1:pos + length]:
+        value = (value << 8) | b
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def read_element_header(f, pos):
+    f.seek(pos)
+    head = f.read(12)
+    if not head:
+        return None
+    element_id, id_len, _ = read_vint(head, 0, keep_marker=True)
+    size, size_len, unknown = read_vint(head, id_len)
+    return element_id, pos + id_len + size_len, None if unknown else size
+
+
+def iter_elements(data, start, end):
+    pos = start
+    while pos < end:
+        element_id, id_len, _ = read_vint(data, pos, keep_marker=True)
+        size, size_len, _ = read_vint(data, pos + id_len)
+        body = pos + id_len + size_len
+        if body + size > end:
+            raise ContainerError(f"Truncated EBML element {element_id:#x}")
+        yield element_id, body, body + size
+        pos = body + size
+
+
+def ebml_uint(data, start, end):
+    return int.from_bytes(data[start:end], "big")
+
+
+def probe_mkv(f, size):
+    header = read_element_header(f, 0)
+    if not header or header[0] != EBML_HEADER:
+        raise ContainerError("Missing EBML header")
+    pos = header[1] + (header[2] or 0)
+
+    segment = read_element_header(f, pos)
+    if not segment or segment[0] != MKV_SEGMENT:
+        raise ContainerError("Missing Matroska segment")
+    segment_start = segment[1]
+    segment_end = size if segment[2] is None else segment_start + segment[2]
+    if segment_end > size:
+        raise ContainerError("Matroska segment is truncated")
+
+    timecode_scale = 1000000
+    duration_ms = None
+    video_tracks = set()
+    cues_pos = None
+
+    pos = segment_start
+    while pos < segment_end:
+        element = read_element_header(f, pos)
+        if element is None:
+            break
+        element_id, body, element_size = element
+        if element_id == MKV_CLUSTER or element_size is None:
+            break
+        if body + element_size > size:
+            raise ContainerError(f"Truncated Matroska element {element_id:#x}")
+
+        if element_id in (MKV_SEEK_HEAD, MKV_INFO, MKV_TRACKS):
+            f.seek(body)
+            data = f.read(element_size)
+            for child_id, start, end in iter_elements(data, 0, len(data)):
+                if element_id == MKV_SEEK_HEAD and child_id == MKV_SEEK:
+                    seek_id = seek_pos = None
+                    for seek_child, s, e in iter_elements(data, start, end):
+                        if seek_child == MKV_SEEK_ID:
+                            seek_id = ebml_uint(data, s, e)
+                        elif seek_child == MKV_SEEK_POSITION:
+                            seek_pos = ebml_uint(data, s, e)
+                    if seek_id == MKV_CUES and seek_pos is not None:
+                        cues_pos = segment_start + seek_pos
+                elif element_id == MKV_INFO and child_id == MKV_TIMECODE_SCALE:
+                    timecode_scale = ebml_uint(data, start, end)
+                elif element_id == MKV_INFO and child_id == MKV_DURATION:
+                    if end - start not in (4, 8):
+                        raise ContainerError(f"Invalid Matroska duration size {end - start}")
+                    fmt = ">f" if end - start == 4 else ">d"
+                    duration_ms = struct.unpack(fmt, data[start:end])[0]
+                elif element_id == MKV_TRACKS and child_id == MKV_TRACK_ENTRY:
+                    number = track_type = None
+                    for track_child, s, e in iter_elements(data, start, end):
+                        if track_child == MKV_TRACK_NUMBER:
+                            number = ebml_uint(data, s, e)
+                        elif track_child == MKV_TRACK_TYPE:
+                            track_type = ebml_uint(data, s, e)
+                    if track_type == 1 and number is not None:
+                        video_tracks.add(number)
+        elif element_id == MKV_CUES:
+            cues_pos = pos
+        pos = body + element_size
+
+    if duration_ms is not None:
+        duration_ms = int(duration_ms * timecode_scale / 1000000)
+
+    keyframes = []
+    if cues_pos is not None:
+        cues = read_element_header(f, cues_pos)
+        if not cues or cues[0] != MKV_CUES or cues[2] is None:
+            raise ContainerError("Matroska cues position is invalid")
+        if cues[1] + cues[2] > size:
+            raise ContainerError("Matroska cues are truncated")
+        f.seek(cues[1])
+        data = f.read(cues[2])
+        for child_id, start, end in iter_elements(data, 0, len(data)):
+            if child_id != MKV_CUE_POINT:
+                continue
+            cue_time = None
+            is_video = not video_tracks
+            for cue_child, s, e in iter_elements(data, start, end):
+                if cue_child == MKV_CUE_TIME:
+                    cue_time = ebml_uint(data, s, e)
+                elif cue_child == MKV_CUE_TRACK_POSITIONS and not is_video:
+                    for pos_child, ps, pe in iter_elements(data, s, e):
+                        if pos_child == MKV_CUE_TRACK and ebml_uint(data, ps, pe) in video_tracks:
+                            is_video = True
+            if cue_time is not None and is_video:
+                keyframes.append(cue_time * timecode_scale // 1000000)
+        keyframes.sort()
+
+    return {"format": "mkv", "duration_ms": duration_ms, "keyframes_ms": keyframes}
+
+
+def probe(path, read_limit=None, throttle=None):
+    size = os.path.getsize(path)
+    if size == 0:
+        raise ContainerError("File is empty")
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        if ext == ".mp4":
+            return probe_mp4(f, size)
+        if ext == ".ts":
+            return probe_ts(f, size, read_limit, throttle)
+        if ext == ".mkv":
+            return probe_mkv(f, size)
+    raise ContainerError(f"Unsupported container: {ext}")
+
+
+def keyframe_before(keyframes, time_ms):
+    i = bisect.bisect_right(keyframes, time_ms)
+    return keyframes[i - 1] if i else None
+
+
+def keyframe_after(keyframes, time_ms):
+    i = bisect.bisect_right(keyframes, time_ms)
+    return keyframes[i] if i < len(keyframes) else None
+
+
+class KeyframeIndex:
+    def __init__(self, cache_dir=None, read_limit=BACKGROUND_READ_BYTES_PER_SECOND, throttle=None):
+        self.cache_dir = cache_dir
+        self.read_limit = read_limit
+        # called between reads, the read limit only applies while it returns True
+        self.throttle = throttle
+        self.tables = {}
+        # files that could not be indexed, they aren't queued again this session
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.worker = None
+
+    def cache_file(self, path):
+        st = os.stat(path)
+        key = f"{INDEX_VERSION}|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+
+    def get(self, path):
+        with self.lock:
+            table = self.tables.get(path)
+        return table["keyframes_ms"] if table else None
+
+    def request(self, path):
+        with self.lock:
+            if path in self.tables or path in self.failed:
+                return
+            self.requests.put(path)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    path = self.requests.get(timeout=5)
+                except queue.Empty:
+                    # only exits with the lock held and nothing queued, see request()
+                    with self.lock:
+                        if self.requests.empty():
+                            self.worker = None
+                            return
+                    continue
+                with self.lock:
+                    if path in self.tables or path in self.failed:
+                        continue
+                try:
+                    table = self.load(path)
+                except Exception as e:
+                    logger.warning("Keyframe indexing failed for %s: %r", path, e)
+                    table = None
+                with self.lock:
+                    if table is None:
+                        self.failed.add(path)
+                    else:
+                        self.tables[path] = table
+        finally:
+            # whatever ends the loop, the next request starts a new worker
+            with self.lock:
+                if self.worker is threading.current_thread():
+                    self.worker = None
+
+    def load(self, path):
+        cache_file = None
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                cache_file = self.cache_file(path)
+                if os.path.exists(cache_file):
+                    with open(cache_file, "r") as f:
+                        return json.load(f)
+            except Exception as e:
+                logger.warning("Ignoring keyframe cache for %s: %s", path, e)
+
+        try:
+            table = probe(path, self.read_limit, self.throttle)
+        except (OSError, ContainerError) as e:
+            logger.warning("Could not index keyframes for %s: %s", path, e)
+            return None
+        logger.info("Indexed %s keyframes in %s", len(table['keyframes_ms']), os.path.basename(path))
+
+        if cache_file:
+            self.store(path, table)
+        return table
+
+    def store(self, path, table):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_file = self.cache_file(path)
+            with open(f"{cache_file}.tmp", "w") as f:
+                json.dump(table, f, separators=(",", ":"))
+            os.replace(f"{cache_file}.tmp", cache_file)
+        except Exception as e:
+            logger.warning("Error saving keyframe cache for %s: %s", path, e)
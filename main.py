@@ -1,18 +1,15 @@
 import os
 import sys
 import logging
+import applog
+
+# before the app modules load so their import-time messages land in the ring buffer too.
+# console levels per subsystem live in applog.SUBSYSTEM_LEVELS or the VV_LOG variable
+applog.setup()
+
 import navigation
 import video_player
-
-logging.basicConfig(
-    level=logging.DEBUG,  # change this to INFO to reduce noise
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        # hiding logging for now, uncomment to enable file logging
-        # logging.FileHandler("app_debug.log", mode='w'),
-        logging.StreamHandler()
-    ]
-)
+import metrics
 
 logger = logging.getLogger(__name__)
 logger.debug("main.py initialized.")
@@ -25,15 +22,25 @@ def resource_path(relative_path):
 def setup_icon_path():
     icon_path = resource_path("appIcon.ico")
     if not os.path.exists(icon_path):
-        logger.warning(f"Icon file not found at {icon_path}. Using default system icons.")
+        logger.warning("Icon file not found at %s. Using default system icons.", icon_path)
         icon_path = None
 
     navigation.icon_path = icon_path
     video_player.icon_path = icon_path
 
+def setup_cache_paths():
+    video_player.keyframe_cache_dir = navigation.get_writable_path("keyframe_index")
+    video_player.sprite_cache_dir = navigation.get_writable_path("sprites")
+
 def main():
     setup_icon_path()
+    setup_cache_paths()
     navigation.show_navigation_ui()
+    navigation.close_state()
+    metrics.export()
+    # both stop their decoding threads before the shared libvlc instance goes away
+    navigation.thumbnail_cache.shutdown()
+    video_player.release_vlc()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import bisect
+import logging
+import platform
+import threading
+from time import perf_counter
+
+from paths import get_writable_path
+
+logger = logging.getLogger(__name__)
+logger.debug("metrics.py initialized.")
+
+METRICS_DIR = get_writable_path("metrics")
+# bucket upper bounds in ms, roughly 1-2-5 steps, anything above the last goes in the overflow bucket
+BUCKET_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+TK_LAG_INTERVAL_MS = 250
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction):
+        # upper bound of the bucket holding the percentile, exact enough to compare machines
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def as_dict(self):
+        buckets = {f"le_{bound}": n for bound, n in zip(BUCKET_BOUNDS, self.counts)}
+        buckets["overflow"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            "min": round(self.min, 2) if self.min is not None else None,
+            "max": round(self.max, 2) if self.max is not None else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": buckets,
+        }
+
+
+histograms = {}
+session = {"started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+lock = threading.Lock()
+
+
+def observe(name, value_ms, tag=None):
+    # tag splits a metric per camera or per player, e.g. seek latency per CAM folder
+    key = f"{name}[{tag}]" if tag is not None else name
+    with lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram()
+        histogram.record(value_ms)
+
+
+class timed:
+    def __init__(self, name, tag=None):
+        self.name = name
+        self.tag = tag
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (perf_counter() - self.started) * 1000, self.tag)
+        return False
+
+
+def watch_tk_lag(widget, name="tk.lag_ms"):
+    # how late a periodic after() callback fires is how long the event loop was busy
+    expected = [perf_counter() + TK_LAG_INTERVAL_MS / 1000]
+
+    def tick():
+        try:
+            if not widget.winfo_exists():
+                return
+        except Exception:
+            return
+        fired = perf_counter()
+        observe(name, max(0.0, (fired - expected[0]) * 1000))
+        expected[0] = fired + TK_LAG_INTERVAL_MS / 1000
+        widget.after(TK_LAG_INTERVAL_MS, tick)
+
+    widget.after(TK_LAG_INTERVAL_MS, tick)
+
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+    }
+
+
+def snapshot():
+    with lock:
+        data = {key: histogram.as_dict() for key, histogram in sorted(histograms.items())}
+    return {
+        "session": dict(session, ended=time.strftime("%Y-%m-%dT%H:%M:%S")),
+        "machine": machine_info(),
+        "histograms": data,
+    }
+
+
+def export(path=None):
+    with lock:
+        if not histograms:
+            return None
+    if path is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"session_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    try:
+        with open(path, "w") as f:
+            json.dump(snapshot(), f, indent=2)
+    except OSError as e:
+        logger.error("Could not write metrics to %s: %s", path, e)
+        return None
+    logger.info("Session metrics written to %s", path)
+    return path
@@ -1,33 +1,27 @@
 import os
-import re
 import threading
 import logging
-from collections import defaultdict
 from tkinter import Tk, filedialog, StringVar, Label, Button, Frame, Toplevel, messagebox, ttk
 import tkinter as tk
-import json
+import video_player
 from video_player import play_videos
-import sys
-
-def get_writable_path(filename):
-    if getattr(sys, 'frozen', False):
-        app_name = "Video Validation"
-        appdata_dir = os.getenv('APPDATA')
-        if appdata_dir:
-            app_folder = os.path.join(appdata_dir, app_name)
-            os.makedirs(app_folder, exist_ok=True)
-            return os.path.join(app_folder, filename)
-        else:
-            return os.path.join(os.path.dirname(sys.executable), filename)
-    else:
-        return os.path.join(os.path.dirname(__file__), filename)
+import drive_index
+from catalog import Catalog, parse_timestamp, day_start
+import coverage
+from paths import get_writable_path
+from thumbnails import ThumbnailCache
+from state_store import StateStore
+import applog
+import metrics
+import viewed
+import drive_probe
 
 logger = logging.getLogger(__name__)
 logger.debug("navigation.py initialized.")
 
-#adding mkv support
-file_pattern = re.compile(r"^(CAM\d+)_((\d{8})_(\d{6}|\d{4}))\.(mp4|ts|mkv)$")
-camera_files = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
+camera_catalog = Catalog()
+drive_coverage = coverage.Coverage()
+drive_scan = {}
 icon_path = None
 
 config = {
@@ -36,132 +30,176 @@ config = {
 }
 
 CONFIG_FILE = get_writable_path("config.json")
+STATE_FILE = get_writable_path("state.db")
+DRIVE_INDEX_DIR = get_writable_path("drive_index")
+THUMBNAIL_DIR = get_writable_path("thumbnails")
+
+thumbnail_cache = ThumbnailCache(THUMBNAIL_DIR, video_player.get_vlc_instance)
+PREVIEW_COLUMNS = 4
+PREVIEW_POLL_MS = 250
+# cells still loading after this long show "no preview" and polling stops
+PREVIEW_TIMEOUT_MS = 30000
 
 config_data = {
     "last_drive": None,
-    "viewed_files": {},
-    "last_viewed_file": None
 }
 
-viewed_times = set()
+# viewed state belongs to the drive that is loaded, keyed by camera and segment start
+drive_id = None
+viewed_index = viewed.ViewedIndex()
 
-def load_config():
-    global config_data, viewed_times
-    logger.info(f"Using config.json at: {CONFIG_FILE}")
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r") as f:
-                config_data = json.load(f)
-                viewed_times = set(config_data.get("viewed_files", {}).keys())
-                logger.info(f"Loaded {len(viewed_times)} viewed times. Last drive: {config_data.get('last_drive')}")
-        except Exception as e:
-            logger.error(f"Error loading config: {e}")
+# an existing config.json is imported into the database on first load
+state_store = StateStore(STATE_FILE, legacy_config=CONFIG_FILE)
 
-def save_config():
-    global config_data
-    config_data["viewed_files"] = {k: True for k in viewed_times}
+def load_config():
+    logger.info("Using state database at: %s", STATE_FILE)
     try:
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(config_data, f, indent=2)
-            logger.info(f"Saved config with {len(viewed_times)} viewed times and last drive: {config_data.get('last_drive')}")
+        config_data.update(state_store.load())
+        logger.info("Last drive: %s", config_data.get('last_drive'))
     except Exception as e:
-        logger.error(f"Error saving config: {e}")
+        logger.error("Error loading config: %s", e)
+
+def save_setting(key, value):
+    config_data[key] = value
+    state_store.set(key, value)
+
+def close_state():
+    state_store.close()
+
+def last_viewed_key(drive=None):
+    return f"last_viewed:{drive or drive_id}"
+
+def load_viewed_segments(rec_path):
+    global drive_id
+    drive_id, previous_id = viewed.drive_identity(rec_path, drive_scan)
+    rows = state_store.load_viewed(drive_id)
+    if previous_id:
+        # the drive was known by its fingerprint before it got a marker file, its state moves over.
+        # the old rows are loaded here too, the move itself happens later on the writer thread
+        rows = list(set(rows + state_store.load_viewed(previous_id)))
+        keys = [(last_viewed_key(previous_id), last_viewed_key()), (drive_probe_key(previous_id), drive_probe_key())]
+        for old_key, new_key in keys:
+            if old_key in config_data:
+                config_data[new_key] = config_data.pop(old_key)
+        state_store.move_drive(previous_id, drive_id, keys)
+        logger.info("Moved viewed state of drive %s to %s", previous_id, drive_id)
+    viewed_index.load(rows)
+    logger.info("Drive id %s: %s segments viewed", drive_id, len(viewed_index))
+
+    # viewed times saved before they were tied to a drive go to the first drive that has them
+    matched = []
+    segments = []
+    for key in state_store.legacy_viewed():
+        try:
+            y, m, d, raw = key.split("/")
+        except ValueError:
+            continue
+        start = parse_timestamp(f"{y}{m}{d}", raw)
+        members = camera_catalog.group_members(start) if start is not None else []
+        if members:
+            matched.append(key)
+            segments.extend(members)
+    if matched:
+        segments = [(camera, start) for camera, start in segments if viewed_index.add(camera, start)]
+        state_store.add_viewed(drive_id, segments)
+        state_store.drop_legacy_viewed(matched)
+        logger.info("Moved %s legacy viewed times onto drive %s", len(matched), drive_id)
+
+def drive_probe_key(drive=None):
+    return f"drive_probe:{drive or drive_id}"
+
+def load_drive_profile(rec_path):
+    # the probe reads a few MB, so its result is kept per drive and only redone once it gets old
+    profile = config_data.get(drive_probe_key())
+    if drive_probe.is_fresh(profile):
+        logger.info("Drive %s: %s MB/s, %s ms latency (cached)",
+                    drive_id, profile['throughput_mb_s'], profile['latency_ms'])
+    else:
+        profile = drive_probe.probe(rec_path, drive_scan)
+        if profile:
+            save_setting(drive_probe_key(), profile)
+    video_player.drive_profile = profile
+
+def group_viewed(start):
+    members = camera_catalog.group_members(start)
+    return bool(members) and all(viewed_index.is_viewed(camera, cam_start) for camera, cam_start in members)
+
+def day_progress(year, month, day):
+    t0 = day_start(int(year), int(month), int(day))
+    counts = camera_catalog.segment_counts(t0, t0 + 86400)
+    reviewed = sum(viewed_index.count_between(camera, t0, t0 + 86400) for camera in counts)
+    return reviewed, sum(counts.values())
+
+def format_raw_time(raw):
+    if len(raw) == 6:
+        return f"{raw[:2]}:{raw[2:4]}:{raw[4:]}"
+    elif len(raw) == 4:
+        return f"{raw[:2]}:{raw[2:]}:00"
+    return "00:00:00"
+
+def time_entries(year, month, day):
+    # (dropdown text, raw time, group start) for every timestamp of a day
+    times = camera_catalog.times(year, month, day)
+    camera_total = len(drive_coverage.cameras)
+    present = drive_coverage.present_counts(coverage.segment_midpoints([start for _, start in times]))
+    entries = []
+    for (raw, start), count in zip(times, present):
+        formatted = format_raw_time(raw)
+        if group_viewed(start):
+            display_text = f"✔️ {formatted}"
+        else:
+            display_text = f"   {formatted}"
+        if count < camera_total:
+            display_text += f"  ({count}/{camera_total} cams)"
+        entries.append((display_text, raw, start))
+    return entries
 
 def load_camera_files():
-    global camera_files
     rec_path = filedialog.askdirectory(title="Select the REC Folder")
     if not rec_path:
         logger.warning("No directory selected.")
         return False
 
     config["rec_path"] = rec_path
-    config_data["last_drive"] = rec_path
-    save_config()
+    save_setting("last_drive", rec_path)
 
-    logger.info(f"Selected REC path: {rec_path}")
+    logger.info("Selected REC path: %s", rec_path)
     return parse_existing_camera_files()
 
 def parse_existing_camera_files():
-    global camera_files
+    global camera_catalog, drive_coverage, drive_scan
     rec_path = config["rec_path"]
     if not rec_path or not os.path.exists(rec_path):
         logger.warning("Invalid REC path in config.")
         return False
 
-    logger.info(f"Re-loading existing REC path: {rec_path}")
-    camera_files.clear()
-
-    for cam_num in range(1, 11):
-        cam_folder = os.path.join(rec_path, f"CAM{cam_num}")
-        logger.debug(f"Scanning folder: {cam_folder}")
-
-        if os.path.exists(cam_folder):
-            for file in os.listdir(cam_folder):
-                full_path = os.path.join(cam_folder, file)
-                if os.path.isdir(full_path):
-                    logger.debug(f"Skipping directory: {file}")
-                    continue
-                if not file.lower().endswith((".mp4", ".ts", ".mkv")):
-                    logger.debug(f"Skipping non-video file: {file}")
-                    continue
-                match = file_pattern.match(file)
-                if match:
-                    cam_id, timestamp, date_part, time_part, _ = match.groups()
-                    year, month, day = date_part[:4], date_part[4:6], date_part[6:8]
-                    camera_files[year][month][day].setdefault(time_part, []).append(full_path)
-                else:
-                    logger.debug(f"Unmatched file: {file}")
-        else:
-            logger.warning(f"Camera folder does not exist: {cam_folder}")
-
-    total_files = sum(len(times) for year in camera_files.values()
-                      for month in year.values()
-                      for day in month.values()
-                      for times in day.values())
-    logger.info(f"Camera files loaded: {total_files}")
-    return bool(camera_files)
+    logger.info("Re-loading existing REC path: %s", rec_path)
+    with metrics.timed("scan.total_ms"):
+        with metrics.timed("scan.index_ms"):
+            drive_scan = drive_index.refresh_index(rec_path, DRIVE_INDEX_DIR)
+        with metrics.timed("scan.catalog_ms"):
+            camera_catalog = Catalog.from_scan(rec_path, drive_scan)
+        with metrics.timed("scan.coverage_ms"):
+            drive_coverage = coverage.Coverage.from_catalog(camera_catalog)
+        load_viewed_segments(rec_path)
+    load_drive_profile(rec_path)
+    metrics.session.update(drive_id=drive_id, cameras=len(camera_catalog.camera_names()),
+                           segments=camera_catalog.segment_count())
+
+    logger.info("Camera files loaded: %s", camera_catalog.segment_count())
+    return bool(camera_catalog)
 
 def display_summary():
-    unique_cameras = set()
-    total_timestamps = 0
-    total_size_gb = 0
-
-    for year in camera_files:
-        for month in camera_files[year]:
-            for day in camera_files[year][month]:
-                for time in camera_files[year][month][day]:
-                    files = camera_files[year][month][day][time]
-                    unique_cameras.update(os.path.basename(file).split('_')[0] for file in files)
-
-    cam1_folder = os.path.join(config["rec_path"], "CAM1")
-    if os.path.exists(cam1_folder):
-        for file in os.listdir(cam1_folder):
-            if file.lower().endswith((".mp4", ".ts")) and not os.path.isdir(os.path.join(cam1_folder, file)):
-                total_timestamps += 1
-
-    for cam_num in range(1, 11):
-        cam_folder = os.path.join(config["rec_path"], f"CAM{cam_num}")
-        if os.path.exists(cam_folder):
-            for file in os.listdir(cam_folder):
-                full_path = os.path.join(cam_folder, file)
-                if file.lower().endswith((".mp4", ".ts")) and not os.path.isdir(full_path):
-                    total_size_gb += os.path.getsize(full_path)
-
-        corrupted_folder = os.path.join(cam_folder, "corrupted")
-        if os.path.exists(corrupted_folder):
-            for file in os.listdir(corrupted_folder):
-                full_path = os.path.join(corrupted_folder, file)
-                if file.lower().endswith((".mp4", ".ts")) and not os.path.isdir(full_path):
-                    total_size_gb += os.path.getsize(full_path)
-
-    total_size_gb /= (1024 ** 3)
-    return len(unique_cameras), total_timestamps, total_size_gb
+    total_size_gb = drive_index.total_bytes(drive_scan) / (1024 ** 3)
+    return len(camera_catalog.camera_names()), len(camera_catalog), total_size_gb
 
 def show_navigation_ui():
     root = Tk()
     load_config()
     root.title("Video Navigation")
-    root.geometry("300x330")
+    root.bind("<Control-D>", lambda e: applog.dump())
+    metrics.watch_tk_lag(root, "tk.navigation_lag_ms")
+    root.geometry("560x560")
     root.grid_columnconfigure(0, weight=1)
     root.grid_columnconfigure(1, weight=0)
     root.grid_columnconfigure(2, weight=1)
@@ -170,7 +208,7 @@ def show_navigation_ui():
         try:
             root.iconbitmap(icon_path)
         except Exception as e:
-            logger.warning(f"Failed to load icon: {e}")
+            logger.warning("Failed to load icon: %s", e)
 
     year_var = StringVar()
     month_var = StringVar()
@@ -186,7 +224,9 @@ def show_navigation_ui():
     stats = {
         "cameras": Label(root, text="Total cameras found:\n0", anchor="w", justify="left"),
         "timestamps": Label(root, text="Total timestamps:\n0", anchor="w", justify="left"),
-        "footage": Label(root, text="Total footage:\n0.00 GB", anchor="w", justify="left")
+        "footage": Label(root, text="Total footage:\n0.00 GB", anchor="w", justify="left"),
+        "coverage": Label(root, text="All cameras present:\n--", anchor="w", justify="left"),
+        "progress": Label(root, text="Reviewed this day:\n--", anchor="w", justify="left")
     }
 
     for i, key in enumerate(stats):
@@ -210,9 +250,12 @@ def show_navigation_ui():
         stats["cameras"].config(text=f"Total cameras found:\n{c}")
         stats["timestamps"].config(text=f"Total timestamps:\n{t}")
         stats["footage"].config(text=f"Total footage:\n{g:.2f} GB")
+        stats["coverage"].config(
+            text=f"All cameras present:\n{drive_coverage.all_present_ratio():.1%}, {drive_coverage.gap_count()} gaps"
+        )
 
     def update_years():
-        years = sorted(camera_files.keys())
+        years = camera_catalog.years()
         dropdowns[0]['values'] = years
         if years:
             year_var.set(years[0])
@@ -220,7 +263,7 @@ def show_navigation_ui():
 
     def update_months(*args):
         y = year_var.get()
-        months = sorted(camera_files.get(y, {}).keys())
+        months = camera_catalog.months(y) if y else []
         dropdowns[1]['values'] = months
         if months:
             month_var.set(months[0])
@@ -228,53 +271,117 @@ def show_navigation_ui():
 
     def update_days(*args):
         y, m = year_var.get(), month_var.get()
-        days = sorted(camera_files.get(y, {}).get(m, {}).keys())
+        days = camera_catalog.days(y, m) if y and m else []
         dropdowns[2]['values'] = days
         if days:
             day_var.set(days[0])
             update_times()
 
+    preview_frame = Frame(root)
+    preview_frame.grid(row=8, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="nw")
+    preview_images = {}
+    preview_state = {"start": None}
+
+    def show_previews(start):
+        if start == preview_state["start"]:
+            return
+        preview_state["start"] = start
+        for child in preview_frame.winfo_children():
+            child.destroy()
+        preview_images.clear()
+
+        cells = []
+        files = camera_catalog.files_at(start)
+        # the seek bar previews the first camera, build its sprite sheet before Play is pressed
+        if files:
+            video_player.request_sprites(files[0])
+        for i, path in enumerate(files):
+            cell = Label(preview_frame, text=f"{os.path.basename(path)[:4]}\nloading...", compound="top")
+            cell.grid(row=i // PREVIEW_COLUMNS, column=i % PREVIEW_COLUMNS, padx=2, pady=2)
+            cells.append((path, cell))
+            thumbnail_cache.request(path)
+        refresh_previews(start, cells, PREVIEW_TIMEOUT_MS // PREVIEW_POLL_MS)
+
+    def cycle_preview(path, cell):
+        images = preview_images.get(path)
+        if images:
+            images.append(images.pop(0))
+            cell.config(image=images[0])
+
+    def refresh_previews(start, cells, polls_left):
+        if start != preview_state["start"]:
+            return
+        waiting = False
+        for path, cell in cells:
+            if path in preview_images:
+                continue
+            frame_files = thumbnail_cache.get(path)
+            if frame_files is None and polls_left <= 0:
+                logger.info("Gave up waiting for a preview of %s", os.path.basename(path))
+                frame_files = []
+            if frame_files is None:
+                waiting = True
+                continue
+            camera = os.path.basename(path)[:4]
+            if not frame_files:
+                preview_images[path] = []
+                cell.config(text=f"{camera}\nno preview")
+                continue
+            try:
+                images = [tk.PhotoImage(file=f) for f in frame_files]
+            except tk.TclError as e:
+                logger.warning("Failed to load preview for %s: %s", path, e)
+                preview_images[path] = []
+                continue
+            # start on the middle frame, clicking steps through the rest
+            middle = len(images) // 2
+            images = images[middle:] + images[:middle]
+            preview_images[path] = images
+            cell.config(image=images[0], text=camera)
+            cell.bind("<Button-1>", lambda e, p=path, c=cell: cycle_preview(p, c))
+        if waiting:
+            root.after(PREVIEW_POLL_MS, lambda: refresh_previews(start, cells, polls_left - 1))
+
     def update_times(*args):
         y, m, d = year_var.get(), month_var.get(), day_var.get()
         raw_to_formatted = {}
         formatted_times = []
 
-        times = sorted(camera_files.get(y, {}).get(m, {}).get(d, {}).keys())
-        for raw in times:
-            if len(raw) == 6:
-                formatted = f"{raw[:2]}:{raw[2:4]}:{raw[4:]}"
-            elif len(raw) == 4:
-                formatted = f"{raw[:2]}:{raw[2:]}:00"
-            else:
-                formatted = "00:00:00"
-
-            viewed_key = f"{y}/{m}/{d}/{raw}"
-            if viewed_key in viewed_times:
-                display_text = f"✔️ {formatted}"
-            else:
-                display_text = f"   {formatted}"
-
-            raw_to_formatted[display_text] = raw
+        entries = time_entries(y, m, d) if y and m and d else []
+        # warm the cache for the rest of the day, the selected time is requested last so it runs first
+        for _, _, start in entries:
+            for path in camera_catalog.files_at(start):
+                thumbnail_cache.request(path)
+        for display_text, raw, start in entries:
+            raw_to_formatted[display_text] = (raw, start)
             formatted_times.append(display_text)
 
         dropdowns[3]['values'] = formatted_times
+        if y and m and d:
+            reviewed, total = day_progress(y, m, d)
+            stats["progress"].config(text=f"Reviewed this day:\n{reviewed}/{total} segments")
         if formatted_times:
-            last_viewed = config_data.get("last_viewed_file")
-            for display_text, raw in raw_to_formatted.items():
-                viewed_key = f"{y}/{m}/{d}/{raw}"
-                if viewed_key == last_viewed:
+            last_viewed = config_data.get(last_viewed_key())
+            for display_text, (raw, start) in raw_to_formatted.items():
+                if start == last_viewed:
                     time_var.set(display_text)
                     setattr(time_var, "raw_time", raw)
+                    setattr(time_var, "segment_start", start)
                     break
             else:
                 time_var.set(formatted_times[0])
-                setattr(time_var, "raw_time", raw_to_formatted[formatted_times[0]])
+                raw, start = raw_to_formatted[formatted_times[0]]
+                setattr(time_var, "raw_time", raw)
+                setattr(time_var, "segment_start", start)
+            show_previews(time_var.segment_start)
 
         def on_select(event):
             selected_display_text = time_var.get()
-            raw = raw_to_formatted.get(selected_display_text)
-            if raw:
-                setattr(time_var, "raw_time", raw)
+            selected = raw_to_formatted.get(selected_display_text)
+            if selected:
+                setattr(time_var, "raw_time", selected[0])
+                setattr(time_var, "segment_start", selected[1])
+                show_previews(selected[1])
 
         dropdowns[3].bind("<<ComboboxSelected>>", on_select)
     dropdowns[0].bind("<<ComboboxSelected>>", update_months)
@@ -309,10 +416,9 @@ def show_navigation_ui():
     def clear_viewed_times():
         confirm = messagebox.askyesno("Confirm Clear", "Are you sure you want to clear all viewed times?")
         if confirm:
-            viewed_times.clear()
-            config_data["viewed_files"] = {}
-            config_data["last_viewed_file"] = None
-            save_config()
+            viewed_index.clear()
+            state_store.clear_viewed(drive_id)
+            save_setting(last_viewed_key(), None)
             update_times()
             logger.info("Viewed times cleared.")
 
@@ -320,27 +426,45 @@ def show_navigation_ui():
         vlc_path = None
         y, m, d = year_var.get(), month_var.get(), day_var.get()
         t = getattr(time_var, "raw_time", None)
-        if y and m and d and t:
-            try:
-                viewed_key = f"{y}/{m}/{d}/{t}"
-                viewed_times.add(viewed_key)
-                config_data["last_viewed_file"] = viewed_key
-                save_config()
+        start = getattr(time_var, "segment_start", None)
+        if y and m and d and t and start is not None:
+            files = camera_catalog.files_at(start)
+            if not files:
+                logger.error("Selected time not found.")
+                return
 
-                logger.info(f"Playing video(s) for: {viewed_key}")
+            members = camera_catalog.group_members(start)
+            new_segments = [(camera, cam_start) for camera, cam_start in members if viewed_index.add(camera, cam_start)]
+            if new_segments:
+                state_store.add_viewed(drive_id, new_segments)
+            save_setting(last_viewed_key(), start)
 
-                play_videos(vlc_path, camera_files[y][m][d][t], icon_path)
-                update_times()
+            logger.info("Playing video(s) for: %s/%s/%s/%s", y, m, d, t)
 
-            except KeyError:
-                logger.error("Selected time not found.")
+            play_videos(vlc_path, files, icon_path, camera_catalog, start)
+            update_times()
+
+    def save_coverage_report():
+        if not drive_coverage.cameras:
+            messagebox.showinfo("Coverage Report", "Select a drive first.")
+            return
+        output = filedialog.asksaveasfilename(
+            title="Save Coverage Report", defaultextension=".json", initialfile="coverage_report.json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if output:
+            coverage.write_report(drive_coverage, output)
 
     Button(root, text="Play Selected", command=play_selected_videos).grid(
-        row=6, column=0, columnspan=3, padx=10, pady=20, sticky="ew"
+        row=7, column=0, columnspan=2, padx=(10, 5), pady=20, sticky="ew"
+    )
+
+    Button(root, text="Coverage Report", command=save_coverage_report).grid(
+        row=7, column=2, padx=(5, 10), pady=20, sticky="ew"
     )
 
     #Button(root, text="Clear Viewed Times", command=clear_viewed_times).grid(
-    #row=7, column=0, columnspan=3, padx=10, pady=(0, 20), sticky="ew"
+    #row=9, column=0, columnspan=3, padx=10, pady=(0, 20), sticky="ew"
     #)
 
     if config_data.get("last_drive"):
@@ -0,0 +1,16 @@
+import os
+import sys
+
+
+def get_writable_path(filename):
+    if getattr(sys, 'frozen', False):
+        app_name = "Video Validation"
+        appdata_dir = os.getenv('APPDATA')
+        if appdata_dir:
+            app_folder = os.path.join(appdata_dir, app_name)
+            os.makedirs(app_folder, exist_ok=True)
+            return os.path.join(app_folder, filename)
+        else:
+            return os.path.join(os.path.dirname(sys.executable), filename)
+    else:
+        return os.path.join(os.path.dirname(__file__), filename)
@@ -0,0 +1,183 @@
+import os
+import sys
+import ctypes
+import logging
+import threading
+from time import perf_counter
+
+import metrics
+
+logger = logging.getLogger(__name__)
+logger.debug("player_backend.py initialized.")
+
+# VV_PLAYER_BACKEND=fake runs the player without decoding anything, e.g. for benchmarks
+BACKEND_ENV = "VV_PLAYER_BACKEND"
+BUNDLE_FOLDER = "vlc_bundle"
+
+# the libvlc events the player listens to, by the short names it handles them under
+PLAYER_EVENTS = {
+    "vout": "MediaPlayerVout",
+    "error": "MediaPlayerEncounteredError",
+    "playing": "MediaPlayerPlaying",
+    "paused": "MediaPlayerPaused",
+    "stopped": "MediaPlayerStopped",
+    "ended": "MediaPlayerEndReached",
+    "length": "MediaPlayerLengthChanged",
+    "time": "MediaPlayerTimeChanged",
+}
+
+
+class BackendUnavailable(Exception):
+    pass
+
+
+def library_name():
+    if sys.platform.startswith("win"):
+        return "libvlc.dll"
+    if sys.platform == "darwin":
+        return "libvlc.dylib"
+    return "libvlc.so.5"
+
+
+def bundle_dirs():
+    # the frozen build unpacks libvlc and plugins next to the exe, a source checkout keeps them in vlc_bundle
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+        return [os.path.join(base_path, BUNDLE_FOLDER), base_path]
+    return [os.path.join(os.path.abspath(os.path.dirname(__file__)), BUNDLE_FOLDER)]
+
+
+class LibVLCBackend:
+    # python-vlc binds libvlc when it is imported, so nothing is loaded until the first player is made
+    name = "libvlc"
+
+    def __init__(self, search_dirs=None):
+        self.search_dirs = search_dirs
+        self.vlc = None
+        self.source = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def find_bundle(self):
+        for folder in self.search_dirs if self.search_dirs is not None else bundle_dirs():
+            libvlc_path = os.path.join(folder, library_name())
+            if os.path.exists(libvlc_path):
+                return libvlc_path, os.path.join(folder, "plugins")
+        return None, None
+
+    def load(self):
+        with self.lock:
+            if self.vlc is not None:
+                return self.vlc
+            if self.error is not None:
+                # thumbnails and sprites keep asking, don't retry the load for each of them
+                raise BackendUnavailable(self.error)
+            try:
+                self.vlc = self.import_vlc()
+            except BackendUnavailable as e:
+                self.error = str(e)
+                raise
+            return self.vlc
+
+    def import_vlc(self):
+        started = perf_counter()
+        libvlc_path, plugin_path = self.find_bundle()
+        if libvlc_path:
+            os.environ["VLC_PLUGIN_PATH"] = plugin_path
+            os.environ["PYTHON_VLC_LIB_PATH"] = libvlc_path
+            os.environ["PYTHON_VLC_MODULE_PATH"] = plugin_path
+            try:
+                ctypes.CDLL(libvlc_path)
+            except OSError as e:
+                logger.error("Failed to load bundled libvlc %s: %s", libvlc_path, e)
+                raise BackendUnavailable(f"Could not load {libvlc_path}: {e}")
+            self.source = libvlc_path
+        else:
+            self.source = "system"
+
+        try:
+            import vlc
+        except (ImportError, OSError, NameError, NotImplementedError) as e:
+            # python-vlc raises one of these when it can't find libvlc on the system
+            logger.error("No usable libvlc (%s): %s", self.source, e)
+            raise BackendUnavailable(f"libvlc is not installed: {e}")
+        if getattr(vlc, "dll", None) is None:
+            raise BackendUnavailable("python-vlc did not find libvlc")
+
+        elapsed_ms = (perf_counter() - started) * 1000
+        metrics.observe("player.backend_load_ms", elapsed_ms)
+        logger.info("Loaded libvlc from %s in %.0f ms", self.source, elapsed_ms)
+        return vlc
+
+    @property
+    def State(self):
+        return self.load().State
+
+    def create_instance(self, *options):
+        instance = self.load().Instance(*options)
+        if instance is None:
+            raise BackendUnavailable(f"libvlc refused the options {options}")
+        return instance
+
+    def event_kinds(self):
+        event_type = self.load().EventType
+        return {getattr(event_type, name): kind for kind, name in PLAYER_EVENTS.items()}
+
+    def video_callbacks(self, lock, display):
+        decorators = self.load().CallbackDecorators
+        return decorators.VideoLockCb(lock), decorators.VideoDisplayCb(display)
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self, length_ms=None):
+        import fake_vlc
+        self.fake_vlc = fake_vlc
+        self.length_ms = length_ms or fake_vlc.DEFAULT_LENGTH_MS
+        self.State = fake_vlc.FakeState
+        self.source = "in-process"
+
+    def load(self):
+        return self.fake_vlc
+
+    def create_instance(self, *options):
+        return self.fake_vlc.FakeInstance(options, self.length_ms)
+
+    def event_kinds(self):
+        return {kind: kind for kind in PLAYER_EVENTS}
+
+    def video_callbacks(self, lock, display):
+        return lock, display
+
+
+BACKENDS = {
+    "libvlc": LibVLCBackend,
+    "fake": FakeBackend,
+}
+
+backend = None
+backend_lock = threading.Lock()
+
+
+def create_backend(name=None):
+    name = (name or os.getenv(BACKEND_ENV) or "libvlc").lower()
+    if name not in BACKENDS:
+        logger.warning("Unknown player backend %r, using libvlc", name)
+        name = "libvlc"
+    return BACKENDS[name]()
+
+
+def get_backend():
+    global backend
+    with backend_lock:
+        if backend is None:
+            backend = create_backend()
+            logger.info("Using %s player backend", backend.name)
+        return backend
+
+
+def set_backend(new_backend):
+    global backend
+    with backend_lock:
+        backend = new_backend
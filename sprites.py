@@ -0,0 +1,217 @@
+import os
+import mmap
+import struct
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import SEGMENT_SECONDS
+from thumbnails import FrameGrabber
+
+logger = logging.getLogger(__name__)
+logger.debug("sprites.py initialized.")
+
+SPRITE_VERSION = 1
+SPRITE_MAGIC = b"VVSP"
+# magic, version, frame width, frame height, seconds between frames, frame count
+SPRITE_HEADER = struct.Struct("<4sHHHHH")
+SPRITE_WIDTH = 160
+SPRITE_HEIGHT = 90
+SPRITE_INTERVAL_SECONDS = 10
+SPRITE_WORKERS = 2
+# a sheet is about 2.6 MB, this keeps roughly the last hundred segments
+CACHE_LIMIT_BYTES = 256 * 1024 * 1024
+# sheets kept mapped for hovering, the least recently shown is closed past this
+MAX_OPEN_SHEETS = 8
+
+
+class SpriteSheet:
+    # one file per segment: header, a present flag per frame, then packed RGB frames.
+    # it is memory mapped so hovering along the bar only touches the frames it shows
+    def __init__(self, sprite_file):
+        self.name = os.path.basename(sprite_file)
+        with open(sprite_file, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, self.interval, self.count = SPRITE_HEADER.unpack_from(self.data)
+        if magic != SPRITE_MAGIC or version != SPRITE_VERSION:
+            self.data.close()
+            raise ValueError(f"Not a sprite sheet: {sprite_file}")
+        self.frame_size = self.width * self.height * 3
+        self.frames_offset = SPRITE_HEADER.size + self.count
+        if len(self.data) < self.frames_offset + self.count * self.frame_size:
+            self.data.close()
+            raise ValueError(f"Truncated sprite sheet: {sprite_file}")
+
+    def frame_index(self, seconds):
+        return max(0, min(self.count - 1, int(seconds // self.interval)))
+
+    def frame_ppm(self, i):
+        if not self.data[SPRITE_HEADER.size + i]:
+            return None
+        start = self.frames_offset + i * self.frame_size
+        return b"P6 %d %d 255\n" % (self.width, self.height) + self.data[start:start + self.frame_size]
+
+    def close(self):
+        self.data.close()
+
+
+def write_sprite_sheet(sprite_file, frames, width, height, interval):
+    # frames are RGB bytes or None where decoding failed
+    tmp_file = f"{sprite_file}.tmp"
+    blank = bytes(width * height * 3)
+    with open(tmp_file, "wb") as f:
+        f.write(SPRITE_HEADER.pack(SPRITE_MAGIC, SPRITE_VERSION, width, height, interval, len(frames)))
+        f.write(bytes(1 if frame else 0 for frame in frames))
+        for frame in frames:
+            f.write(frame or blank)
+    os.replace(tmp_file, sprite_file)
+
+
+class SpriteCache:
+    def __init__(self, cache_dir, instance_factory, workers=SPRITE_WORKERS, limit_bytes=CACHE_LIMIT_BYTES,
+                 max_open=MAX_OPEN_SHEETS):
+        self.cache_dir = cache_dir
+        self.instance_factory = instance_factory
+        self.workers = workers
+        self.limit_bytes = limit_bytes
+        self.max_open = max_open
+        # file name -> size, oldest access first
+        self.entries = None
+        self.total = 0
+        self.pool = None
+        self.pending = set()
+        # source path -> mapped sheet, least recently shown first
+        self.sheets = OrderedDict()
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def sprite_file(self, path):
+        st = os.stat(path)
+        key = f"{SPRITE_VERSION}|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.sprite")
+
+    def load_entries(self):
+        if self.entries is not None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".sprite") and entry.is_file():
+                    st = entry.stat()
+                    found.append((st.st_mtime_ns, entry.name, st.st_size))
+        found.sort()
+        self.entries = OrderedDict((name, size) for _, name, size in found)
+        self.total = sum(self.entries.values())
+        logger.info("Sprite cache holds %s sheets, %.1f MB", len(self.entries), self.total / 1024 ** 2)
+
+    def get(self, path):
+        with self.lock:
+            if path in self.sheets:
+                self.sheets.move_to_end(path)
+                return self.sheets[path]
+        try:
+            sprite_file = self.sprite_file(path)
+            if not os.path.exists(sprite_file):
+                return None
+            sheet = SpriteSheet(sprite_file)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring sprite sheet for %s: %s", path, e)
+            return None
+        name = os.path.basename(sprite_file)
+        with self.lock:
+            if path in self.sheets:
+                sheet.close()
+                return self.sheets[path]
+            self.sheets[path] = sheet
+            while len(self.sheets) > self.max_open:
+                # closing the map also lets the file be evicted from disk again
+                self.sheets.popitem(last=False)[1].close()
+            self.load_entries()
+            if name in self.entries:
+                self.entries.move_to_end(name)
+        try:
+            # the mtime doubles as the access stamp, so the order survives restarts
+            os.utime(sprite_file)
+        except OSError:
+            pass
+        return sheet
+
+    def request(self, path):
+        with self.lock:
+            if self.closed or path in self.pending or path in self.sheets:
+                return
+            self.pending.add(path)
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sprites")
+        self.pool.submit(self.build, path)
+
+    def build(self, path):
+        grabber = None
+        try:
+            if os.path.exists(self.sprite_file(path)):
+                return
+            grabber = FrameGrabber(self.instance_factory(), SPRITE_WIDTH, SPRITE_HEIGHT)
+
+            frames = []
+            for offset in range(0, SEGMENT_SECONDS, SPRITE_INTERVAL_SECONDS):
+                if self.closed:
+                    return
+                ppm = grabber.grab(path, offset)
+                # keep the raw RGB, the header is rebuilt when a frame is read back
+                frames.append(ppm[ppm.index(b"\n") + 1:] if ppm else None)
+                if frames[-2:] == [None, None]:
+                    # two misses in a row is the end of a short segment, not a bad frame
+                    break
+            # trailing misses are past the end of a short segment
+            while frames and frames[-1] is None:
+                frames.pop()
+            if not frames:
+                logger.warning("No sprite frames decoded from %s", os.path.basename(path))
+                return
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            sprite_file = self.sprite_file(path)
+            write_sprite_sheet(sprite_file, frames, SPRITE_WIDTH, SPRITE_HEIGHT, SPRITE_INTERVAL_SECONDS)
+            self.add_entry(sprite_file)
+            logger.info("Built %s frame sprite sheet for %s", len(frames), os.path.basename(path))
+        except Exception as e:
+            logger.warning("Sprite sheet failed for %s: %s", path, e)
+        finally:
+            if grabber is not None:
+                grabber.release()
+            with self.lock:
+                self.pending.discard(path)
+
+    def add_entry(self, sprite_file):
+        name = os.path.basename(sprite_file)
+        size = os.path.getsize(sprite_file)
+        with self.lock:
+            self.load_entries()
+            self.total += size - self.entries.pop(name, 0)
+            self.entries[name] = size
+            # sheets that are still mapped stay until they are closed
+            in_use = {sheet.name for sheet in self.sheets.values()}
+            for old_name in list(self.entries):
+                if self.total <= self.limit_bytes or len(self.entries) <= 1:
+                    break
+                if old_name == name or old_name in in_use:
+                    continue
+                self.total -= self.entries.pop(old_name)
+                try:
+                    os.remove(os.path.join(self.cache_dir, old_name))
+                except OSError as e:
+                    logger.debug("Could not evict sprite sheet %s: %s", old_name, e)
+
+    def shutdown(self):
+        # waits for the frame being grabbed, the libvlc instance is released right after
+        self.closed = True
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        with self.lock:
+            for sheet in self.sheets.values():
+                sheet.close()
+            self.sheets.clear()
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+logger.debug("state_store.py initialized.")
+
+SCHEMA_VERSION = 2
+# writes that arrive within this window go out in one transaction
+BATCH_WINDOW_SECONDS = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS viewed (key TEXT PRIMARY KEY, viewed_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS viewed_segments (
+    drive TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    viewed_at REAL NOT NULL,
+    PRIMARY KEY (drive, camera, start)
+) WITHOUT ROWID;
+"""
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class StateStore:
+    # settings are read at startup and viewed segments when a drive loads. after that the in-memory
+    # copy in navigation is the source of truth and changes go to a writer thread in batches
+    def __init__(self, db_path, legacy_config=None):
+        self.db_path = db_path
+        self.legacy_config = legacy_config
+        self.writes = queue.Queue()
+        self.worker = None
+        # the worker only exits idle while holding this, so a write can't slip in as it goes
+        self.worker_lock = threading.Lock()
+
+    def load(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.executescript(SCHEMA)
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < 1:
+                    self.migrate_legacy(conn)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            settings = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+        finally:
+            conn.close()
+        logger.info("Loaded %s settings from %s", len(settings), self.db_path)
+        return settings
+
+    def load_viewed(self, drive):
+        conn = connect(self.db_path)
+        try:
+            rows = conn.execute("SELECT camera, start FROM viewed_segments WHERE drive = ?", (drive,)).fetchall()
+        finally:
+            conn.close()
+        logger.info("Loaded %s viewed segments for drive %s", len(rows), drive)
+        return rows
+
+    def legacy_viewed(self):
+        # "Y/M/D/HHMM" keys from before viewed state was tied to a drive
+        conn = connect(self.db_path)
+        try:
+            return [key for (key,) in conn.execute("SELECT key FROM viewed")]
+        finally:
+            conn.close()
+
+    def migrate_legacy(self, conn):
+        if not self.legacy_config or not os.path.exists(self.legacy_config):
+            return
+        try:
+            with open(self.legacy_config, "r") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.error("Could not migrate %s: %s", self.legacy_config, e)
+            return
+
+        viewed = legacy.pop("viewed_files", {}) or {}
+        stamp = time.time()
+        conn.executemany("INSERT OR IGNORE INTO viewed (key, viewed_at) VALUES (?, ?)",
+                         ((key, stamp) for key in viewed))
+        conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                         ((key, json.dumps(value)) for key, value in legacy.items()))
+        logger.info("Migrated %s viewed times from %s", len(viewed), self.legacy_config)
+        try:
+            os.replace(self.legacy_config, f"{self.legacy_config}.migrated")
+        except OSError as e:
+            logger.warning("Could not rename %s: %s", self.legacy_config, e)
+
+    def set(self, key, value):
+        self.submit("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", [(key, json.dumps(value))])
+
+    def add_viewed(self, drive, segments):
+        stamp = time.time()
+        self.submit("INSERT OR REPLACE INTO viewed_segments (drive, camera, start, viewed_at) VALUES (?, ?, ?, ?)",
+                    [(drive, camera, start, stamp) for camera, start in segments])
+
+    def clear_viewed(self, drive):
+        self.submit("DELETE FROM viewed_segments WHERE drive = ?", [(drive,)])
+
+    def move_drive(self, old, new, keys):
+        # viewed segments and per-drive settings saved under an old drive id, keys are (old key, new key)
+        self.submit("INSERT OR IGNORE INTO viewed_segments (drive, camera, start, viewed_at) "
+                    "SELECT ?, camera, start, viewed_at FROM viewed_segments WHERE drive = ?", [(new, old)])
+        self.submit("DELETE FROM viewed_segments WHERE drive = ?", [(old,)])
+        self.submit("UPDATE OR REPLACE settings SET key = ? WHERE key = ?", [(new_key, old_key) for old_key, new_key in keys])
+
+    def drop_legacy_viewed(self, keys):
+        self.submit("DELETE FROM viewed WHERE key = ?", [(key,) for key in keys])
+
+    def submit(self, sql, params):
+        # params is a list of rows, each statement runs once per row
+        with self.worker_lock:
+            self.writes.put((sql, params))
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+
+    def run(self):
+        conn = connect(self.db_path)
+        try:
+            while True:
+                try:
+                    batch = [self.writes.get(timeout=5)]
+                except queue.Empty:
+                    with self.worker_lock:
+                        if self.writes.empty():
+                            self.worker = None
+                            return
+                    continue
+                time.sleep(BATCH_WINDOW_SECONDS)
+                while True:
+                    try:
+                        batch.append(self.writes.get_nowait())
+                    except queue.Empty:
+                        break
+
+                done = [item for item in batch if item is None]
+                statements = [item for item in batch if item is not None]
+                try:
+                    with conn:
+                        for sql, rows in statements:
+                            conn.executemany(sql, rows)
+                    logger.debug("Committed %s state changes", sum(len(rows) for _, rows in statements))
+                except sqlite3.Error as e:
+                    logger.error("Error saving state: %s", e)
+                if done:
+                    with self.worker_lock:
+                        self.worker = None
+                    return
+        finally:
+            conn.close()
+
+    def close(self):
+        # flushes whatever is queued before the app exits
+        with self.worker_lock:
+            worker = self.worker
+            if worker is not None or not self.writes.empty():
+                self.writes.put(None)
+        if worker is not None:
+            worker.join(timeout=5)
+        elif not self.writes.empty():
+            self.run()
@@ -0,0 +1,233 @@
+import os
+import queue
+import ctypes
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from catalog import SEGMENT_SECONDS
+import player_backend
+
+logger = logging.getLogger(__name__)
+logger.debug("thumbnails.py initialized.")
+
+THUMBNAIL_VERSION = 1
+THUMB_WIDTH = 128
+THUMB_HEIGHT = 72
+# a few frames spread over the nominal ten minute chunk
+THUMB_OFFSETS = (SEGMENT_SECONDS // 10, SEGMENT_SECONDS // 2, SEGMENT_SECONDS * 9 // 10)
+THUMB_TIMEOUT_SECONDS = 5
+CACHE_LIMIT_BYTES = 64 * 1024 * 1024
+
+
+def frame_to_ppm(bgra, width, height):
+    # vlc hands RV32 frames over as BGRA, Tk reads binary PPM without any image library
+    rgb = bytearray(width * height * 3)
+    rgb[0::3] = bgra[2::4]
+    rgb[1::3] = bgra[1::4]
+    rgb[2::3] = bgra[0::4]
+    return b"P6 %d %d 255\n" % (width, height) + bytes(rgb)
+
+
+class FrameGrabber:
+    # decodes into memory through libvlc video callbacks, no window or vout involved
+    def __init__(self, instance, width=THUMB_WIDTH, height=THUMB_HEIGHT):
+        self.width = width
+        self.height = height
+        self.buffer = (ctypes.c_ubyte * (width * height * 4))()
+        self.frame = None
+        self.shown = threading.Event()
+
+        def lock(opaque, planes):
+            planes[0] = ctypes.cast(self.buffer, ctypes.c_void_p).value
+            return None
+
+        def display(opaque, picture):
+            if not self.shown.is_set():
+                self.frame = bytes(self.buffer)
+                self.shown.set()
+
+        # ctypes callbacks have to outlive the player
+        self.callbacks = lock, display = player_backend.get_backend().video_callbacks(lock, display)
+        self.instance = instance
+        self.player = instance.media_player_new()
+        self.player.video_set_callbacks(lock, None, display, None)
+        self.player.video_set_format("RV32", width, height, width * 4)
+        self.player.audio_set_mute(True)
+
+    def grab(self, path, offset_seconds):
+        media = self.instance.media_new(path)
+        media.add_option(":no-audio")
+        media.add_option(f":start-time={offset_seconds}")
+        self.frame = None
+        self.shown.clear()
+        self.player.set_media(media)
+        media.release()
+        self.player.play()
+        self.shown.wait(THUMB_TIMEOUT_SECONDS)
+        self.player.stop()
+        if self.frame is None:
+            return None
+        return frame_to_ppm(self.frame, self.width, self.height)
+
+    def release(self):
+        self.player.stop()
+        self.player.release()
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir, instance_factory, limit_bytes=CACHE_LIMIT_BYTES):
+        self.cache_dir = cache_dir
+        self.instance_factory = instance_factory
+        self.limit_bytes = limit_bytes
+        # file name -> size, oldest access first
+        self.entries = None
+        self.total = 0
+        self.failed = set()
+        # set once libvlc can't be loaded, nothing can be extracted after that
+        self.unavailable = False
+        self.closed = False
+        self.lock = threading.Lock()
+        # newest requests first, so the selected timestamp jumps ahead of the rest of the day
+        self.requests = queue.LifoQueue()
+        self.worker = None
+
+    def key(self, path):
+        st = os.stat(path)
+        key = f"{THUMBNAIL_VERSION}|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def frame_file(self, key, i):
+        return os.path.join(self.cache_dir, f"{key}_{i}.ppm")
+
+    def load_entries(self):
+        if self.entries is not None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".ppm") and entry.is_file():
+                    st = entry.stat()
+                    found.append((st.st_mtime_ns, entry.name, st.st_size))
+        found.sort()
+        self.entries = OrderedDict((name, size) for _, name, size in found)
+        self.total = sum(self.entries.values())
+        logger.info("Thumbnail cache holds %s frames, %.1f MB", len(self.entries), self.total / 1024 ** 2)
+
+    def get(self, path):
+        # cached frame files for the segment, or None when they still need extracting
+        try:
+            key = self.key(path)
+        except OSError:
+            return None
+        with self.lock:
+            self.load_entries()
+            names = [os.path.basename(self.frame_file(key, i)) for i in range(len(THUMB_OFFSETS))]
+            found = [name for name in names if name in self.entries]
+            if not found:
+                return [] if key in self.failed or self.unavailable else None
+            for name in found:
+                self.entries.move_to_end(name)
+        for name in found:
+            try:
+                # the mtime doubles as the access stamp, so the order survives restarts
+                os.utime(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        return [os.path.join(self.cache_dir, name) for name in found]
+
+    def request(self, path):
+        # repeated requests are fine, finished paths are skipped when they come up again
+        with self.lock:
+            if self.closed:
+                return
+            self.requests.put(path)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+
+    def run(self):
+        grabber = None
+        try:
+            while True:
+                try:
+                    path = self.requests.get(timeout=5)
+                except queue.Empty:
+                    # only exits with the lock held and nothing queued, see request()
+                    with self.lock:
+                        if self.requests.empty():
+                            self.worker = None
+                            return
+                    continue
+                if path is None or self.closed:
+                    return
+                try:
+                    if self.get(path) is None:
+                        if grabber is None:
+                            grabber = FrameGrabber(self.instance_factory())
+                        self.extract(grabber, path)
+                except player_backend.BackendUnavailable as e:
+                    logger.warning("No thumbnails without a player backend: %s", e)
+                    with self.lock:
+                        self.unavailable = True
+                except Exception as e:
+                    logger.warning("Thumbnail extraction failed for %s: %s", path, e)
+                    self.mark_failed(path)
+        finally:
+            if grabber is not None:
+                grabber.release()
+
+    def shutdown(self):
+        # waits for the frame being grabbed, the libvlc instance is released right after
+        with self.lock:
+            self.closed = True
+            worker = self.worker
+            # the queue is last in first out, so this wakes the worker before anything still queued
+            self.requests.put(None)
+        if worker is not None:
+            worker.join(timeout=THUMB_TIMEOUT_SECONDS * 2)
+
+    def mark_failed(self, path):
+        try:
+            key = self.key(path)
+        except OSError:
+            return
+        with self.lock:
+            self.failed.add(key)
+
+    def extract(self, grabber, path):
+        key = self.key(path)
+        stored = 0
+        for i, offset in enumerate(THUMB_OFFSETS):
+            if self.closed:
+                return
+            data = grabber.grab(path, offset)
+            if data is None:
+                continue
+            self.store(self.frame_file(key, i), data)
+            stored += 1
+        if not stored:
+            with self.lock:
+                self.failed.add(key)
+            logger.warning("No thumbnail frames decoded from %s", os.path.basename(path))
+            return
+        logger.debug("Cached %s thumbnails for %s", stored, os.path.basename(path))
+
+    def store(self, frame_file, data):
+        tmp_file = f"{frame_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, frame_file)
+        name = os.path.basename(frame_file)
+        with self.lock:
+            self.total += len(data) - self.entries.pop(name, 0)
+            self.entries[name] = len(data)
+            while self.total > self.limit_bytes and len(self.entries) > 1:
+                old_name, old_size = self.entries.popitem(last=False)
+                self.total -= old_size
+                try:
+                    os.remove(os.path.join(self.cache_dir, old_name))
+                except OSError as e:
+                    logger.debug("Could not evict thumbnail %s: %s", old_name, e)
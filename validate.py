@@ -0,0 +1,162 @@
+import os
+import sys
+import csv
+import json
+import time
+import struct
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import drive_index
+import keyframes
+from catalog import SEGMENT_SECONDS, file_pattern
+from paths import get_writable_path
+import applog
+
+logger = logging.getLogger(__name__)
+logger.debug("validate.py initialized.")
+
+DRIVE_INDEX_DIR = get_writable_path("drive_index")
+KEYFRAME_INDEX_DIR = get_writable_path("keyframe_index")
+
+# anything this much shorter than a full chunk is flagged, the last chunk of a recording usually is
+SHORT_SEGMENT_RATIO = 0.9
+PROGRESS_EVERY = 500
+REPORT_FIELDS = ["camera", "folder", "path", "size", "named", "status", "format", "duration_ms", "keyframes", "error"]
+FAILED_STATUSES = ("empty", "unreadable", "corrupt", "no_duration")
+
+
+def check_file(job):
+    camera, folder, path, size, cache_dir = job
+    result = {
+        "camera": camera,
+        "folder": folder,
+        "path": path,
+        "size": size,
+        "named": bool(file_pattern.match(os.path.basename(path))),
+        "status": "ok",
+        "format": None,
+        "duration_ms": None,
+        "keyframes": None,
+        "error": None,
+    }
+    # the drive index may be older than the file, e.g. a chunk that was still being written
+    try:
+        size = result["size"] = os.stat(path).st_size
+    except OSError as e:
+        result["status"] = "unreadable"
+        result["error"] = str(e)
+        return result
+    if size == 0:
+        result["status"] = "empty"
+        return result
+
+    try:
+        table = keyframes.probe(path)
+    except (keyframes.ContainerError, IndexError, struct.error, ValueError) as e:
+        # parser slips on garbage input count as corrupt too, one bad chunk must not stop the drive
+        result["status"] = "corrupt"
+        result["error"] = str(e)
+        return result
+    except OSError as e:
+        result["status"] = "unreadable"
+        result["error"] = str(e)
+        return result
+
+    result["format"] = table["format"]
+    result["duration_ms"] = table["duration_ms"]
+    result["keyframes"] = len(table["keyframes_ms"])
+    # the player would parse the same tables on first seek, keep them
+    if cache_dir:
+        keyframes.KeyframeIndex(cache_dir).store(path, table)
+
+    if not table["duration_ms"]:
+        result["status"] = "no_duration"
+    elif not table["keyframes_ms"]:
+        result["status"] = "no_keyframes"
+    elif table["duration_ms"] < SEGMENT_SECONDS * 1000 * SHORT_SEGMENT_RATIO:
+        result["status"] = "short"
+    return result
+
+
+def collect_jobs(rec_path, drive_scan, cache_dir):
+    jobs = []
+    for cam_name, cam_entry in drive_scan.items():
+        cam_folder = os.path.join(rec_path, cam_name)
+        for file, size, _mtime in cam_entry["files"]:
+            jobs.append((cam_name, "main", os.path.join(cam_folder, file), size, cache_dir))
+        corrupted = cam_entry.get("corrupted")
+        if corrupted:
+            corrupted_folder = os.path.join(cam_folder, drive_index.CORRUPTED_FOLDER)
+            for file, size, _mtime in corrupted["files"]:
+                jobs.append((cam_name, "corrupted", os.path.join(corrupted_folder, file), size, cache_dir))
+    # big files first so one slow TS scan doesn't end up alone at the tail
+    jobs.sort(key=lambda job: -job[3])
+    return jobs
+
+
+def validate_drive(rec_path, workers=None, cache_dir=KEYFRAME_INDEX_DIR):
+    started = time.perf_counter()
+    drive_scan = drive_index.refresh_index(rec_path, DRIVE_INDEX_DIR)
+    jobs = collect_jobs(rec_path, drive_scan, cache_dir)
+    logger.info("Checking %s files in %s with %s processes", len(jobs), rec_path, workers or os.cpu_count())
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(check_file, jobs, chunksize=8):
+            results.append(result)
+            if len(results) % PROGRESS_EVERY == 0:
+                logger.info("Checked %s/%s files", len(results), len(jobs))
+
+    results.sort(key=lambda result: (result["camera"], result["folder"], result["path"]))
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    elapsed = time.perf_counter() - started
+    logger.info("Checked %s files in %.1f s: %s", len(results), elapsed, summary)
+    return {
+        "rec_path": rec_path,
+        "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed_seconds": round(elapsed, 2),
+        "summary": summary,
+        "files": results,
+    }
+
+
+def write_report(report, output):
+    if output.lower().endswith(".csv"):
+        with open(output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(report["files"])
+    else:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    logger.info("Report written to %s", output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every video on a REC drive without opening the player.")
+    parser.add_argument("rec_path", help="path to the REC folder")
+    parser.add_argument("-o", "--output", default="integrity_report.json", help="report file, .json or .csv")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--no-keyframe-cache", action="store_true", help="don't save keyframe tables for the player")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.rec_path):
+        logger.error("REC path does not exist: %s", args.rec_path)
+        return 2
+
+    cache_dir = None if args.no_keyframe_cache else KEYFRAME_INDEX_DIR
+    report = validate_drive(args.rec_path, args.workers, cache_dir)
+    write_report(report, args.output)
+    failed = sum(report["summary"].get(status, 0) for status in FAILED_STATUSES)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    applog.setup()
+    sys.exit(main())
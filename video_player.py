@@ -1,717 +1,1627 @@
-import sys, os, ctypes
-
-def setup_vlc_env():
-    if getattr(sys, 'frozen', False):
-        base_path = sys._MEIPASS
-    else:
-        base_path = os.path.abspath(os.path.dirname(__file__))
-
-    plugin_path = os.path.join(base_path, "vlc_bundle", "plugins")
-    libvlc_path = os.path.join(base_path, "vlc_bundle", "libvlc.dll")
-
-    os.environ["VLC_PLUGIN_PATH"] = plugin_path
-
-    try:
-        ctypes.CDLL(libvlc_path)
-        print(f"[VLC] Loaded libvlc manually from {libvlc_path}")
-    except Exception as e:
-        print(f"[VLC] Failed to load libvlc.dll: {e}")
-        raise
-
-    import vlc
-    return vlc, vlc.Instance, vlc.MediaPlayer, vlc.Media, vlc.State
-
-vlc, Instance, MediaPlayer, Media, State = setup_vlc_env()
-
+import sys, os
+import logging
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import time
+import queue
+import threading
+from collections import OrderedDict
 from time import monotonic as now
-
-players = []
-frames = []
-current_speed = 1
-speed_buttons = []
-window_base_title = ""
-skip_configurable_seconds = 10
-control_widgets = []
-skip_in_progress = False
-
-playback_start_monotonic = 0
-manual_offset = 0
-goto_button = None
-
+from drift_monitor import DriftMonitor
+import keyframes
+import sprites
+import applog
+import metrics
+import player_backend
+import drive_probe
+
+logger = logging.getLogger(__name__)
+
+icon_path = None
+
+SEEK_TOLERANCE_MS = 250
+SEEK_POLL_INTERVAL_MS = 50
+SEEK_TIMEOUT_MS = 1500
+EVENT_PUMP_INTERVAL_MS = 25
+WARMUP_TIMEOUT_MS = 5000
 WATCHDOG_ENABLED = True
-WATCHDOG_INTERVAL_MS = 200
-
-DEBUG_LOGGING = True
-
-def log(msg):
-    if DEBUG_LOGGING:
-        print(f"[DEBUG] {time.strftime('%H:%M:%S')} — {msg}")
-
-
-def pause_all_players():
-    global playback_start_monotonic, manual_offset
-    if playback_start_monotonic > 0:
-        offset = (now() - playback_start_monotonic) * current_speed
-        manual_offset += offset
-        log(f"Paused — added {offset:.2f}s to manual_offset (now {manual_offset:.2f})")
-    playback_start_monotonic = 0
-
-    for idx, player in enumerate(players):
+SYNC_INTERVAL_MS = 1000
+SYNC_GRACE_SECONDS = 1.5
+PREFETCH_LEAD_SECONDS = 30
+CONTINUITY_GAP_SECONDS = 60
+SEEK_BAR_HEIGHT = 16
+
+# software decodes across every open player window, a full ten camera grid always fits
+MAX_SOFTWARE_DECODES = max(10, (os.cpu_count() or 4) * 2)
+
+# decode quality per tile, the focused tile is always full quality. the others drop a level when the
+# process uses more than the CPU target and come back once it has stayed under target - headroom
+QUALITY_OPTIONS = [
+    (),
+    (":avcodec-skiploopfilter=4", ":avcodec-skip-frame=1"),
+    (":avcodec-skiploopfilter=4", ":avcodec-skip-frame=3", ":avcodec-skip-idct=4"),
+]
+QUALITY_NAMES = ["full", "reference frames only", "keyframes only"]
+DECODE_CPU_TARGET = 0.75
+DECODE_CPU_HEADROOM = 0.25
+DECODE_CHECK_INTERVAL_MS = 2000
+DECODE_RESTORE_CHECKS = 3
+QUALITY_SETTLE_SECONDS = 4
+
+vlc_instance = None
+vlc_instance_lock = threading.Lock()
+# libvlc players are shared by all windows, each one is leased to at most one session at a time
+player_pool = []
+pool_owners = {}
+sessions = []
+
+# keyframe tables are built in the background, main points this at a writable folder
+keyframe_cache_dir = None
+keyframe_index = None
+
+# sprite sheets for the seek bar preview, shared by every window
+sprite_cache_dir = None
+sprite_cache = None
+
+# throughput and latency of the loaded drive, navigation sets this after probing it
+drive_profile = None
+
+# one logger per subsystem so their console levels can be set separately, see applog
+vlc_log = logging.getLogger("video_player.vlc")
+playback_log = logging.getLogger("video_player.playback")
+warmup_log = logging.getLogger("video_player.warmup")
+watchdog_log = logging.getLogger("video_player.watchdog")
+continuous_log = logging.getLogger("video_player.continuous")
+sync_log = logging.getLogger("video_player.sync")
+seek_log = logging.getLogger("video_player.seek")
+gui_log = logging.getLogger("video_player.gui")
+
+
+def get_vlc_instance():
+    # the backend loads libvlc here, the first time a player, thumbnail or sprite sheet needs it
+    global vlc_instance
+    with vlc_instance_lock:
+        if vlc_instance is None:
+            backend = player_backend.get_backend()
+            vlc_log.info("Creating shared %s instance", backend.name)
+            vlc_instance = backend.create_instance(
+                f"--file-caching={drive_probe.DEFAULT_CACHING_MS}",
+                f"--network-caching={drive_probe.DEFAULT_CACHING_MS}",
+                "--avcodec-hw=none",
+                "--no-video-title-show",
+                "--quiet"
+            )
+    return vlc_instance
+
+def lease_players(session, count):
+    instance = get_vlc_instance()
+    leased = [player for pool_idx, player in enumerate(player_pool) if pool_owners.get(pool_idx) is None][:count]
+    if len(leased) < count:
+        event_kinds = player_backend.get_backend().event_kinds()
+        while len(leased) < count:
+            pool_idx = len(player_pool)
+            player = instance.media_player_new()
+            events = player.event_manager()
+            for event_type, kind in event_kinds.items():
+                events.event_attach(event_type, on_player_event, kind, pool_idx)
+            player_pool.append(player)
+            leased.append(player)
+            vlc_log.debug("Player pool grown to %d", len(player_pool))
+    for player in leased:
+        pool_owners[player_pool.index(player)] = session
+    return leased
+
+def return_players(players):
+    # the media is dropped, the player itself stays in the pool for the next window
+    for player in players:
         try:
-            player.pause()
-            state = player.get_state()
-            log(f"Player {idx} paused — state: {state}")
+            player.stop()
         except Exception as e:
-            log(f"Player {idx} pause failed: {e}")
-
-
-def play_all_players():
-    global playback_start_monotonic
-    for idx, player in enumerate(players):
+            vlc_log.warning("Error stopping player: %s", e)
+        pool_owners.pop(player_pool.index(player), None)
+
+def release_vlc():
+    global vlc_instance, sprite_cache
+    for session in list(sessions):
+        session.on_closing()
+    if sprite_cache is not None:
+        sprite_cache.shutdown()
+        sprite_cache = None
+    for player in player_pool:
         try:
-            player.play()
-            log(f"Player {idx} play called")
-            log(f"Player {idx} state after initial play: {player.get_state()}")
+            player.stop()
+            player.release()
         except Exception as e:
-            log(f"Player {idx} play failed: {e}")
-    playback_start_monotonic = now()
-    log("Playback started — timer resumed")
-
-def toggle_play_pause():
-    if any(player.is_playing() for player in players):
-        log("Toggle: pausing")
-        pause_all_players()
-        root.title(f"{window_base_title} — PAUSED")
-    else:
-        log("Toggle: playing")
-        play_all_players()
-        root.title(f"{window_base_title} — PLAYING")
-
-def change_speed(rate):
-    for player in players:
-        try:
-            player.set_rate(rate)
-        except:
-            pass
-
-def set_speed(r):
-    global current_speed, manual_offset, playback_start_monotonic
-
-    was_playing = any(player.is_playing() for player in players)
-
-    if was_playing:
-        log("Changing speed — pausing for clean transition")
-        pause_all_players()
-
-    if playback_start_monotonic > 0:
-        elapsed = (now() - playback_start_monotonic) * current_speed
-        manual_offset += elapsed
-        log(f"Speed change: added {elapsed:.2f}s to manual_offset (now {manual_offset:.2f})")
-        playback_start_monotonic = 0
-
-    current_speed = r
-    change_speed(r)
-    update_speed_button_styles()
-
-    root.title(f"{window_base_title} — PAUSED")
-    log(f"Speed changed to {r}x and playback remains paused")
-
-    def wait_for_playback_ready(player, tries_left=15):
-        try:
-            state = player.get_state()
-        except:
-            state = vlc.State.Error
-
-        if state == vlc.State.Playing or tries_left <= 0:
-            try:
-                player.pause()
-            except:
-                pass
-            root.update()
+            vlc_log.warning("Error releasing pooled player: %s", e)
+    player_pool.clear()
+    pool_owners.clear()
+    if vlc_instance is not None:
+        vlc_instance.release()
+        vlc_instance = None
+        vlc_log.info("Shared libvlc instance released")
+
+def on_player_event(event, kind, pool_idx):
+    # called on a libvlc thread, Tk is only touched from the owning session's event pump
+    session = pool_owners.get(pool_idx)
+    if session is None:
+        return
+    value = None
+    if kind == "vout":
+        if event.u.new_count == 0:
+            return
+    elif kind == "time":
+        value = event.u.new_time
+    elif kind == "length":
+        value = event.u.new_length
+    session.events.put((kind, pool_idx, now(), value))
+
+def playback_active():
+    return any(session.playback_start_monotonic > 0 for session in sessions)
+
+def get_keyframe_index():
+    global keyframe_index
+    if keyframe_index is None:
+        keyframe_index = keyframes.KeyframeIndex(keyframe_cache_dir, throttle=playback_active)
+    return keyframe_index
+
+def get_sprite_cache():
+    global sprite_cache
+    if sprite_cache is None and sprite_cache_dir:
+        sprite_cache = sprites.SpriteCache(sprite_cache_dir, get_vlc_instance)
+    return sprite_cache
+
+def request_sprites(path):
+    cache = get_sprite_cache()
+    if cache is not None:
+        cache.request(path)
+
+def attach_window(player, frame):
+    window_id = frame.winfo_id()
+    try:
+        if os.name == "nt" or sys.platform.startswith("win"):
+            player.set_hwnd(window_id)
+        elif sys.platform.startswith("linux"):
+            player.set_xwindow(window_id)
+        elif sys.platform == "darwin":
+            player.set_nsobject(window_id)
         else:
-            root.after(100, lambda: wait_for_playback_ready(player, tries_left - 1))
+            gui_log.error("Unsupported platform: %s", sys.platform)
+        # clicks go through to the tile frame, that is how a tile gets focus
+        player.video_set_mouse_input(False)
+        player.video_set_key_input(False)
+    except Exception as e:
+        gui_log.error("Failed to set window handle on %s: %s", sys.platform, e)
 
-    def warmup_players():
-        log("[WARMUP] Briefly playing all players after speed change")
-        for idx, player in enumerate(players):
+def parse_footage_start(filename):
+    parts = filename.split("_")
+    if len(parts) >= 3:
+        time_str = parts[2].split(".")[0]
+        if time_str.isdigit():
+            try:
+                h = int(time_str[0:2])
+                m = int(time_str[2:4])
+                s = int(time_str[4:6]) if len(time_str) >= 6 else 0
+                gui_log.debug("Parsed footage start time: %02d:%02d:%02d", h, m, s)
+                return h * 3600 + m * 60 + s
+            except Exception as e:
+                gui_log.warning("Failed to parse footage time: %s", e)
+    return 0
+
+def camera_of(file):
+    return os.path.basename(file).split("_")[0]
+
+def camera_ids(files):
+    return [os.path.basename(file).split("_")[0] for file in files]
+
+def reference_file(files, leads):
+    # master time zero is where the latest starting camera begins
+    return next((file for file in files if not leads.get(file)), files[0])
+
+def open_media(instance, file, lead_ms, options=()):
+    media = instance.media_new(file)
+    if lead_ms:
+        media.add_option(f":start-time={lead_ms / 1000:.3f}")
+    for option in options:
+        media.add_option(option)
+    return media
+
+def process_cpu_sample():
+    # libvlc decodes on threads of this process, so process time covers every tile of every window
+    return time.process_time(), now()
+
+def cpu_load(previous, current):
+    elapsed = current[1] - previous[1]
+    if elapsed <= 0:
+        return None
+    return (current[0] - previous[0]) / elapsed / (os.cpu_count() or 1)
+
+def format_clock(sec):
+    h, rem = divmod(sec, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02}:{m:02}:{s:02}"
+
+
+class DecoderBudget:
+    # caps how many players decode at once across all windows. the window that starts playing
+    # gets its decoders, windows that started playing longest ago are paused to make room
+    def __init__(self, limit=MAX_SOFTWARE_DECODES):
+        self.limit = limit
+        self.holders = OrderedDict()
+
+    def in_use(self):
+        return sum(self.holders.values())
+
+    def acquire(self, session, count):
+        self.holders.pop(session, None)
+        for other in list(self.holders):
+            if self.in_use() + count <= self.limit:
+                break
+            other.preempt()
+        self.holders[session] = count
+        if self.in_use() > self.limit:
+            playback_log.warning("%d decodes running, over the budget of %d", self.in_use(), self.limit)
+
+    def release(self, session):
+        self.holders.pop(session, None)
+
+
+decoder_budget = DecoderBudget()
+
+
+class PlayerSession:
+    # one player window with its own players, clock, seek engine and widgets. several can be open
+    # side by side, they share the libvlc instance, the player pool and the decoder budget
+    def __init__(self, files, catalog=None, start=None, offset=0, autoplay=False):
+        self.files = files
+        self.root = None
+        self.closed = False
+        self.players = []
+        self.leased = []
+        self.frames = []
+        self.events = queue.Queue()
+
+        self.current_speed = 1
+        self.speed_buttons = []
+        self.window_base_title = ""
+        self.skip_configurable_seconds = 10
+        self.control_widgets = []
+        self.goto_button = None
+        self.timer_label = None
+        self.overlay_label = None
+        self.footage_start_time = 0
+
+        self.playback_start_monotonic = 0
+        self.manual_offset = 0
+
+        # seek engine state, targets are in ms and keyed by pool index
+        self.skip_in_progress = False
+        self.seek_target_ms = 0
+        self.seek_inflight_ms = 0
+        self.seek_generation = 0
+        self.seek_started = 0
+        self.seek_pending = {}
+
+        self.warmup_pending = set()
+        self.warmup_started = 0
+        self.loading_popup = None
+        self.speed_warmup_active = False
+        self.speed_warmup_started = 0
+
+        # playback state as last reported by libvlc events, keyed by pool index
+        self.playing_players = set()
+        self.ended_players = set()
+        self.player_lengths = {}
+        self.last_timer_text = None
+
+        # sync controller, compares each player's reported time against the master clock
+        self.drift_monitor = DriftMonitor()
+        self.player_reported_time = {}
+        self.player_files = {}
+        self.sync_label = None
+
+        # continuous playback: the next segment is opened on standby players rendering into
+        # hidden frames under the visible ones, then swapped in when the current one ends
+        self.segment_catalog = catalog
+        self.segment_start = start
+        self.continuous_var = None
+        self.timeline_offset = offset
+        self.standby_frames = []
+        self.prefetch = None
+        self.prefetch_pending = set()
+        self.autoplay_after_warmup = autoplay
+
+        # per camera start offsets within a timestamp group, in ms of media time to skip
+        self.file_leads_ms = {}
+        self.player_leads_ms = {}
+
+        # seek bar, dragging only moves the marker and the sprite preview, players seek on release
+        self.seek_bar = None
+        self.seek_bar_dragging = False
+        self.seek_preview = None
+        self.seek_preview_label = None
+        self.seek_preview_images = {}
+
+        # decode scheduler, tile quality levels are keyed by pool index like the rest of the player state
+        self.focused_tile = None
+        self.background_quality = 0
+        self.tile_quality = {}
+        # tiles whose level changed while paused, their media is reopened when playback resumes
+        self.requality_deferred = set()
+        self.requality_pending = set()
+        self.cpu_sample = None
+        self.cpu_calm_checks = 0
+        self.quality_changed_at = 0
+        self.decode_label = None
+
+        # caching is chosen per media open from the drive probe, camera count and speed
+        self.drive_profile = drive_profile
+        self.caching_plan = None
+
+    def lease(self, count):
+        leased = lease_players(self, count)
+        self.leased.extend(leased)
+        return leased
+
+    def give_back(self, players):
+        players = list(players)
+        return_players(players)
+        self.leased = [player for player in self.leased if player not in players]
+
+    def pool_index(self, player):
+        return player_pool.index(player)
+
+    def pause_all_players(self):
+        if self.playback_start_monotonic > 0:
+            offset = (now() - self.playback_start_monotonic) * self.current_speed
+            self.manual_offset += offset
+            playback_log.debug("Paused — added %.2fs to manual_offset (now %.2f)", offset, self.manual_offset)
+        self.playback_start_monotonic = 0
+
+        for idx, player in enumerate(self.players):
+            try:
+                # set_pause, not the toggling pause(), a player that is already paused must stay paused
+                player.set_pause(1)
+                state = player.get_state()
+                playback_log.debug("Player %d paused — state: %s", idx, state)
+            except Exception as e:
+                playback_log.warning("Player %d pause failed: %s", idx, e)
+        if not self.speed_warmup_active:
+            decoder_budget.release(self)
+
+    def play_all_players(self):
+        decoder_budget.acquire(self, len(self.players))
+        for tile, player in enumerate(self.players):
+            if self.pool_index(player) in self.requality_deferred:
+                self.reopen_tile(tile)
+        self.requality_deferred.clear()
+        for idx, player in enumerate(self.players):
             try:
                 player.play()
-                wait_for_playback_ready(player)
+                playback_log.debug("Player %d play called", idx)
             except Exception as e:
-                log(f"[WARMUP] Player {idx} failed to warm up: {e}")
-
-        root.after(200, lambda: pause_all_players())
-        root.after(300, lambda: set_controls_enabled(True))
-
-    set_controls_enabled(False)
-    root.after(100, warmup_players)
-
-def update_speed_button_styles():
-    for rate, btn in speed_buttons:
-        if rate == current_speed:
-            btn.config(relief="sunken", font=("TkDefaultFont", 10, "bold"), foreground="blue")
+                playback_log.warning("Player %d play failed: %s", idx, e)
+        self.playback_start_monotonic = now()
+        playback_log.info("Playback started — timer resumed")
+
+    def preempt(self):
+        # another window needs the decoders, this one pauses until it is played again
+        if self.playback_start_monotonic > 0:
+            playback_log.info("Pausing %s to free decoders for another window", self.window_base_title)
+            self.pause_all_players()
+            self.root.title(f"{self.window_base_title} — PAUSED")
+        decoder_budget.release(self)
+
+    def toggle_play_pause(self):
+        if any(player.is_playing() for player in self.players):
+            playback_log.debug("Toggle: pausing")
+            self.pause_all_players()
+            self.root.title(f"{self.window_base_title} — PAUSED")
         else:
-            btn.config(relief="raised", font=("TkDefaultFont", 10), foreground="black")
-
-def watchdog_enforce_paused():
-    if not WATCHDOG_ENABLED or not players:
-        root.after(WATCHDOG_INTERVAL_MS, watchdog_enforce_paused)
-        return
-
-    if playback_start_monotonic == 0:
-        for idx, player in enumerate(players):
+            playback_log.debug("Toggle: playing")
+            self.play_all_players()
+            self.root.title(f"{self.window_base_title} — PLAYING")
+
+    def change_speed(self, rate):
+        self.drift_monitor.nudged.clear()
+        # standby players opened for the next segment switch in at whatever rate they have
+        standby = self.prefetch.get("players", []) if self.prefetch else []
+        for player in self.players + standby:
             try:
-                if player.is_playing():
-                    log(f"[WATCHDOG] Player {idx} unexpectedly playing — forcing pause")
-                    player.set_pause(True)
-            except Exception as e:
-                log(f"[WATCHDOG] Error checking player {idx}: {e}")
+                player.set_rate(rate)
+            except:
+                pass
 
-    root.after(WATCHDOG_INTERVAL_MS, watchdog_enforce_paused)
+    def set_speed(self, r):
+        self.speed_warmup_started = now()
 
-def update_timer():
-    global playback_start_monotonic, manual_offset
+        was_playing = any(player.is_playing() for player in self.players)
 
-    if not players:
-        root.after(500, update_timer)
-        return
+        if was_playing:
+            playback_log.debug("Changing speed — pausing for clean transition")
+            self.pause_all_players()
 
-    playing = any(player.is_playing() for player in players)
+        if self.playback_start_monotonic > 0:
+            elapsed = (now() - self.playback_start_monotonic) * self.current_speed
+            self.manual_offset += elapsed
+            playback_log.debug("Speed change: added %.2fs to manual_offset (now %.2f)", elapsed, self.manual_offset)
+            self.playback_start_monotonic = 0
 
-    if playback_start_monotonic > 0 and playing:
-        elapsed_since_play = (now() - playback_start_monotonic) * current_speed
-    else:
-        elapsed_since_play = 0
+        self.current_speed = r
+        self.change_speed(r)
+        self.update_speed_button_styles()
 
-    current_time_sec = int(elapsed_since_play + manual_offset)
+        self.root.title(f"{self.window_base_title} — PAUSED")
+        playback_log.info("Speed changed to %sx and playback remains paused", r)
 
-    log(f"update_timer: {current_time_sec}s (manual_offset={manual_offset:.2f}, playback_start_monotonic={playback_start_monotonic:.2f})")
-    minutes, seconds = divmod(current_time_sec, 60)
+        State = player_backend.get_backend().State
+        root = self.root
 
-    try:
-        duration_ms = players[0].get_length()
-    except:
-        duration_ms = -1
+        def wait_for_playback_ready(player, tries_left=15):
+            try:
+                state = player.get_state()
+            except:
+                state = State.Error
+
+            if state == State.Playing or tries_left <= 0:
+                try:
+                    player.set_pause(1)
+                except:
+                    pass
+                root.update()
+            else:
+                root.after(100, lambda: wait_for_playback_ready(player, tries_left - 1))
+
+        def warmup_players():
+            if self.closed:
+                return
+            self.speed_warmup_active = True
+            decoder_budget.acquire(self, len(self.players))
+            warmup_log.debug("Briefly playing all players after speed change")
+            for idx, player in enumerate(self.players):
+                try:
+                    player.play()
+                    wait_for_playback_ready(player)
+                except Exception as e:
+                    warmup_log.warning("Player %d failed to warm up: %s", idx, e)
+
+            root.after(200, lambda: self.pause_all_players())
+            root.after(300, finish_speed_warmup)
+
+        def finish_speed_warmup():
+            self.speed_warmup_active = False
+            if self.playback_start_monotonic == 0:
+                decoder_budget.release(self)
+                # "playing" events during the warm-up were ignored, catch any player still running now
+                for player in self.players:
+                    try:
+                        if player.get_state() == State.Playing:
+                            self.enforce_paused(self.pool_index(player))
+                    except Exception as e:
+                        warmup_log.warning("Error checking player state: %s", e)
+            metrics.observe("speed.warmup_ms", (now() - self.speed_warmup_started) * 1000)
+            self.set_controls_enabled(True)
+
+        self.set_controls_enabled(False)
+        root.after(100, warmup_players)
+
+    def update_speed_button_styles(self):
+        for rate, btn in self.speed_buttons:
+            if rate == self.current_speed:
+                btn.config(relief="sunken", font=("TkDefaultFont", 10, "bold"), foreground="blue")
+            else:
+                btn.config(relief="raised", font=("TkDefaultFont", 10), foreground="black")
 
-    if duration_ms <= 0:
-        timer_label.config(text="--:-- / --:--")
-        root.after(500, update_timer)
-        return
+    def enforce_paused(self, pool_idx):
+        # replaces the old 200 ms watchdog: a player that starts playing while the
+        # app considers itself paused is paused again as soon as libvlc reports it
+        if (not WATCHDOG_ENABLED or self.playback_start_monotonic > 0 or self.warmup_pending
+                or self.speed_warmup_active or pool_idx in self.requality_pending):
+            return
+        try:
+            watchdog_log.debug("Player %d unexpectedly playing — forcing pause", pool_idx)
+            player_pool[pool_idx].set_pause(True)
+        except Exception as e:
+            watchdog_log.warning("Error pausing player %d: %s", pool_idx, e)
+
+    def handle_playback_ended(self):
+        if self.prefetch and self.continuous_var is not None and self.continuous_var.get():
+            if self.prefetch["seamless"] and not self.prefetch["ready"]:
+                continuous_log.info("Segment ended before the next one was ready — switching when it is")
+                self.prefetch["switch_when_ready"] = True
+                return
+            self.switch_to_next_segment()
+            return
 
-    all_ended = all(player.get_state() == vlc.State.Ended for player in players)
+        if self.playback_start_monotonic > 0:
+            offset = (now() - self.playback_start_monotonic) * self.current_speed
+            self.manual_offset += offset
+            playback_log.info("Playback reached end — added %.2fs to manual_offset (now %.2f)",
+                              offset, self.manual_offset)
+            self.playback_start_monotonic = 0
+        decoder_budget.release(self)
 
-    if all_ended:
-        if playback_start_monotonic > 0:
-            offset = (now() - playback_start_monotonic) * current_speed
-            manual_offset += offset
-            log(f"[ENDED] Playback reached end — added {offset:.2f}s to manual_offset (now {manual_offset:.2f})")
-            playback_start_monotonic = 0
+        self.root.title(f"{self.window_base_title} — ENDED")
+        self.set_controls_enabled(False)
+        self.update_timer()
 
-        root.title(f"{window_base_title} — ENDED")
-        set_controls_enabled(False)
+    def update_timer(self):
+        if not self.players:
+            return
 
-    duration_sec = duration_ms // 1000
-    duration_minutes, duration_seconds = divmod(duration_sec, 60)
+        if self.playback_start_monotonic > 0 and self.playing_players:
+            elapsed_since_play = (now() - self.playback_start_monotonic) * self.current_speed
+        else:
+            elapsed_since_play = 0
 
-    line1 = f"{minutes:02}:{seconds:02} / {duration_minutes:02}:{duration_seconds:02}"
+        current_time_sec = int(elapsed_since_play + self.manual_offset)
+        # the MM:SS timer keeps counting across segments played back to back
+        minutes, seconds = divmod(self.timeline_offset + current_time_sec, 60)
 
-    footage_current_time = root.footage_start_time + current_time_sec
-    footage_end_time = root.footage_start_time + duration_sec
+        duration_ms = self.segment_duration_ms()
+        if duration_ms <= 0:
+            self.timer_label.config(text="--:-- / --:--")
+            return
 
-    def format_time(sec):
-        h, rem = divmod(sec, 3600)
-        m, s = divmod(rem, 60)
-        return f"{h:02}:{m:02}:{s:02}"
+        duration_sec = duration_ms // 1000
+        duration_minutes, duration_seconds = divmod(self.timeline_offset + duration_sec, 60)
+        self.maybe_prefetch_next(current_time_sec, duration_sec)
 
-    line2 = f"{format_time(footage_current_time)} / {format_time(footage_end_time)}"
+        line1 = f"{minutes:02}:{seconds:02} / {duration_minutes:02}:{duration_seconds:02}"
 
-    timer_label.config(text=f"{line1}   ({line2})")
+        footage_current_time = self.footage_start_time + current_time_sec
+        footage_end_time = self.footage_start_time + duration_sec
+        line2 = f"{format_clock(footage_current_time)} / {format_clock(footage_end_time)}"
 
-    if hasattr(root, "footage_start_time"):
-        total_seconds = root.footage_start_time + current_time_sec
-        hr, rem = divmod(total_seconds, 3600)
-        mn, sc = divmod(rem, 60)
-        overlay_label.config(text=f"Footage Time: {hr:02}:{mn:02}:{sc:02}")
+        # time events arrive several times a second per player, only redraw when the text changes
+        timer_text = f"{line1}   ({line2})"
+        if timer_text == self.last_timer_text:
+            return
+        self.last_timer_text = timer_text
+        self.timer_label.config(text=timer_text)
+        if not self.seek_bar_dragging:
+            self.draw_seek_bar(current_time_sec)
+        self.overlay_label.config(text=f"Footage Time: {format_clock(footage_current_time)}")
+
+    def maybe_prefetch_next(self, current_time_sec, duration_sec):
+        if (self.prefetch is not None or self.segment_catalog is None or self.continuous_var is None
+                or not self.continuous_var.get()):
+            return
+        if duration_sec - current_time_sec > PREFETCH_LEAD_SECONDS:
+            return
 
-    root.after(500, update_timer)
+        next_start = self.segment_catalog.next_start(self.segment_start)
+        if next_start is None or next_start - self.segment_start > duration_sec + CONTINUITY_GAP_SECONDS:
+            continuous_log.info("No contiguous next segment, playback will stop at the end")
+            self.prefetch = {"start": None, "files": [], "seamless": False, "ready": False}
+            return
 
-def skip_all_players(seconds):
-    global skip_in_progress, manual_offset, playback_start_monotonic
+        files = self.segment_catalog.files_at(next_start)
+        if camera_ids(files) != camera_ids(self.player_files[self.pool_index(p)] for p in self.players):
+            # a different camera set needs a different grid, that switch reopens the window
+            continuous_log.info("Camera set changes at next segment, will reopen for %d cameras", len(files))
+            self.prefetch = {"start": next_start, "files": files, "seamless": False, "ready": True}
+            return
 
-    if skip_in_progress:
-        log("Skip ignored — already in progress")
-        return
+        prefetch = self.prefetch = {"start": next_start, "files": files, "seamless": True, "ready": False,
+                                    "switch_when_ready": False, "started": now(), "players": [],
+                                    "leads": self.segment_leads(next_start, files)}
+        request_sprites(files[0])
+        instance = get_vlc_instance()
+        standby = self.lease(len(files))
+
+        while len(self.standby_frames) < len(self.frames):
+            frame = self.frames[len(self.standby_frames)]
+            standby_frame = tk.Frame(self.root, bg="black")
+            standby_frame.grid(**{k: v for k, v in frame.grid_info().items() if k != "in"})
+            standby_frame.grid_propagate(False)
+            standby_frame.lower(frame)
+            self.bind_tile(standby_frame, len(self.standby_frames))
+            self.standby_frames.append(standby_frame)
+
+        for tile, (player, file, frame) in enumerate(zip(standby, files, self.standby_frames)):
+            pool_idx = self.pool_index(player)
+            try:
+                lead_ms = prefetch["leads"].get(file, 0)
+                self.tile_quality[pool_idx] = self.tile_level(tile)
+                media = open_media(instance, file, lead_ms, self.media_options(self.tile_quality[pool_idx], len(files)))
+                player.set_media(media)
+                media.release()
+                attach_window(player, frame)
+                self.player_leads_ms[pool_idx] = lead_ms
+                player.audio_set_mute(True)
+                player.set_rate(self.current_speed)
+                self.player_lengths.pop(pool_idx, None)
+                self.player_reported_time.pop(pool_idx, None)
+                self.player_files[pool_idx] = file
+                get_keyframe_index().request(file)
+                self.prefetch_pending.add(pool_idx)
+                prefetch["players"].append(player)
+                player.play()
+            except Exception as e:
+                continuous_log.warning("Prefetch failed for %s: %s", file, e)
+                self.prefetch_pending.discard(pool_idx)
+                prefetch["seamless"] = False
+        continuous_log.info("Prefetching %d cameras for next segment", len(files))
+
+    def handle_prefetch_ready(self, kind, pool_idx, stamp):
+        self.prefetch_pending.discard(pool_idx)
+        if kind == "vout":
+            try:
+                player_pool[pool_idx].set_pause(1)
+            except Exception as e:
+                continuous_log.warning("Standby player %d pause failed: %s", pool_idx, e)
+        else:
+            continuous_log.warning("Standby player %d failed to open", pool_idx)
+            self.prefetch["seamless"] = False
+
+        if not self.prefetch_pending:
+            self.prefetch["ready"] = True
+            continuous_log.info("Next segment ready after %.0f ms", (stamp - self.prefetch["started"]) * 1000)
+            if self.prefetch.get("switch_when_ready"):
+                self.switch_to_next_segment()
+
+    def switch_to_next_segment(self):
+        next_segment = self.prefetch
+        self.prefetch = None
+        self.prefetch_pending.clear()
+        if next_segment["start"] is None:
+            self.handle_playback_ended()
+            return
 
-    skip_in_progress = True
-    set_controls_enabled(False)
+        if not next_segment["seamless"]:
+            continuous_log.info("Reopening player window for next segment")
+            offset = self.timeline_offset + max(self.segment_duration_ms(), 0) // 1000
+            catalog = self.segment_catalog
+            self.stop_app()
+            play_videos(None, next_segment["files"], icon_path, catalog, next_segment["start"], offset, autoplay=True)
+            return
 
-    log(f"Skip requested: {seconds:+} seconds")
-    pause_all_players()
-    manual_offset += seconds
-    log(f"Manual offset updated to: {manual_offset:.2f}s")
+        self.timeline_offset += max(self.segment_duration_ms(), 0) // 1000
+        old_players = list(self.players)
+        for frame, standby_frame in zip(self.frames, self.standby_frames):
+            standby_frame.tkraise(frame)
+        self.frames[:], self.standby_frames[:] = self.standby_frames[:len(self.frames)], self.frames[:]
+        self.players[:] = next_segment["players"]
+
+        self.manual_offset = 0
+        self.playback_start_monotonic = now()
+        decoder_budget.acquire(self, len(self.players))
+        for player in self.players:
+            try:
+                player.audio_set_mute(False)
+                player.set_rate(self.current_speed)
+                player.set_pause(0)
+            except Exception as e:
+                continuous_log.warning("Failed to resume standby player: %s", e)
+        self.give_back(old_players)
+        for player in old_players:
+            self.tile_quality.pop(self.pool_index(player), None)
+            self.requality_deferred.discard(self.pool_index(player))
+
+        self.playing_players.clear()
+        self.ended_players.clear()
+        self.drift_monitor.reset()
+        self.last_timer_text = None
+        self.segment_start = next_segment["start"]
+        filename = os.path.basename(reference_file(next_segment["files"], next_segment["leads"]))
+        self.footage_start_time = parse_footage_start(filename)
+        display_name = filename[5:] if filename.startswith("CAM") else filename
+        self.window_base_title = f"Video Player — {display_name} loaded"
+        self.root.title(f"{self.window_base_title} — PLAYING")
+        continuous_log.info("Switched to next segment %s", display_name)
+        self.update_timer()
+
+    def segment_leads(self, start, files):
+        # cameras that started recording earlier skip ahead so every tile shows the same instant
+        if self.segment_catalog is None or start is None:
+            return {file: 0 for file in files}
+        # a camera with only minute precision in its name cannot be lined up, it plays from its start
+        offsets = {path: offset for path, offset in self.segment_catalog.members_at(start) if offset is not None}
+        latest = max((offsets[file] for file in files if file in offsets), default=0)
+        return {file: (latest - offsets[file]) * 1000 if file in offsets else 0 for file in files}
+
+    def segment_duration_ms(self):
+        if not self.players:
+            return -1
+        pool_idx = self.pool_index(self.players[0])
+        duration_ms = self.player_lengths.get(pool_idx, -1)
+        if duration_ms <= 0:
+            try:
+                duration_ms = self.players[0].get_length()
+            except:
+                return -1
+        if duration_ms <= 0:
+            return -1
+        return duration_ms - self.player_leads_ms.get(pool_idx, 0)
+
+    def get_drift_stats(self):
+        stats = {}
+        for pool_idx, summary in self.drift_monitor.summary().items():
+            camera = camera_of(self.player_files[pool_idx]) if pool_idx in self.player_files else str(pool_idx)
+            stats[camera] = summary
+        return stats
+
+    def media_options(self, level, cameras):
+        plan = drive_probe.caching_plan(self.drive_profile, cameras, self.current_speed)
+        if plan != self.caching_plan:
+            self.caching_plan = plan
+            profile = self.drive_profile
+            vlc_log.info("Caching %d ms%s for %d cameras at %sx on a %s drive (load %s)", plan["caching_ms"],
+                         f", {plan['read_ahead'] // 1024} KiB reads" if plan["read_ahead"] else "", cameras,
+                         self.current_speed, f"{profile['throughput_mb_s']} MB/s" if profile else "unprobed",
+                         plan["load"])
+            if plan["load"] is not None and plan["load"] >= 1:
+                vlc_log.warning("The drive is slower than %d cameras at %sx need, expect stalls",
+                                cameras, self.current_speed)
+        return QUALITY_OPTIONS[level] + tuple(drive_probe.media_options(plan))
+
+    def tile_level(self, tile):
+        if tile == self.focused_tile:
+            return 0
+        if self.focused_tile is not None:
+            return max(self.background_quality, 1)
+        return self.background_quality
+
+    def bind_tile(self, frame, tile):
+        frame.bind("<Button-1>", lambda e: self.on_tile_click(tile))
+
+    def on_tile_click(self, tile):
+        # clicking a tile focuses it, clicking the focused tile again gives every tile the same quality
+        if self.skip_in_progress or self.warmup_pending or tile >= len(self.players):
+            return
+        self.focused_tile = None if tile == self.focused_tile else tile
+        gui_log.info("Focused tile: %s", "none" if self.focused_tile is None else
+                     camera_of(self.player_files.get(self.pool_index(self.players[tile]), "?")))
+        self.apply_tile_qualities()
+
+    def apply_tile_qualities(self):
+        started = now()
+        for tile in range(len(self.players)):
+            self.set_tile_quality(tile, self.tile_level(tile))
+        metrics.observe("decode.requality_ms", (now() - started) * 1000)
+        self.quality_changed_at = now()
+        self.update_decode_label()
+
+    def set_tile_quality(self, tile, level):
+        # decoder options only apply when media is opened, so the tile reopens its file at the current position
+        player = self.players[tile]
+        pool_idx = self.pool_index(player)
+        if self.tile_quality.get(pool_idx, 0) == level or pool_idx not in self.player_files:
+            return
+        self.tile_quality[pool_idx] = level
+        if self.playback_start_monotonic == 0:
+            # reopening would start a paused tile, so the new level waits for play
+            self.requality_deferred.add(pool_idx)
+            return
+        if self.reopen_tile(tile):
+            player.play()
 
-    target_time_ms = max(0, int(manual_offset * 1000))
-    for idx, player in enumerate(players):
+    def reopen_tile(self, tile):
+        player = self.players[tile]
+        pool_idx = self.pool_index(player)
+        level = self.tile_quality.get(pool_idx, 0)
+        position_ms = int(self.current_position() * 1000) + self.player_leads_ms.get(pool_idx, 0)
         try:
-            duration = player.get_length()
-            seek_time = min(target_time_ms, duration)
-            log(f"Player {idx}: seeking to {seek_time} (duration {duration})")
-
-            for attempt in range(2):
-                player.set_time(seek_time)
-                actual = player.get_time()
-                if actual < 0:
-                    actual = 0
-                if abs(actual - seek_time) <= 250:
-                    break
-                log(f"Player {idx}: seek diff {abs(actual - seek_time)}ms, retrying")
-                time.sleep(0.1)
+            media = open_media(get_vlc_instance(), self.player_files[pool_idx], position_ms,
+                               self.media_options(level, len(self.players)))
+            player.set_media(media)
+            media.release()
+            player.set_rate(self.current_speed)
+            self.player_reported_time.pop(pool_idx, None)
+            self.requality_pending.add(pool_idx)
+            playback_log.debug("Tile %d decoding at %s from %dms", tile, QUALITY_NAMES[level], position_ms)
+            return True
         except Exception as e:
-            log(f"[WARNING] Player {idx} skip failed: {e}")
+            self.requality_pending.discard(pool_idx)
+            playback_log.warning("Tile %d quality change failed: %s", tile, e)
+            return False
 
-    playback_start_monotonic = 0
-    update_timer()
+    def update_decode_label(self, load=None):
+        if self.decode_label is None:
+            return
+        if self.focused_tile is not None and self.focused_tile < len(self.players):
+            camera = camera_of(self.player_files.get(self.pool_index(self.players[self.focused_tile]), "?"))
+            text = f"Decode: {camera} full, others {QUALITY_NAMES[self.tile_level(-1)]}"
+        else:
+            text = f"Decode: all {QUALITY_NAMES[self.background_quality]}"
+        if load is not None:
+            text += f" — CPU {load * 100:.0f}%"
+        self.decode_label.config(text=text)
 
-    def enforce_pause(attempts=6):
-        if attempts <= 0:
-            log("[FORCED PAUSE] Max attempts reached — giving up.")
+    def check_decode_load(self):
+        if self.closed:
             return
+        sample = process_cpu_sample()
+        load = cpu_load(self.cpu_sample, sample) if self.cpu_sample else None
+        self.cpu_sample = sample
+        busy = (self.skip_in_progress or self.warmup_pending or self.requality_pending
+                or self.speed_warmup_active or now() - self.quality_changed_at < QUALITY_SETTLE_SECONDS)
+        if load is not None and self.playback_start_monotonic > 0 and not busy:
+            metrics.observe("decode.cpu_percent", load * 100)
+            level = self.background_quality
+            if load > DECODE_CPU_TARGET:
+                self.cpu_calm_checks = 0
+                level = min(level + 1, len(QUALITY_OPTIONS) - 1)
+            elif load < DECODE_CPU_TARGET - DECODE_CPU_HEADROOM:
+                self.cpu_calm_checks += 1
+                if self.cpu_calm_checks >= DECODE_RESTORE_CHECKS:
+                    self.cpu_calm_checks = 0
+                    level = max(level - 1, 0)
+            else:
+                self.cpu_calm_checks = 0
+            if level != self.background_quality:
+                playback_log.info("CPU at %.0f%% of a %.0f%% target, background tiles now decode %s",
+                                  load * 100, DECODE_CPU_TARGET * 100, QUALITY_NAMES[level])
+                self.background_quality = level
+                self.apply_tile_qualities()
+        if load is not None:
+            self.update_decode_label(load)
 
-        still_playing = False
-        for idx, player in enumerate(players):
-            try:
-                state = player.get_state()
-                if state == vlc.State.Playing:
-                    player.set_pause(True)
-                    log(f"[FORCED PAUSE] Player {idx} still playing — re-paused (attempts left: {attempts - 1})")
-                    still_playing = True
-                else:
-                    log(f"Player {idx} state: {state}")
-            except Exception as e:
-                log(f"Error enforcing pause on player {idx}: {e}")
+        try:
+            if self.root.winfo_exists():
+                self.root.after(DECODE_CHECK_INTERVAL_MS, self.check_decode_load)
+        except tk.TclError:
+            pass
 
-        if still_playing:
-            root.after(200, lambda: enforce_pause(attempts - 1))
+    def check_sync(self):
+        if self.closed:
+            return
+        if (self.playback_start_monotonic > 0 and not self.skip_in_progress
+                and now() - self.playback_start_monotonic > SYNC_GRACE_SECONDS):
+            master_ms = self.current_position() * 1000
+            for player in self.players:
+                pool_idx = self.pool_index(player)
+                expected_ms = master_ms + self.player_leads_ms.get(pool_idx, 0)
+                reported = self.player_reported_time.get(pool_idx)
+                if (reported is None or reported[1] < self.playback_start_monotonic
+                        or pool_idx not in self.playing_players):
+                    continue
+                time_ms, stamp = reported
+                drift_ms = time_ms + (now() - stamp) * self.current_speed * 1000 - expected_ms
+                action, rate = self.drift_monitor.correction(pool_idx, drift_ms, self.current_speed)
+                metrics.observe("sync.drift_ms", abs(drift_ms), camera_of(self.player_files.get(pool_idx, "?")))
+                try:
+                    if action == "resync":
+                        sync_log.info("Player %d drifted %+.0fms — resyncing", pool_idx, drift_ms)
+                        player.set_rate(rate)
+                        player.set_time(int(expected_ms))
+                    elif action == "rate":
+                        player.set_rate(rate)
+                except Exception as e:
+                    sync_log.warning("Correction failed for player %d: %s", pool_idx, e)
+
+            worst = self.drift_monitor.worst_drift_ms()
+            if self.sync_label is not None and worst is not None:
+                self.sync_label.config(text=f"Sync: max drift {worst:.0f} ms")
+
+        try:
+            if self.root.winfo_exists():
+                self.root.after(SYNC_INTERVAL_MS, self.check_sync)
+        except tk.TclError:
+            pass
 
-    root.after(300, lambda: enforce_pause(attempts=6))
+    def current_position(self):
+        if self.playback_start_monotonic > 0:
+            return self.manual_offset + (now() - self.playback_start_monotonic) * self.current_speed
+        return self.manual_offset
 
-    def finish_skip():
-        global skip_in_progress
-        skip_in_progress = False
-        set_controls_enabled(True)
-        log("Skip complete — controls re-enabled")
+    def hold_all_players(self):
+        self.manual_offset = self.current_position()
+        self.playback_start_monotonic = 0
+        for idx, player in enumerate(self.players):
+            try:
+                player.set_pause(1)
+            except Exception as e:
+                seek_log.warning("Player %d pause failed: %s", idx, e)
+        decoder_budget.release(self)
+
+    def request_seek(self, target_seconds):
+        duration_ms = self.segment_duration_ms()
+        target_seconds = max(0, target_seconds)
+        if duration_ms > 0:
+            target_seconds = min(target_seconds, duration_ms / 1000)
+
+        self.manual_offset = target_seconds
+        self.seek_target_ms = int(target_seconds * 1000)
+        self.update_timer()
+
+        # rapid requests only move the target, the seek in flight picks it up when it lands
+        if self.skip_in_progress:
+            seek_log.debug("Seek coalesced — new target %dms", self.seek_target_ms)
+            return
 
-    root.after(1600, finish_skip)
+        self.skip_in_progress = True
+        self.set_controls_enabled(False)
+        self.issue_seek()
+
+    def issue_seek(self):
+        self.seek_generation += 1
+        self.seek_inflight_ms = self.seek_target_ms
+        self.seek_started = now()
+        self.seek_pending.clear()
+
+        for idx, player in enumerate(self.players):
+            pool_idx = self.pool_index(player)
+            duration = self.player_lengths.get(pool_idx, -1)
+            seek_time = self.seek_inflight_ms + self.player_leads_ms.get(pool_idx, 0)
+            if duration > 0:
+                seek_time = min(seek_time, duration)
+            try:
+                player.set_time(seek_time)
+                self.seek_pending[pool_idx] = seek_time
+            except Exception as e:
+                seek_log.warning("Player %d seek failed: %s", idx, e)
 
-def skip_to_time(target_seconds):
-    global skip_in_progress, manual_offset, playback_start_monotonic
+        seek_log.debug("Seeking %d players to %dms", len(self.seek_pending), self.seek_inflight_ms)
+        if not self.seek_pending:
+            self.finish_seek()
+            return
 
-    if skip_in_progress:
-        log("Skip-to-time ignored — skip already in progress")
-        return
+        generation = self.seek_generation
+        self.root.after(SEEK_POLL_INTERVAL_MS, lambda: self.poll_seek(generation))
 
-    skip_in_progress = True
-    set_controls_enabled(False)
+    def player_keyframes(self, pool_idx):
+        if pool_idx not in self.player_files:
+            return None
+        return get_keyframe_index().get(self.player_files[pool_idx])
 
-    log(f"Skip-to-time requested: {target_seconds:.2f} seconds")
-    pause_all_players()
+    def check_seek_landed(self, pool_idx, time_ms):
+        target = self.seek_pending.get(pool_idx)
+        if target is None or time_ms is None:
+            return
+        time_ms = max(time_ms, 0)
+        if abs(time_ms - target) > SEEK_TOLERANCE_MS:
+            # landing on the keyframe before the target is where a fast seek ends up, don't retry it
+            table = self.player_keyframes(pool_idx)
+            keyframe = keyframes.keyframe_before(table, target) if table else None
+            if keyframe is None or abs(time_ms - keyframe) > SEEK_TOLERANCE_MS:
+                return
+        del self.seek_pending[pool_idx]
+        metrics.observe("seek.latency_ms", (now() - self.seek_started) * 1000,
+                        camera_of(self.player_files.get(pool_idx, "?")))
+        seek_log.debug("Player %d landed at %dms after %.0f ms", pool_idx, time_ms, (now() - self.seek_started) * 1000)
+        if not self.seek_pending:
+            self.finish_seek()
+
+    def poll_seek(self, generation, retried=False):
+        # fallback for players that don't emit a time change while paused
+        if self.closed or generation != self.seek_generation or not self.seek_pending:
+            return
+        for pool_idx in list(self.seek_pending):
+            try:
+                self.check_seek_landed(pool_idx, player_pool[pool_idx].get_time())
+            except Exception as e:
+                seek_log.warning("Error reading time from player %d: %s", pool_idx, e)
+        if generation != self.seek_generation or not self.seek_pending:
+            return
 
-    manual_offset = target_seconds
-    target_time_ms = max(0, int(manual_offset * 1000))
-    log(f"Manual offset set to: {manual_offset:.2f}s")
+        if (now() - self.seek_started) * 1000 < SEEK_TIMEOUT_MS:
+            self.root.after(SEEK_POLL_INTERVAL_MS, lambda: self.poll_seek(generation, retried))
+        elif not retried:
+            seek_log.info("Players %s missed the seek target, retrying once", sorted(self.seek_pending))
+            for pool_idx, seek_time in self.seek_pending.items():
+                try:
+                    player_pool[pool_idx].set_time(seek_time)
+                except Exception as e:
+                    seek_log.warning("Player %d seek retry failed: %s", pool_idx, e)
+            self.root.after(SEEK_POLL_INTERVAL_MS, lambda: self.poll_seek(generation, True))
+        else:
+            seek_log.warning("Giving up on seek for players %s", sorted(self.seek_pending))
+            self.seek_pending.clear()
+            self.finish_seek()
 
-    for idx, player in enumerate(players):
-        try:
-            duration = player.get_length()
-            seek_time = min(target_time_ms, duration)
-            log(f"Player {idx}: seeking to {seek_time}ms (duration {duration})")
+    def finish_seek(self):
+        if self.seek_target_ms != self.seek_inflight_ms:
+            self.issue_seek()
+            return
 
-            for attempt in range(2):
-                player.set_time(seek_time)
-                actual = player.get_time()
-                if actual < 0:
-                    actual = 0
-                if abs(actual - seek_time) <= 250:
-                    break
-                log(f"Player {idx}: seek diff {abs(actual - seek_time)}ms, retrying")
-                time.sleep(0.1)
-        except Exception as e:
-            log(f"[WARNING] Player {idx} skip-to-time failed: {e}")
+        self.skip_in_progress = False
+        metrics.observe("seek.total_ms", (now() - self.seek_started) * 1000)
+        self.goto_button.config(text="Go", state="normal")
+        self.set_controls_enabled(True)
+        self.update_timer()
+        seek_log.info("Seek complete after %.0f ms — controls re-enabled", (now() - self.seek_started) * 1000)
 
-    playback_start_monotonic = 0
-    update_timer()
+    def step_keyframe(self, direction):
+        if not self.players:
+            return
+        lead_idx = self.pool_index(self.players[0])
+        table = self.player_keyframes(lead_idx)
+        if not table:
+            seek_log.info("Keyframe step ignored — index not ready")
+            return
+        self.hold_all_players()
+        lead_ms = self.player_leads_ms.get(lead_idx, 0)
+        current_ms = int(self.manual_offset * 1000) + lead_ms
+        if direction > 0:
+            target = keyframes.keyframe_after(table, current_ms + SEEK_TOLERANCE_MS)
+        else:
+            target = keyframes.keyframe_before(table, current_ms - SEEK_TOLERANCE_MS)
+        if target is None:
+            return
+        seek_log.debug("Keyframe step %+d to %dms", direction, target)
+        self.request_seek((target - lead_ms) / 1000)
+
+    def skip_all_players(self, seconds):
+        seek_log.debug("Skip requested: %+d seconds", seconds)
+        self.hold_all_players()
+        self.request_seek(self.manual_offset + seconds)
+
+    def skip_to_time(self, target_seconds):
+        seek_log.debug("Skip-to-time requested: %.2f seconds", target_seconds)
+        self.hold_all_players()
+        self.request_seek(target_seconds)
+
+    def seek_bar_seconds(self, x):
+        duration_ms = self.segment_duration_ms()
+        width = self.seek_bar.winfo_width()
+        if duration_ms <= 0 or width <= 1:
+            return None
+        return max(0.0, min(1.0, x / width)) * duration_ms / 1000
+
+    def draw_seek_bar(self, seconds):
+        if self.seek_bar is None:
+            return
+        duration_ms = self.segment_duration_ms()
+        width, height = self.seek_bar.winfo_width(), self.seek_bar.winfo_height()
+        x = width * min(1.0, seconds * 1000 / duration_ms) if duration_ms > 0 else 0
+        self.seek_bar.coords("played", 0, 0, x, height)
+        self.seek_bar.coords("marker", x - 2, 0, x + 2, height)
+
+    def preview_image(self, seconds):
+        # frame from the lead camera's sprite sheet, None until the sheet has been built
+        cache = get_sprite_cache()
+        if cache is None or not self.players:
+            return None
+        pool_idx = self.pool_index(self.players[0])
+        path = self.player_files.get(pool_idx)
+        if path is None:
+            return None
+        sheet = cache.get(path)
+        if sheet is None:
+            cache.request(path)
+            return None
+        i = sheet.frame_index(seconds + self.player_leads_ms.get(pool_idx, 0) / 1000)
+        key = (path, i)
+        if key not in self.seek_preview_images:
+            ppm = sheet.frame_ppm(i)
+            self.seek_preview_images[key] = tk.PhotoImage(data=ppm, format="PPM") if ppm else None
+        return self.seek_preview_images[key]
+
+    def show_seek_preview(self, event, seconds):
+        if self.seek_preview is None or not self.seek_preview.winfo_exists():
+            # a separate window, the video frames are native windows and would cover a plain widget
+            self.seek_preview = tk.Toplevel(self.root)
+            self.seek_preview.overrideredirect(True)
+            self.seek_preview.attributes("-topmost", True)
+            self.seek_preview_label = tk.Label(self.seek_preview, bg="black", fg="white", compound="top")
+            self.seek_preview_label.pack()
+
+        minutes, secs = divmod(int(seconds), 60)
+        text = f"{minutes:02}:{secs:02}  ({format_clock(self.footage_start_time + int(seconds))})"
+        image = self.preview_image(seconds)
+        self.seek_preview_label.config(text=text, image=image or "")
+
+        self.seek_preview.update_idletasks()
+        width, height = self.seek_preview.winfo_reqwidth(), self.seek_preview.winfo_reqheight()
+        x = event.x_root - width // 2
+        y = self.seek_bar.winfo_rooty() - height - 6
+        self.seek_preview.geometry(f"+{x}+{y}")
+        self.seek_preview.deiconify()
+
+    def hide_seek_preview(self):
+        if self.seek_preview is not None and self.seek_preview.winfo_exists():
+            self.seek_preview.withdraw()
+
+    def on_seek_bar_motion(self, event):
+        seconds = self.seek_bar_seconds(event.x)
+        if seconds is None:
+            return
+        if self.seek_bar_dragging:
+            self.draw_seek_bar(seconds)
+        self.show_seek_preview(event, seconds)
 
-    def enforce_pause(attempts=6):
-        if attempts <= 0:
-            log("[FORCED PAUSE] Max attempts reached — giving up.")
+    def on_seek_bar_press(self, event):
+        if self.seek_bar.cget("state") == "disabled" and not self.skip_in_progress:
             return
+        self.seek_bar_dragging = True
+        self.on_seek_bar_motion(event)
 
-        still_playing = False
-        for idx, player in enumerate(players):
+    def on_seek_bar_release(self, event):
+        if not self.seek_bar_dragging:
+            return
+        self.seek_bar_dragging = False
+        self.hide_seek_preview()
+        seconds = self.seek_bar_seconds(event.x)
+        if seconds is not None:
+            self.skip_to_time(seconds)
+
+    def on_seek_bar_leave(self, event):
+        if not self.seek_bar_dragging:
+            self.hide_seek_preview()
+
+    def set_controls_enabled(self, enabled):
+        state = "normal" if enabled else "disabled"
+        for widget in self.control_widgets:
             try:
-                state = player.get_state()
-                if state == vlc.State.Playing:
-                    player.set_pause(True)
-                    log(f"[FORCED PAUSE] Player {idx} still playing — re-paused (attempts left: {attempts - 1})")
-                    still_playing = True
-                else:
-                    log(f"Player {idx} state: {state}")
-            except Exception as e:
-                log(f"Error enforcing pause on player {idx}: {e}")
+                widget.config(state=state)
+            except:
+                pass
 
-        if still_playing:
-            root.after(200, lambda: enforce_pause(attempts - 1))
+    def skip_back_configurable(self):
+        self.skip_all_players(-self.skip_configurable_seconds)
 
-    root.after(300, lambda: enforce_pause(attempts=6))
+    def skip_forward_configurable(self):
+        self.skip_all_players(self.skip_configurable_seconds)
 
-    def finish_skip_to_time():
-        global skip_in_progress
-        skip_in_progress = False
-        goto_button.config(text="Go", state="normal")
-        set_controls_enabled(True)
-        log("Skip-to-time complete — controls re-enabled")
+    def on_closing(self):
+        gui_log.debug("on_closing called")
+        if self.closed:
+            return
+        self.closed = True
+        if self.drift_monitor.stats:
+            sync_log.info("Sync stats: %s", self.get_drift_stats())
+        # players go back to the pool, only the media is dropped
+        self.give_back(self.leased)
+        self.players.clear()
+        self.prefetch = None
+        decoder_budget.release(self)
+        if self in sessions:
+            sessions.remove(self)
+        try:
+            if self.root is not None and self.root.winfo_exists():
+                self.root.destroy()
+        except Exception as e:
+            gui_log.warning("Error destroying window: %s", e)
 
-    root.after(1600, finish_skip_to_time)
+    def stop_app(self):
+        self.manual_offset = 0
+        self.playback_start_monotonic = 0
+        self.on_closing()
 
-def set_controls_enabled(enabled):
-    state = "normal" if enabled else "disabled"
-    for widget in control_widgets:
-        try:
-            widget.config(state=state)
-        except:
-            pass
+    def create_gui(self, files, icon_path=None):
+        root = self.root = tk.Toplevel()
+        root.title("Video Player")
 
-def skip_back_configurable():
-    skip_all_players(-skip_configurable_seconds)
+        def maximize_window():
+            try:
+                root.state("zoomed")
+            except:
+                try:
+                    root.attributes("-zoomed", True)
+                except:
+                    root.geometry(f"{root.winfo_screenwidth()}x{root.winfo_screenheight()}+0+0")
 
-def skip_forward_configurable():
-    skip_all_players(skip_configurable_seconds)
+        root.after(0, maximize_window)
 
-def on_closing():
-    print("on_closing called")
-    for player in players:
         try:
-            player.stop()
-            player.release()
+            if icon_path:
+                if icon_path.endswith(".ico") and os.name == "nt":
+                    root.iconbitmap(icon_path)
+                else:
+                    img = tk.PhotoImage(file=icon_path)
+                    root.iconphoto(True, img)
         except Exception as e:
-            print(f"Error stopping player: {e}")
-    players.clear()
-    try:
-        if root.winfo_exists():
-            root.destroy()
-    except Exception as e:
-        print(f"Error destroying window: {e}")
+            gui_log.warning("Failed to set video player icon: %s", e)
+
+        root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        root.bind("<Return>", lambda e: self.toggle_play_pause())
+        root.bind("<F11>", lambda e: root.attributes("-fullscreen", not root.attributes("-fullscreen")))
+        root.bind("<Left>", lambda e: self.skip_back_configurable())
+        root.bind("<Right>", lambda e: self.skip_forward_configurable())
+        root.bind("<comma>", lambda e: self.step_keyframe(-1))
+        root.bind("<period>", lambda e: self.step_keyframe(1))
+        root.bind("<Control-D>", lambda e: applog.dump())
+        metrics.watch_tk_lag(root, "tk.player_lag_ms")
+
+        num_videos = len(files)
+        cols = int(num_videos ** 0.5 + 0.5)
+        rows = (num_videos + cols - 1) // cols
+
+        for r in range(rows):
+            root.grid_rowconfigure(r, weight=10)
+        root.grid_rowconfigure(rows, weight=1)
+        for c in range(cols):
+            root.grid_columnconfigure(c, weight=1)
+
+        for idx in range(num_videos):
+            row, col = divmod(idx, cols)
+            frame = tk.Frame(root, bg="black")
+            frame.grid(row=row, column=col, sticky="nsew")
+            frame.grid_propagate(False)
+            self.bind_tile(frame, idx)
+            self.frames.append(frame)
+
+        overlay_frames = []
+        for idx, frame in enumerate(self.frames):
+            overlay = tk.Frame(root, bg="black")
+            overlay_frames.append(overlay)
+
+            def place_overlay(event=None, overlay=overlay, frame=frame):
+                frame.update_idletasks()
+                x = frame.winfo_rootx() - root.winfo_rootx()
+                y = frame.winfo_rooty() - root.winfo_rooty()
+                w = frame.winfo_width()
+                h = frame.winfo_height()
+                box_width = int(w * 0.4)
+                box_height = int(h * 0.1)
+                box_x = x + w - box_width - 10
+                box_y = y + h - box_height - 10
+                overlay.place(x=box_x, y=box_y, width=box_width, height=box_height)
+
+            frame.bind("<Configure>", place_overlay)
+            root.after(500, place_overlay)
+
+        control_frame = tk.Frame(root)
+        control_frame.grid(row=rows, column=0, columnspan=cols, sticky="nsew")
+        control_frame.grid_propagate(False)
+        control_frame.configure(height=130)
+
+        btn_playpause = tk.Button(control_frame, text="Play/Pause", command=self.toggle_play_pause)
+        btn_playpause.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.control_widgets.append(btn_playpause)
+
+        btn_stop = tk.Button(control_frame, text="Stop", command=self.stop_app)
+        btn_stop.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        self.control_widgets.append(btn_stop)
+
+        skip_frame = tk.Frame(control_frame)
+        skip_frame.grid(row=1, column=0, columnspan=4, sticky="w", padx=5, pady=5)
+
+        btn_back = tk.Button(skip_frame, text="<<", command=self.skip_back_configurable)
+        btn_back.pack(side="left", padx=(2, 5))
+        self.control_widgets.append(btn_back)
+
+        def update_skip_value(selected):
+            try:
+                self.skip_configurable_seconds = int(selected)
+            except ValueError:
+                pass
 
-def stop_app():
-    global manual_offset, playback_start_monotonic
-    manual_offset = 0
-    playback_start_monotonic = 0
-    on_closing()
+        skip_options = ["1", "5", "10", "15", "30", "60"]
+        skip_dropdown = ttk.Combobox(skip_frame, values=skip_options, width=4, state="readonly")
+        skip_dropdown.set(str(self.skip_configurable_seconds))
+        skip_dropdown.pack(side="left", padx=2)
+        skip_dropdown.bind("<<ComboboxSelected>>", lambda e: update_skip_value(skip_dropdown.get()))
+        self.control_widgets.append(skip_dropdown)
 
-def create_gui(files, icon_path=None):
-    global root, frames, timer_label, overlay_label
-    global current_speed, speed_buttons, window_base_title
-    global skip_configurable_seconds, control_widgets
+        btn_forward = tk.Button(skip_frame, text=">>", command=self.skip_forward_configurable)
+        btn_forward.pack(side="left", padx=(5, 10))
+        self.control_widgets.append(btn_forward)
 
-    root = tk.Toplevel()
-    root.title("Video Player")
+        tk.Label(skip_frame, text="Go to (MM:SS):").pack(side="left", padx=(0, 2))
 
-    def maximize_window():
-        try:
-            root.state("zoomed")
-        except:
-            try:
-                root.attributes("-zoomed", True)
-            except:
-                root.geometry(f"{root.winfo_screenwidth()}x{root.winfo_screenheight()}+0+0")
+        goto_entry = tk.Entry(skip_frame, width=6, foreground="grey")
+        goto_entry.insert(0, "MM:SS")
+        goto_entry.pack(side="left", padx=2)
 
-    root.after(0, maximize_window)
+        def clear_placeholder(event):
+            if goto_entry.get() == "MM:SS":
+                goto_entry.delete(0, tk.END)
+                goto_entry.config(foreground="black")
 
-    try:
-        if icon_path:
-            if icon_path.endswith(".ico") and os.name == "nt":
-                root.iconbitmap(icon_path)
-            else:
-                img = tk.PhotoImage(file=icon_path)
-                root.iconphoto(True, img)
-    except Exception as e:
-        print(f"Failed to set video player icon: {e}")
-
-    root.protocol("WM_DELETE_WINDOW", on_closing)
-    root.bind("<Return>", lambda e: toggle_play_pause())
-    root.bind("<F11>", lambda e: root.attributes("-fullscreen", not root.attributes("-fullscreen")))
-    root.bind("<Left>", lambda e: skip_back_configurable())
-    root.bind("<Right>", lambda e: skip_forward_configurable())
-
-    num_videos = len(files)
-    cols = int(num_videos ** 0.5 + 0.5)
-    rows = (num_videos + cols - 1) // cols
-
-    for r in range(rows):
-        root.grid_rowconfigure(r, weight=10)
-    root.grid_rowconfigure(rows, weight=1)
-    for c in range(cols):
-        root.grid_columnconfigure(c, weight=1)
-
-    frames.clear()
-    for idx in range(num_videos):
-        row, col = divmod(idx, cols)
-        frame = tk.Frame(root, bg="black")
-        frame.grid(row=row, column=col, sticky="nsew")
-        frame.grid_propagate(False)
-        frames.append(frame)
-
-    overlay_frames = []
-    for idx, frame in enumerate(frames):
-        overlay = tk.Frame(root, bg="black")
-        overlay_frames.append(overlay)
-
-        def place_overlay(event=None, overlay=overlay, frame=frame):
-            frame.update_idletasks()
-            x = frame.winfo_rootx() - root.winfo_rootx()
-            y = frame.winfo_rooty() - root.winfo_rooty()
-            w = frame.winfo_width()
-            h = frame.winfo_height()
-            box_width = int(w * 0.4)
-            box_height = int(h * 0.1)
-            box_x = x + w - box_width - 10
-            box_y = y + h - box_height - 10
-            overlay.place(x=box_x, y=box_y, width=box_width, height=box_height)
-
-        frame.bind("<Configure>", place_overlay)
-        root.after(500, place_overlay)
-
-    control_frame = tk.Frame(root)
-    control_frame.grid(row=rows, column=0, columnspan=cols, sticky="nsew")
-    control_frame.grid_propagate(False)
-    control_frame.configure(height=100)
-
-    btn_playpause = tk.Button(control_frame, text="Play/Pause", command=toggle_play_pause)
-    btn_playpause.grid(row=0, column=0, padx=5, pady=5, sticky="w")
-    control_widgets.append(btn_playpause)
-
-    btn_stop = tk.Button(control_frame, text="Stop", command=stop_app)
-    btn_stop.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-    control_widgets.append(btn_stop)
-
-    skip_frame = tk.Frame(control_frame)
-    skip_frame.grid(row=1, column=0, columnspan=4, sticky="w", padx=5, pady=5)
-
-    btn_back = tk.Button(skip_frame, text="<<", command=skip_back_configurable)
-    btn_back.pack(side="left", padx=(2, 5))
-    control_widgets.append(btn_back)
-
-    def update_skip_value(selected):
-        global skip_configurable_seconds
-        try:
-            skip_configurable_seconds = int(selected)
-        except ValueError:
-            pass
+        def restore_placeholder(event):
+            if not goto_entry.get():
+                goto_entry.insert(0, "MM:SS")
+                goto_entry.config(foreground="grey")
 
-    skip_options = ["1", "5", "10", "15", "30", "60"]
-    skip_dropdown = ttk.Combobox(skip_frame, values=skip_options, width=4, state="readonly")
-    skip_dropdown.set(str(skip_configurable_seconds))
-    skip_dropdown.pack(side="left", padx=2)
-    skip_dropdown.bind("<<ComboboxSelected>>", lambda e: update_skip_value(skip_dropdown.get()))
-    control_widgets.append(skip_dropdown)
+        goto_entry.bind("<FocusIn>", clear_placeholder)
+        goto_entry.bind("<FocusOut>", restore_placeholder)
 
-    btn_forward = tk.Button(skip_frame, text=">>", command=skip_forward_configurable)
-    btn_forward.pack(side="left", padx=(5, 10))
-    control_widgets.append(btn_forward)
 
-    tk.Label(skip_frame, text="Go to (MM:SS):").pack(side="left", padx=(0, 2))
+        def on_goto():
 
-    goto_entry = tk.Entry(skip_frame, width=6, foreground="grey")
-    goto_entry.insert(0, "MM:SS")
-    goto_entry.pack(side="left", padx=2)
+            raw_input = goto_entry.get().strip().replace(":", "")
+            if raw_input.upper() == "MMSS" or raw_input == "":
+                gui_log.debug("Skip-to-time input empty or placeholder — skipping")
+                return
 
-    def clear_placeholder(event):
-        if goto_entry.get() == "MM:SS":
-            goto_entry.delete(0, tk.END)
-            goto_entry.config(foreground="black")
 
-    def restore_placeholder(event):
-        if not goto_entry.get():
-            goto_entry.insert(0, "MM:SS")
-            goto_entry.config(foreground="grey")
+            if self.skip_in_progress:
+                gui_log.debug("Skip-to-time already in progress — Go button disabled")
+                return
 
-    goto_entry.bind("<FocusIn>", clear_placeholder)
-    goto_entry.bind("<FocusOut>", restore_placeholder)
+            raw_input = goto_entry.get().strip().replace(":", "")
+            try:
+                if not raw_input.isdigit():
+                    raise ValueError
 
+                raw_input = raw_input.zfill(4)
+                minutes = int(raw_input[:-2])
+                seconds = int(raw_input[-2:])
 
-    def on_goto():
+                if not (0 <= minutes <= 10 and 0 <= seconds < 60):
+                    raise ValueError
 
-        raw_input = goto_entry.get().strip().replace(":", "")
-        if raw_input.upper() == "MMSS" or raw_input == "":
-            log("Skip-to-time input empty or placeholder — skipping")
-            return
+                total_seconds = minutes * 60 + seconds
 
+                formatted = f"{minutes:02}:{seconds:02}"
+                goto_entry.delete(0, tk.END)
+                goto_entry.insert(0, formatted)
 
-        if skip_in_progress:
-            log("Skip-to-time already in progress — Go button disabled")
-            return
+                self.goto_button.config(text="Skipping...", state="disabled")
+                self.set_controls_enabled(False)
+                self.skip_to_time(total_seconds)
 
-        raw_input = goto_entry.get().strip().replace(":", "")
-        try:
-            if not raw_input.isdigit():
-                raise ValueError
 
-            raw_input = raw_input.zfill(4)
-            minutes = int(raw_input[:-2])
-            seconds = int(raw_input[-2:])
+            except ValueError:
+                gui_log.warning("Invalid time format. Enter MMSS or MM:SS (max 10:00)")
 
-            if not (0 <= minutes <= 10 and 0 <= seconds < 60):
-                raise ValueError
+        self.goto_button = tk.Button(skip_frame, text="Go", command=on_goto)
+        self.goto_button.pack(side="left", padx=(2, 0))
+        self.control_widgets.append(self.goto_button)
 
-            total_seconds = minutes * 60 + seconds
+        btn_prev_key = tk.Button(skip_frame, text="|< Key", command=lambda: self.step_keyframe(-1))
+        btn_prev_key.pack(side="left", padx=(10, 2))
+        self.control_widgets.append(btn_prev_key)
 
-            formatted = f"{minutes:02}:{seconds:02}"
-            goto_entry.delete(0, tk.END)
-            goto_entry.insert(0, formatted)
+        btn_next_key = tk.Button(skip_frame, text="Key >|", command=lambda: self.step_keyframe(1))
+        btn_next_key.pack(side="left", padx=2)
+        self.control_widgets.append(btn_next_key)
 
-            goto_button.config(text="Skipping...", state="disabled")
-            set_controls_enabled(False)
-            skip_to_time(total_seconds)
 
 
-        except ValueError:
-            log("Invalid time format. Enter MMSS or MM:SS (max 10:00)")
-    
-    global goto_button
-    goto_button = tk.Button(skip_frame, text="Go", command=on_goto)
-    goto_button.pack(side="left", padx=(2, 0))
-    control_widgets.append(goto_button)
+        speed_frame = tk.Frame(control_frame)
+        speed_frame.grid(row=2, column=0, columnspan=4, sticky="w", padx=5, pady=5)
 
+        tk.Label(speed_frame, text="Speed:").pack(side="left", padx=5)
 
+        for rate in [0.25, 0.5, 1, 2]:
+            btn = tk.Button(speed_frame, text=f"{rate}x", command=lambda r=rate: self.set_speed(r))
+            btn.pack(side="left", padx=2)
+            self.speed_buttons.append((rate, btn))
+            self.control_widgets.append(btn)
 
-    speed_frame = tk.Frame(control_frame)
-    speed_frame.grid(row=2, column=0, columnspan=4, sticky="w", padx=5, pady=5)
+        self.update_speed_button_styles()
 
-    tk.Label(speed_frame, text="Speed:").pack(side="left", padx=5)
+        self.continuous_var = tk.BooleanVar(value=self.segment_catalog is not None)
+        continuous_check = tk.Checkbutton(speed_frame, text="Continuous", variable=self.continuous_var)
+        continuous_check.pack(side="left", padx=(15, 2))
+        if self.segment_catalog is None:
+            continuous_check.config(state="disabled")
 
-    speed_buttons.clear()
-    for rate in [0.25, 0.5, 1, 2]:
-        btn = tk.Button(speed_frame, text=f"{rate}x", command=lambda r=rate: set_speed(r))
-        btn.pack(side="left", padx=2)
-        speed_buttons.append((rate, btn))
-        control_widgets.append(btn)
+        seek_bar = self.seek_bar = tk.Canvas(control_frame, height=SEEK_BAR_HEIGHT, bg="#444444",
+                                             highlightthickness=0, cursor="hand2")
+        seek_bar.grid(row=3, column=0, columnspan=4, padx=5, pady=5, sticky="ew")
+        seek_bar.create_rectangle(0, 0, 0, SEEK_BAR_HEIGHT, fill="#3c8dde", width=0, tags="played")
+        seek_bar.create_rectangle(0, 0, 0, SEEK_BAR_HEIGHT, fill="white", width=0, tags="marker")
+        seek_bar.bind("<Motion>", self.on_seek_bar_motion)
+        seek_bar.bind("<ButtonPress-1>", self.on_seek_bar_press)
+        seek_bar.bind("<B1-Motion>", self.on_seek_bar_motion)
+        seek_bar.bind("<ButtonRelease-1>", self.on_seek_bar_release)
+        seek_bar.bind("<Leave>", self.on_seek_bar_leave)
+        self.control_widgets.append(seek_bar)
 
-    update_speed_button_styles()
+        control_frame.grid_columnconfigure(1, weight=1)
+        control_frame.grid_columnconfigure(2, weight=1)
 
-    control_frame.grid_columnconfigure(1, weight=1)
-    control_frame.grid_columnconfigure(2, weight=1)
+        self.timer_label = ttk.Label(control_frame, text="00:00 / 00:00   --:--:-- / --:--:--", justify="left", anchor="w")
+        self.timer_label.grid(row=5, column=0, padx=5, pady=5, sticky="w", columnspan=2)
 
-    timer_label = ttk.Label(control_frame, text="00:00 / 00:00   --:--:-- / --:--:--", justify="left", anchor="w")
-    timer_label.grid(row=5, column=0, padx=5, pady=5, sticky="w", columnspan=2)
+        self.overlay_label = ttk.Label(control_frame, text="Footage Time: --:--:--", font=("TkDefaultFont", 12, "bold"))
+        self.overlay_label.grid(row=5, column=3, padx=5, pady=5, sticky="e")
 
-    overlay_label = ttk.Label(control_frame, text="Footage Time: --:--:--", font=("TkDefaultFont", 12, "bold"))
-    overlay_label.grid(row=5, column=3, padx=5, pady=5, sticky="e")
+        self.sync_label = ttk.Label(control_frame, text="Sync: --", justify="left", anchor="w")
+        self.sync_label.grid(row=6, column=0, padx=5, pady=(0, 5), sticky="w", columnspan=2)
 
-    control_frame.grid_rowconfigure(5, weight=1)
+        self.decode_label = ttk.Label(control_frame, text="Decode: all full", justify="left", anchor="w")
+        self.decode_label.grid(row=6, column=3, padx=5, pady=(0, 5), sticky="e")
 
-    filename = os.path.basename(files[0])
-    display_name = filename[5:] if filename.startswith("CAM") else filename
-    window_base_title = f"Video Player — {display_name} loaded"
-    root.title(f"{window_base_title} — PAUSED")
+        control_frame.grid_rowconfigure(5, weight=1)
 
-    root.footage_start_time = 0
-    parts = filename.split("_")
-    if len(parts) >= 3:
-        time_str = parts[2].split(".")[0]
-        if time_str.isdigit():
-            try:
-                h = int(time_str[0:2])
-                m = int(time_str[2:4])
-                s = int(time_str[4:6]) if len(time_str) >= 6 else 0
-                root.footage_start_time = h * 3600 + m * 60 + s
-                print(f"[DEBUG] Parsed footage start time: {h:02}:{m:02}:{s:02}")
-            except Exception as e:
-                print(f"[WARNING] Failed to parse footage time: {e}")
+        filename = os.path.basename(files[0])
+        display_name = filename[5:] if filename.startswith("CAM") else filename
+        self.window_base_title = f"Video Player — {display_name} loaded"
+        root.title(f"{self.window_base_title} — PAUSED")
 
-    set_controls_enabled(False)
-    root.withdraw()
-    root.after(100, lambda: initialize_players(files))
-    update_timer()
-    watchdog_enforce_paused()
+        self.file_leads_ms = self.segment_leads(self.segment_start, files)
+        self.footage_start_time = parse_footage_start(os.path.basename(reference_file(files, self.file_leads_ms)))
 
+        self.set_controls_enabled(False)
+        root.withdraw()
+        root.after(100, lambda: self.initialize_players(files))
 
-def wait_for_playback_ready(player, tries_left=15):
-    try:
-        state = player.get_state()
-    except:
-        state = vlc.State.Error
+    def pump_player_events(self):
+        if self.closed:
+            return
+        while True:
+            try:
+                kind, pool_idx, stamp, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            self.handle_player_event(kind, pool_idx, stamp, value)
 
-    if state == vlc.State.Playing or tries_left <= 0:
         try:
-            player.pause()
-        except:
+            if self.root.winfo_exists():
+                self.root.after(EVENT_PUMP_INTERVAL_MS, self.pump_player_events)
+        except tk.TclError:
             pass
-        root.update()
-    else:
-        root.after(100, lambda: wait_for_playback_ready(player, tries_left - 1))
-
-def initialize_players(files, icon_path=None):
-    global players, manual_offset, playback_start_monotonic, current_speed
-    manual_offset = 0
-    playback_start_monotonic = 0
-    current_speed = 1.0
-    
-    for player in players:
+
+    def handle_player_event(self, kind, pool_idx, stamp, value):
+        if kind == "length":
+            self.player_lengths[pool_idx] = value
+        if pool_idx in self.prefetch_pending and kind in ("vout", "error"):
+            self.handle_prefetch_ready(kind, pool_idx, stamp)
+            return
+        if player_pool[pool_idx] not in self.players:
+            return
+        if pool_idx in self.requality_pending and kind in ("vout", "error"):
+            self.requality_pending.discard(pool_idx)
+            if kind == "error":
+                playback_log.warning("Player %d failed to reopen at the new quality", pool_idx)
+            elif self.playback_start_monotonic == 0:
+                try:
+                    player_pool[pool_idx].set_pause(1)
+                except Exception as e:
+                    playback_log.warning("Player %d pause failed: %s", pool_idx, e)
+
+        if kind == "playing":
+            self.playing_players.add(pool_idx)
+            self.ended_players.discard(pool_idx)
+            self.enforce_paused(pool_idx)
+        elif kind in ("paused", "stopped"):
+            self.playing_players.discard(pool_idx)
+        elif kind == "time":
+            self.player_reported_time[pool_idx] = (value, stamp)
+            if pool_idx in self.seek_pending:
+                self.check_seek_landed(pool_idx, value)
+            if player_pool[pool_idx] is self.players[0]:
+                self.update_timer()
+        elif kind == "ended":
+            self.playing_players.discard(pool_idx)
+            self.ended_players.add(pool_idx)
+            if len(self.ended_players) == len(self.players):
+                self.handle_playback_ended()
+
+        if pool_idx in self.warmup_pending and kind in ("vout", "error"):
+            self.warmup_pending.discard(pool_idx)
+            latency = stamp - self.warmup_started
+            if kind == "vout":
+                try:
+                    player_pool[pool_idx].set_pause(1)
+                except Exception as e:
+                    warmup_log.warning("Player %d pause failed: %s", pool_idx, e)
+                warmup_log.info("Player %d first frame after %.0f ms", pool_idx, latency * 1000)
+                metrics.observe("player.ttff_ms", latency * 1000, camera_of(self.player_files.get(pool_idx, "?")))
+            else:
+                warmup_log.warning("Player %d failed to open after %.0f ms", pool_idx, latency * 1000)
+
+            if not self.warmup_pending:
+                self.finish_warmup()
+
+    def finish_warmup(self):
+        if self.closed:
+            return
+        if self.warmup_pending:
+            warmup_log.warning("Timed out waiting for players %s", sorted(self.warmup_pending))
+            for pool_idx in self.warmup_pending:
+                try:
+                    player_pool[pool_idx].set_pause(1)
+                except Exception:
+                    pass
+            self.warmup_pending.clear()
+
+        if self.loading_popup is None:
+            return
+        warmup_log.info("All players ready after %.0f ms", (now() - self.warmup_started) * 1000)
+        metrics.observe("player.all_ready_ms", (now() - self.warmup_started) * 1000)
         try:
-            player.release()
-        except:
+            self.loading_popup.destroy()
+        except tk.TclError:
             pass
-    players.clear()
-
-    loading_popup = tk.Toplevel(root)
-    loading_popup.title("Loading Videos...")
-    loading_popup.geometry("300x100")
-    tk.Label(loading_popup, text="Loading videos...\nPlease wait.").pack(expand=True)
-    loading_popup.update()
-
-    instances = [vlc.Instance(
-        "--file-caching=1000",
-        "--network-caching=1000",
-        "--avcodec-hw=none",
-        "--no-video-title-show",
-        "--quiet"
-    ) for _ in files]
-
-    for instance, file, frame in zip(instances, files, frames):
+        self.loading_popup = None
+        self.root.deiconify()
+        self.root.focus_force()
+        self.set_controls_enabled(True)
+        if self.autoplay_after_warmup:
+            self.play_all_players()
+            self.root.title(f"{self.window_base_title} — PLAYING")
+        else:
+            decoder_budget.release(self)
+
+    def initialize_players(self, files):
+        if self.closed:
+            return
+        self.loading_popup = tk.Toplevel(self.root)
+        self.loading_popup.title("Loading Videos...")
+        self.loading_popup.geometry("300x100")
+        tk.Label(self.loading_popup, text="Loading videos...\nPlease wait.").pack(expand=True)
+        self.loading_popup.update()
         try:
-            print(f"Initializing player for {file}")
-            player = instance.media_player_new()
-            media = instance.media_new(file)
-            player.set_media(media)
-            
-            window_id = frame.winfo_id()
+            get_vlc_instance()
+        except player_backend.BackendUnavailable as e:
+            vlc_log.error("Player backend unavailable: %s", e)
+            self.loading_popup.destroy()
+            self.loading_popup = None
+            messagebox.showerror("Video Player", f"Could not start video playback:\n{e}")
+            self.on_closing()
+            return
+        self.start_players(files)
+
+    def start_players(self, files):
+        self.manual_offset = 0
+        self.playback_start_monotonic = 0
+        self.current_speed = 1.0
+
+        self.give_back(self.leased)
+        self.players.clear()
+
+        # drop anything the previous players reported
+        while not self.events.empty():
+            self.events.get_nowait()
+        self.warmup_pending.clear()
+        self.playing_players.clear()
+        self.ended_players.clear()
+        self.player_lengths.clear()
+        self.player_reported_time.clear()
+        self.drift_monitor.reset()
+        self.player_files.clear()
+        self.player_leads_ms.clear()
+        self.prefetch_pending.clear()
+        self.prefetch = None
+        self.last_timer_text = None
+        self.tile_quality.clear()
+        self.requality_deferred.clear()
+        self.requality_pending.clear()
+        self.caching_plan = None
+
+        with metrics.timed("player.instance_ms"):
+            instance = get_vlc_instance()
+            pooled_players = self.lease(len(files))
+        self.root.update_idletasks()
+
+        for tile, (player, file, frame) in enumerate(zip(pooled_players, files, self.frames)):
+            pool_idx = self.pool_index(player)
+            init_started = now()
             try:
-                if os.name == "nt" or sys.platform.startswith("win"):
-                    player.set_hwnd(window_id)
-                elif sys.platform.startswith("linux"):
-                    player.set_xwindow(window_id)
-                elif sys.platform == "darwin":
-                    player.set_nsobject(window_id)
-                else:
-                    log(f"Unsupported platform: {sys.platform}")
+                vlc_log.info("Initializing player for %s", file)
+                lead_ms = self.file_leads_ms.get(file, 0)
+                self.tile_quality[pool_idx] = self.tile_level(tile)
+                media = open_media(instance, file, lead_ms, self.media_options(self.tile_quality[pool_idx], len(files)))
+                player.set_media(media)
+                media.release()
+                self.player_leads_ms[pool_idx] = lead_ms
+                if lead_ms:
+                    vlc_log.info("Player %d starts %dms into %s to line up with the other cameras",
+                                 pool_idx, lead_ms, os.path.basename(file))
+
+                attach_window(player, frame)
+                self.player_files[pool_idx] = file
+                get_keyframe_index().request(file)
+
+                self.players.append(player)
+                self.warmup_pending.add(pool_idx)
+                metrics.observe("player.init_ms", (now() - init_started) * 1000, camera_of(file))
             except Exception as e:
-                log(f"Failed to set window handle on {sys.platform}: {e}")
-
-            players.append(player)
-            player.play()
-            root.update()
-            wait_for_playback_ready(player)
-            print(f"  --> {file} ready")
-        except Exception as e:
-            print(f"[ERROR] Failed to init player for {file}: {e}")
+                vlc_log.error("Failed to init player for %s: %s", file, e)
+
+        if files:
+            request_sprites(files[0])
+
+        # every player opens at once, readiness comes back through the event pump
+        self.warmup_started = now()
+        decoder_budget.acquire(self, len(self.players))
+        for player in pooled_players:
+            pool_idx = self.pool_index(player)
+            if pool_idx in self.warmup_pending:
+                try:
+                    player.play()
+                except Exception as e:
+                    warmup_log.warning("Player %d play failed: %s", pool_idx, e)
+                    self.warmup_pending.discard(pool_idx)
+
+        self.check_sync()
+        self.check_decode_load()
+        self.pump_player_events()
+        if not self.warmup_pending:
+            self.finish_warmup()
+            return
+        self.root.after(WARMUP_TIMEOUT_MS, self.finish_warmup)
 
-    loading_popup.destroy()
-    root.deiconify()
-    root.focus_force()
-    set_controls_enabled(True)
 
-def play_videos(vlc_path, files, icon_path=None):
-    create_gui(files, icon_path)
\ No newline at end of file
+def play_videos(vlc_path, files, icon_path=None, catalog=None, start=None, offset=0, autoplay=False):
+    # every call opens its own window, windows already open keep playing
+    session = PlayerSession(files, catalog, start, offset, autoplay)
+    sessions.append(session)
+    session.create_gui(files, icon_path)
+    return session
@@ -0,0 +1,115 @@
+import os
+import re
+import bisect
+import ctypes
+import hashlib
+import logging
+import uuid
+from array import array
+
+logger = logging.getLogger(__name__)
+logger.debug("viewed.py initialized.")
+
+DRIVE_MARKER_FILE = ".vv_drive_id"
+DRIVE_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+
+def volume_serial(path):
+    if os.name != "nt":
+        return None
+    try:
+        root = os.path.splitdrive(os.path.abspath(path))[0] + "\\"
+        serial = ctypes.c_uint32()
+        if ctypes.windll.kernel32.GetVolumeInformationW(root, None, 0, ctypes.byref(serial), None, None, None, 0):
+            return f"{serial.value:08X}"
+    except Exception as e:
+        logger.debug("Could not read volume serial for %s: %s", path, e)
+    return None
+
+
+def drive_fingerprint(rec_path, drive_scan):
+    # the volume serial and the oldest chunk of every camera, changes when a camera is added or old
+    # footage is pruned, so it's only the id of a drive the marker file can't be written to
+    parts = [volume_serial(rec_path) or ""]
+    for cam_name in sorted(drive_scan):
+        files = drive_scan[cam_name]["files"]
+        if files:
+            name, size, _ = min(files)
+            parts.append(f"{cam_name}:{name}:{size}")
+        else:
+            parts.append(cam_name)
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def read_drive_marker(rec_path):
+    try:
+        with open(os.path.join(rec_path, DRIVE_MARKER_FILE), "r") as f:
+            marker = f.read().strip()
+    except OSError:
+        return None
+    return marker if DRIVE_ID_PATTERN.match(marker) else None
+
+
+def write_drive_marker(rec_path, drive_id):
+    path = os.path.join(rec_path, DRIVE_MARKER_FILE)
+    try:
+        with open(path, "x") as f:
+            f.write(drive_id)
+    except FileExistsError:
+        return read_drive_marker(rec_path) == drive_id
+    except OSError as e:
+        logger.info("Could not write drive marker %s: %s", path, e)
+        return False
+    return True
+
+
+def drive_identity(rec_path, drive_scan):
+    # drive letters change between machines and chunks come and go, so the id is kept in a small file
+    # on the drive itself. returns the id and the fingerprint the drive was known by before, if it moved
+    marker = read_drive_marker(rec_path)
+    if marker:
+        return marker, None
+    fingerprint = drive_fingerprint(rec_path, drive_scan)
+    drive_id = uuid.uuid4().hex[:16]
+    if write_drive_marker(rec_path, drive_id):
+        logger.info("Wrote drive marker %s to %s", drive_id, rec_path)
+        return drive_id, fingerprint
+    return fingerprint, None
+
+
+class ViewedIndex:
+    # sorted segment starts per camera, so a day's progress is two bisects per camera
+    def __init__(self):
+        self.cameras = {}
+
+    def load(self, rows):
+        self.cameras = {}
+        for camera, start in sorted(rows):
+            self.cameras.setdefault(camera, array("q")).append(start)
+
+    def clear(self):
+        self.cameras = {}
+
+    def __len__(self):
+        return sum(len(starts) for starts in self.cameras.values())
+
+    def add(self, camera, start):
+        starts = self.cameras.setdefault(camera, array("q"))
+        i = bisect.bisect_left(starts, start)
+        if i < len(starts) and starts[i] == start:
+            return False
+        starts.insert(i, start)
+        return True
+
+    def is_viewed(self, camera, start):
+        starts = self.cameras.get(camera)
+        if not starts:
+            return False
+        i = bisect.bisect_left(starts, start)
+        return i < len(starts) and starts[i] == start
+
+    def count_between(self, camera, t0, t1):
+        starts = self.cameras.get(camera)
+        if not starts:
+            return 0
+        return bisect.bisect_left(starts, t1) - bisect.bisect_left(starts, t0)